@@ -0,0 +1,45 @@
+import json
+import os
+import sys
+import timeit
+
+# Micro-benchmark do codec JSON com payloads parecidos com os do banco.
+# Uso: python bench_json.py [iteracoes]
+sys.path.append(os.getcwd())
+from utils import json_codec
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+TEMPLATE = {
+    "title": "📢 Anúncio Oficial da Cidade",
+    "description": "**Atenção, cidadãos!**\n" + "Novas regras entram em vigor a partir de hoje. " * 12,
+    "color": 3066993,
+    "fields": [{"name": f"📌 Regra {i}", "value": "Descrição detalhada da regra e da punição aplicada. " * 3, "inline": False} for i in range(6)],
+    "footer_text": "AURA • Administração", "footer_icon": "https://cdn.discordapp.com/icons/1/a.png",
+    "author_name": "Staff", "author_icon": None,
+    "image": "https://cdn.discordapp.com/attachments/1/2/banner.png", "thumbnail": None,
+    "buttons": [{"label": "Regras", "url": "https://example.com/regras", "emoji": "📜"}, {"label": "Site", "url": "https://example.com", "emoji": "🌐"}],
+}
+REQUIREMENTS = {"role_id": 1399529747393941716}
+PARTICIPANTS = [1399529747393941716 + i * 7919 for i in range(40)]
+
+PAYLOADS = [("template de embed", TEMPLATE), ("requisitos do sorteio", REQUIREMENTS), ("participantes (40 IDs)", PARTICIPANTS)]
+
+def per_call_us(fn):
+    return timeit.timeit(fn, number=N) / N * 1e6
+
+print(f"🧾 Codec: {json_codec.BACKEND} | {N} iterações por medida\n")
+for label, obj in PAYLOADS:
+    legacy = json.dumps(obj) # Formato antigo (espaços + \uXXXX)
+    compact = json_codec.dumps(obj)
+    assert json_codec.loads(compact) == obj == json.loads(legacy)
+
+    old_dump = per_call_us(lambda: json.dumps(obj))
+    new_dump = per_call_us(lambda: json_codec.dumps(obj))
+    old_load = per_call_us(lambda: json.loads(legacy))
+    new_load = per_call_us(lambda: json_codec.loads(compact))
+    cached = per_call_us(lambda: json_codec.loads_cached(compact))
+
+    print(f"📦 {label}: {len(legacy.encode())} -> {len(compact.encode())} bytes")
+    print(f"   dumps: {old_dump:7.2f}µs -> {new_dump:7.2f}µs ({old_dump / new_dump:.1f}x)")
+    print(f"   loads: {old_load:7.2f}µs -> {new_load:7.2f}µs ({old_load / new_load:.1f}x) | cache: {cached:.2f}µs\n")
@@ -27,7 +27,7 @@ class RoleSelector(discord.ui.RoleSelect):
         if interaction.user != view.author: return
 
         await interaction.response.defer()
-        if not interaction.guild.chunked: await interaction.guild.chunk()
+        await interaction.client.gateway.ensure_chunked(interaction.guild)
 
         view.target_members = set()
         for role in self.values:
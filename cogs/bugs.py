@@ -4,6 +4,7 @@ import os
 import datetime
 from discord.ext import commands
 from discord import app_commands, ui
+from database.config_store import module_config
 
 try:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -34,9 +35,7 @@ class Bugs(commands.Cog):
         await self.send_admin_panel(interaction)
 
     async def send_admin_panel(self, interaction: discord.Interaction, is_edit=False):
-        async with self.bot.db.execute("SELECT * FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            data = dict(zip([d[0] for d in cursor.description], row)) if row else {}
+        data = await module_config(self.bot.db, interaction.guild.id, "bugs") # Só config_bugs
 
         pub_id = data.get('bug_public_channel_id')
         stf_id = data.get('bug_staff_channel_id')
@@ -74,17 +73,15 @@ class Bugs(commands.Cog):
     # 📝 LÓGICA DE REPORT (SUBMIT)
     # ====================================================
     async def submit_bug(self, interaction, title, desc, steps, media):
-        async with self.bot.db.execute("SELECT bug_staff_channel_id, bug_count, bug_emoji_analyze, bug_emoji_fixed, bug_emoji_invalid FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
+        async with self.bot.db.execute("SELECT bug_staff_channel_id, bug_emoji_analyze, bug_emoji_fixed, bug_emoji_invalid FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
             res = await cursor.fetchone()
             if not res or not res[0]:
                 return await interaction.response.send_message("❌ Erro: Canal da Staff não configurado.", ephemeral=True)
             
             staff_channel_id = res[0]
-            count = (res[1] or 0) + 1
-            emojis = {'analyze': res[2] or "🔍", 'fixed': res[3] or "✅", 'invalid': res[4] or "❌"}
+            emojis = {'analyze': res[1] or "🔍", 'fixed': res[2] or "✅", 'invalid': res[3] or "❌"}
 
-        await self.bot.db.execute("UPDATE config SET bug_count = ? WHERE guild_id = ?", (count, interaction.guild.id))
-        await self.bot.db.commit()
+        count = await self.bot.counters.next(interaction.guild.id, "bug")
 
         staff_chan = self.bot.get_channel(staff_channel_id)
         if not staff_chan:
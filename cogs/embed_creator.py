@@ -1,10 +1,24 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, ui
-import json
 import aiohttp
 import asyncio
 from utils.license_manager import check_license
+from utils import json_codec
+
+# ====================================================
+# 📂 TEMPLATES (Menu só com nomes; o JSON é lido ao escolher)
+# ====================================================
+async def template_names(db, guild_id):
+    # Select do Discord: máx. 25 opções e value com até 100 caracteres (o JSON inteiro não cabe)
+    async with db.execute("SELECT name FROM embed_templates WHERE guild_id = ? ORDER BY name LIMIT 25", (guild_id,)) as c:
+        return [row[0] for row in await c.fetchall()]
+
+async def load_template_state(db, guild_id, name):
+    """State novo (editável) do template, ou None se ele não existir mais."""
+    async with db.execute("SELECT data FROM embed_templates WHERE guild_id = ? AND name = ?", (guild_id, name)) as c:
+        row = await c.fetchone()
+    return json_codec.loads(row[0]) if row else None
 
 class EmbedCreator(commands.Cog):
     def __init__(self, bot):
@@ -133,8 +147,7 @@ class EmbedBuilderView(ui.View):
 
     @ui.button(label="Carregar", emoji="📂", style=discord.ButtonStyle.primary, row=2)
     async def load_template(self, i, b):
-        async with self.bot.db.execute("SELECT name, data FROM embed_templates WHERE guild_id = ?", (i.guild.id,)) as c:
-            temps = await c.fetchall()
+        temps = await template_names(self.bot.db, i.guild.id)
         if not temps: return await i.response.send_message("❌ Nenhum template salvo.", ephemeral=True)
         await i.response.send_message("📂 **Selecione um Template:**", view=TemplateLoadView(self, temps), ephemeral=True)
 
@@ -205,7 +218,7 @@ class JSONImportModal(ui.Modal, title="Importar JSON"):
     def __init__(self, parent): super().__init__(); self.parent = parent
     async def on_submit(self, i):
         try:
-            data = json.loads(self.json_data.value)
+            data = json_codec.loads(self.json_data.value)
             # Tratamento básico para compatibilidade com Discohook/Embeds
             if "embeds" in data and len(data["embeds"]) > 0: e = data["embeds"][0]
             else: e = data
@@ -230,7 +243,7 @@ class SaveTemplateModal(ui.Modal, title="Salvar Template"):
     name = ui.TextInput(label="Nome do Template", placeholder="Ex: AnuncioPromo")
     def __init__(self, parent): super().__init__(); self.parent = parent
     async def on_submit(self, i):
-        dump = json.dumps(self.parent.state)
+        dump = json_codec.dumps(self.parent.state)
         await self.parent.bot.db.execute("INSERT OR REPLACE INTO embed_templates (name, data, guild_id) VALUES (?, ?, ?)", (self.name.value, dump, i.guild.id))
         await self.parent.bot.db.commit()
         await i.response.send_message(f"✅ Template `{self.name.value}` salvo!", ephemeral=True)
@@ -316,13 +329,14 @@ class ButtonManagerView(ui.View):
 class TemplateLoadView(ui.View):
     def __init__(self, parent, templates):
         super().__init__(timeout=60); self.parent = parent
-        options = [discord.SelectOption(label=t[0], value=t[1]) for t in templates]
+        options = [discord.SelectOption(label=name, value=name) for name in templates]
         self.sel = ui.Select(placeholder="Escolha um template...", options=options)
         self.sel.callback = self.cb
         self.add_item(self.sel)
     async def cb(self, i):
         try:
-            data = json.loads(self.sel.values[0])
+            data = await load_template_state(self.parent.bot.db, i.guild.id, self.sel.values[0])
+            if data is None: return await i.response.send_message("❌ Template não encontrado.", ephemeral=True)
             self.parent.state = data
             await self.parent.update_view(i)
         except: await i.response.send_message("❌ Erro ao carregar template.", ephemeral=True)
@@ -421,8 +435,7 @@ class EmbedLauncherView(ui.View):
 
     @ui.button(label="Meus Templates", style=discord.ButtonStyle.primary, emoji="📂", custom_id="embed_launcher_load")
     async def load_embed(self, i, b):
-        async with self.bot.db.execute("SELECT name, data FROM embed_templates WHERE guild_id = ?", (i.guild.id,)) as c:
-            temps = await c.fetchall()
+        temps = await template_names(self.bot.db, i.guild.id)
         
         if not temps: return await i.response.send_message("❌ Nenhum template salvo.", ephemeral=True)
         
@@ -440,13 +453,14 @@ class EmbedLauncherView(ui.View):
 class LauncherTemplateLoadView(ui.View):
     def __init__(self, bot, templates):
         super().__init__(timeout=60); self.bot = bot
-        options = [discord.SelectOption(label=t[0], value=t[1]) for t in templates]
+        options = [discord.SelectOption(label=name, value=name) for name in templates]
         self.sel = ui.Select(placeholder="Escolha um template...", options=options)
         self.sel.callback = self.cb
         self.add_item(self.sel)
     async def cb(self, i):
         try:
-            data = json.loads(self.sel.values[0])
+            data = await load_template_state(self.bot.db, i.guild.id, self.sel.values[0])
+            if data is None: return await i.response.send_message("❌ Template não encontrado.", ephemeral=True)
             view = EmbedBuilderView(self.bot, i, data)
             await i.response.send_message(embed=view.build_embed(), view=view, ephemeral=True)
         except: await i.response.send_message("❌ Erro ao carregar template.", ephemeral=True)
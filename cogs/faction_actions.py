@@ -1,9 +1,13 @@
 import discord
-from discord.ext import tasks, commands
+from discord.ext import commands
 from discord import app_commands, ui
-import json
+from utils import json_codec
 import datetime
 import asyncio
+import time
+import aiohttp
+from database.migrations import run_migrations, add_columns
+from database.config_store import module_config
 
 # ====================================================
 # 🎨 CORES E CONSTANTES
@@ -22,70 +26,221 @@ def parse_emoji(custom_emoji):
         except: pass
     return custom_emoji
 
+# ====================================================
+# 🧬 MIGRAÇÕES DO MÓDULO
+# ====================================================
+async def _m001_category_bonus_webhook(db):
+    await add_columns(db, "faction_actions", [("category", "TEXT DEFAULT 'PVP'")])
+
+    # Tabela de Bônus Manual
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS ranking_bonus (
+            user_id INTEGER,
+            guild_id INTEGER,
+            bonus_wins INTEGER DEFAULT 0,
+            bonus_actions INTEGER DEFAULT 0,
+            bonus_mvps INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, guild_id)
+        )
+    """)
+
+    # Webhook Column (Config Table)
+    await add_columns(db, "config", [("action_ranking_webhook", "TEXT")])
+
+async def _m002_action_participants(db):
+    # Participantes normalizados (1 linha por membro/ação) no lugar das listas JSON
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS action_participants (
+            message_id INTEGER,
+            user_id INTEGER,
+            guild_id INTEGER,
+            state TEXT DEFAULT 'IN', -- IN, CANCELLED
+            joined_at INTEGER, -- Epoch (segundos)
+            reason TEXT, -- Motivo do cancelamento
+            PRIMARY KEY (message_id, user_id)
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_part_guild_state_user ON action_participants(guild_id, state, user_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_actions_guild_status ON faction_actions(guild_id, status)")
+
+    # Migra os dados antigos (JSON) uma única vez. A ordem de entrada é preservada pelo rowid.
+    async with db.execute("SELECT message_id, guild_id, participants, cancellations FROM faction_actions") as cursor:
+        rows = await cursor.fetchall()
+
+    now = int(time.time())
+    entries = []
+    for message_id, guild_id, participants, cancellations in rows:
+        try: participants = json_codec.loads(participants) if participants else []
+        except Exception: participants = []
+        try: cancellations = json_codec.loads(cancellations) if cancellations else []
+        except Exception: cancellations = []
+
+        for uid in participants:
+            entries.append((message_id, uid, guild_id, 'IN', now, None))
+        for c in cancellations:
+            if isinstance(c, dict) and c.get('user_id'):
+                entries.append((message_id, c['user_id'], guild_id, 'CANCELLED', now, c.get('reason')))
+
+    if entries:
+        # Quem está em participants e em cancellations (reentrou) fica como IN
+        await db.executemany("""
+            INSERT OR IGNORE INTO action_participants (message_id, user_id, guild_id, state, joined_at, reason)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, entries)
+    print(f"   ├─ 👥 {len(entries)} participações migradas de {len(rows)} ações.")
+
+async def _m003_faction_ranking(db):
+    # Ranking materializado: atualizado na mesma transação dos eventos (resultado, MVP, bônus)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS faction_ranking (
+            guild_id INTEGER,
+            category TEXT, -- Categoria da ação, 'ALL' (geral) ou '_BONUS' (pontos manuais)
+            user_id INTEGER,
+            total INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            mvps INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, category, user_id)
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_franking_top ON faction_ranking(guild_id, category, total DESC)")
+
+    # Reconstrói a partir do histórico (uma vez)
+    await db.execute("DELETE FROM faction_ranking")
+    for cat_expr in ("COALESCE(fa.category, 'PVP')", "'ALL'"):
+        await db.execute(f"""
+            INSERT INTO faction_ranking (guild_id, category, user_id, total, wins, mvps)
+            SELECT ap.guild_id, {cat_expr}, ap.user_id, COUNT(*), SUM(fa.status = 'WIN'), 0
+            FROM action_participants ap
+            JOIN faction_actions fa ON fa.message_id = ap.message_id
+            WHERE ap.state = 'IN' AND fa.status IN ('WIN', 'LOSS')
+            GROUP BY ap.guild_id, {cat_expr}, ap.user_id
+        """)
+        await db.execute(f"""
+            INSERT INTO faction_ranking (guild_id, category, user_id, total, wins, mvps)
+            SELECT fa.guild_id, {cat_expr}, fa.mvp_id, 0, 0, COUNT(*)
+            FROM faction_actions fa
+            WHERE fa.status IN ('WIN', 'LOSS') AND fa.mvp_id IS NOT NULL
+            GROUP BY fa.guild_id, {cat_expr}, fa.mvp_id
+            ON CONFLICT(guild_id, category, user_id) DO UPDATE SET mvps = mvps + excluded.mvps
+        """)
+    await db.execute("""
+        INSERT INTO faction_ranking (guild_id, category, user_id, total, wins, mvps)
+        SELECT guild_id, '_BONUS', user_id, bonus_actions, bonus_wins, bonus_mvps FROM ranking_bonus
+    """)
+
+MIGRATIONS = [
+    (1, "Categoria, bônus manual e webhook de ranking", _m001_category_bonus_webhook),
+    (2, "Tabela action_participants (migração do JSON)", _m002_action_participants),
+    (3, "Ranking materializado (faction_ranking)", _m003_faction_ranking),
+]
+
+# ====================================================
+# 🏆 RANKING MATERIALIZADO (DELTAS)
+# ====================================================
+FINISHED = ('WIN', 'LOSS')
+
+RANKING_PARTICIPANTS_DELTA = """
+    INSERT INTO faction_ranking (guild_id, category, user_id, total, wins, mvps)
+    SELECT guild_id, ?, user_id, ?, ?, 0 FROM action_participants
+    WHERE message_id = ? AND state = 'IN'
+    ON CONFLICT(guild_id, category, user_id) DO UPDATE SET
+    total = total + excluded.total, wins = wins + excluded.wins
+"""
+RANKING_USER_DELTA = """
+    INSERT INTO faction_ranking (guild_id, category, user_id, total, wins, mvps) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(guild_id, category, user_id) DO UPDATE SET
+    total = total + excluded.total, wins = wins + excluded.wins, mvps = mvps + excluded.mvps
+"""
+
+def ranking_result_statements(data, old_status):
+    """Deltas do ranking quando o status da ação muda (ex: OPEN -> WIN)."""
+    new_status = data['status']
+    d_total = (new_status in FINISHED) - (old_status in FINISHED)
+    d_wins = (new_status == 'WIN') - (old_status == 'WIN')
+    if not d_total and not d_wins: return []
+
+    statements = []
+    for cat in (data.get('category') or 'PVP', 'ALL'):
+        statements.append((RANKING_PARTICIPANTS_DELTA, (cat, d_total, d_wins, data['message_id'])))
+        if data.get('mvp_id') and d_total:
+            statements.append((RANKING_USER_DELTA, (data['guild_id'], cat, data['mvp_id'], 0, 0, d_total)))
+    return statements
+
+def ranking_mvp_statements(data, old_mvp, new_mvp):
+    """Deltas do ranking quando o MVP de uma ação finalizada muda."""
+    if data['status'] not in FINISHED or old_mvp == new_mvp: return []
+
+    statements = []
+    for cat in (data.get('category') or 'PVP', 'ALL'):
+        if old_mvp: statements.append((RANKING_USER_DELTA, (data['guild_id'], cat, old_mvp, 0, 0, -1)))
+        if new_mvp: statements.append((RANKING_USER_DELTA, (data['guild_id'], cat, new_mvp, 0, 0, 1)))
+    return statements
+
 class FactionActions(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.auto_ranking_loop.start()
+        # Uma execução por guild com canal de ranking, espalhadas ao longo da hora
+        self.bot.scheduler.register("faction_ranking", self.auto_ranking_loop, interval=3600, keys=self._ranking_guilds)
 
     def cog_unload(self):
-        self.auto_ranking_loop.cancel()
+        self.bot.scheduler.unregister("faction_ranking")
+
+    async def cog_load(self):
+        # Migração DB (versionada: só roda se houver versão pendente)
+        await run_migrations(self.bot.db, "faction_actions", MIGRATIONS)
 
     # ====================================================
     # � LOOP DE RANKING AUTOMÁTICO
     # ====================================================
-    @tasks.loop(hours=1)
-    async def auto_ranking_loop(self):
-        async with self.bot.db.execute("SELECT guild_id, action_ranking_channel_id FROM config") as cursor:
-            configs = await cursor.fetchall()
-        
-        for guild_id, channel_id in configs:
-            if not channel_id: continue
-            
-            guild = self.bot.get_guild(guild_id)
-            if not guild: continue
-            
-            channel = guild.get_channel(channel_id)
-            if not channel: continue
-            
-            embed = await self._build_ranking_embed(guild)
-            
-            # Tenta editar a última mensagem do bot ou envia uma nova
-            try:
-                last_message = None
-                async for msg in channel.history(limit=10):
-                    if msg.author == self.bot.user:
-                        last_message = msg
-                        break
-                
-                if last_message:
-                    await last_message.edit(embed=embed)
-                else:
-                    await channel.send(embed=embed)
+    async def _ranking_guilds(self):
+        async with self.bot.db.execute("SELECT guild_id FROM config WHERE action_ranking_channel_id IS NOT NULL") as cursor:
+            rows = await cursor.fetchall()
+        return [guild_id for guild_id, in rows if self.bot.get_guild(guild_id)]
 
-                # Backup Webhook
-                async with self.bot.db.execute("SELECT action_ranking_webhook FROM config WHERE guild_id = ?", (guild_id,)) as cursor:
-                    res = await cursor.fetchone()
-                
-                webhook_url = res[0] if res else None
-                if webhook_url:
-                    try:
-                        async with aiohttp.ClientSession() as session:
-                            webhook = discord.Webhook.from_url(webhook_url, session=session)
-                            await webhook.send(embed=embed, username=f"Backup Ranking - {guild.name}", avatar_url=self.bot.user.display_avatar.url)
-                        print(f"✅ [WEBHOOK] Backup enviado com sucesso para Guild {guild_id}")
-                    except Exception as we:
-                        print(f"⚠️ [WEBHOOK ERROR] Falha ao enviar backup: {we}")
+    async def auto_ranking_loop(self, guild_id):
+        guild = self.bot.get_guild(guild_id)
+        if not guild: return
 
-            except Exception as e:
-                print(f"❌ [RANKING ERROR] Erro no loop de ranking (Guild {guild_id}): {e}")
-                import traceback
-                traceback.print_exc()
+        cfg = await self.bot.config_cache.get(guild_id)
+        channel = guild.get_channel(cfg.action_ranking_channel_id) if cfg.action_ranking_channel_id else None
+        if not channel: return
+
+        embed = await self._build_ranking_embed(guild)
+        # Ranking igual ao da última rodada: sem histórico, edição nem webhook de backup
+        if self.bot.scheduler.unchanged("faction_ranking", guild_id, (channel.id, embed.description)): return
+
+        # Tenta editar a última mensagem do bot ou envia uma nova
+        try:
+            last_message = None
+            async for msg in channel.history(limit=10):
+                if msg.author == self.bot.user:
+                    last_message = msg
+                    break
+            
+            if last_message:
+                await last_message.edit(embed=embed)
+            else:
+                await channel.send(embed=embed)
 
-    @auto_ranking_loop.before_loop
-    async def before_auto_ranking(self):
-        print("⏳ [RANKING] Aguardando bot estar pronto...")
-        await self.bot.wait_until_ready()
-        print("✅ [RANKING] Bot pronto. Loop iniciado.")
+            # Backup Webhook
+            async with self.bot.db.execute("SELECT action_ranking_webhook FROM config WHERE guild_id = ?", (guild_id,)) as cursor:
+                res = await cursor.fetchone()
+            
+            webhook_url = res[0] if res else None
+            if webhook_url:
+                try:
+                    async with aiohttp.ClientSession() as session:
+                        webhook = discord.Webhook.from_url(webhook_url, session=session)
+                        await webhook.send(embed=embed, username=f"Backup Ranking - {guild.name}", avatar_url=self.bot.user.display_avatar.url)
+                    print(f"✅ [WEBHOOK] Backup enviado com sucesso para Guild {guild_id}")
+                except Exception as we:
+                    print(f"⚠️ [WEBHOOK ERROR] Falha ao enviar backup: {we}")
+
+        except Exception as e:
+            self.bot.scheduler.forget("faction_ranking", guild_id)
+            print(f"❌ [RANKING ERROR] Erro no loop de ranking (Guild {guild_id}): {e}")
+            import traceback
+            traceback.print_exc()
 
 
 
@@ -99,9 +254,7 @@ class FactionActions(commands.Cog):
         await self.send_config_panel(interaction)
 
     async def send_config_panel(self, interaction: discord.Interaction, is_edit=False):
-        async with self.bot.db.execute("SELECT * FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            cfg = dict(zip([d[0] for d in cursor.description], row)) if row else {}
+        cfg = await module_config(self.bot.db, interaction.guild.id, "actions") # Só config_actions
 
         embed = discord.Embed(title="⚙️ Configuração de Ações", color=0x2b2d31)
         embed.description = (
@@ -131,39 +284,6 @@ class FactionActions(commands.Cog):
             'join': row[0], 'leave': row[1], 'win': row[2], 'loss': row[3], 'notify': row[4], 'edit': row[5]
         }
 
-    async def _check_db_columns(self):
-        async with self.bot.db.execute("PRAGMA table_info(faction_actions)") as cursor:
-            columns = [row[1] for row in await cursor.fetchall()]
-        
-        if "category" not in columns:
-            print("⚠️ Coluna 'category' não encontrada em faction_actions. Adicionando...")
-            await self.bot.db.execute("ALTER TABLE faction_actions ADD COLUMN category TEXT DEFAULT 'PVP'")
-            await self.bot.db.commit()
-            print("✅ Coluna 'category' adicionada com sucesso.")
-            
-        # Tabela de Bônus Manual
-        await self.bot.db.execute("""
-            CREATE TABLE IF NOT EXISTS ranking_bonus (
-                user_id INTEGER,
-                guild_id INTEGER,
-                bonus_wins INTEGER DEFAULT 0,
-                bonus_actions INTEGER DEFAULT 0,
-                bonus_mvps INTEGER DEFAULT 0,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        """)
-        await self.bot.db.commit()
-
-        # Webhook Column (Config Table)
-        async with self.bot.db.execute("PRAGMA table_info(config)") as cursor:
-            cols = [row[1] for row in await cursor.fetchall()]
-            
-        if "action_ranking_webhook" not in cols:
-             print("⚠️ Coluna 'action_ranking_webhook' não encontrada em config. Adicionando...")
-             await self.bot.db.execute("ALTER TABLE config ADD COLUMN action_ranking_webhook TEXT")
-             await self.bot.db.commit()
-             print("✅ Coluna 'action_ranking_webhook' adicionada.")
-
     # ====================================================
     # 📊 RANKING
     # ====================================================
@@ -180,55 +300,18 @@ class FactionActions(commands.Cog):
         await interaction.followup.send(embed=embed)
 
     async def _build_ranking_embed(self, guild, category=None):
-        # Busca todas as ações finalizadas (WIN ou LOSS)
-        query = "SELECT participants, status, mvp_id FROM faction_actions WHERE guild_id = ? AND status IN ('WIN', 'LOSS')"
-        params = [guild.id]
-        
-        if category:
-            query += " AND category = ?"
-            params.append(category)
-            
-        async with self.bot.db.execute(query, tuple(params)) as cursor:
+        # Leitura do ranking materializado: categoria (ou geral) + bônus manual, direto no índice
+        async with self.bot.partitions.acquire(guild.id) as part, part.db.execute("""
+            SELECT user_id, SUM(total), SUM(wins), SUM(mvps) FROM faction_ranking
+            WHERE guild_id = ? AND category IN (?, '_BONUS')
+            GROUP BY user_id
+            HAVING SUM(total) > 0 OR SUM(wins) > 0 OR SUM(mvps) > 0
+            ORDER BY SUM(total) DESC
+            LIMIT 10
+        """, (guild.id, category or 'ALL')) as cursor:
             rows = await cursor.fetchall()
-            
-        print(f"📊 [RANKING DEBUG] Guild {guild.id} | Categoria: {category} | Rows: {len(rows)}")
-        if rows:
-            print(f"   > Exemplo Row 0: {rows[0]}")
-            
-        scores = {}
-        
-        if rows:
-            for row in rows:
-                try:
-                    participants = json.loads(row[0]) if row[0] else []
-                except Exception as e:
-                    print(f"⚠️ [RANKING ERROR] Falha ao ler participantes da Row: {row} -> {e}")
-                    participants = []
 
-                status = row[1]
-                mvp_id = row[2]
-                
-                for uid in participants:
-                    if uid not in scores: scores[uid] = {'total': 0, 'wins': 0, 'mvps': 0}
-                    scores[uid]['total'] += 1
-                    if status == 'WIN': scores[uid]['wins'] += 1
-                
-                if mvp_id:
-                    if mvp_id not in scores: scores[mvp_id] = {'total': 0, 'wins': 0, 'mvps': 0}
-                    scores[mvp_id]['mvps'] += 1
-        
-        # Injeta Pontos Manuais (Bônus)
-        async with self.bot.db.execute("SELECT user_id, bonus_actions, bonus_wins, bonus_mvps FROM ranking_bonus WHERE guild_id = ?", (guild.id,)) as cursor:
-             bonus_rows = await cursor.fetchall()
-             
-        for uid, b_act, b_wins, b_mvps in bonus_rows:
-            if uid not in scores: scores[uid] = {'total': 0, 'wins': 0, 'mvps': 0}
-            scores[uid]['total'] += b_act
-            scores[uid]['wins'] += b_wins
-            scores[uid]['mvps'] += b_mvps
-
-        # Ordena por total de participações
-        sorted_scores = sorted(scores.items(), key=lambda x: x[1]['total'], reverse=True)[:10]
+        sorted_scores = [(uid, {'total': total or 0, 'wins': wins or 0, 'mvps': mvps or 0}) for uid, total, wins, mvps in rows]
         
         embed = discord.Embed(title=f"🏆 Ranking de Ações ({category if category else 'Geral'})", color=COLOR_OPEN)
         description = ""
@@ -236,6 +319,7 @@ class FactionActions(commands.Cog):
         if not sorted_scores:
             description = "Nenhum dado relevante."
         else:
+            await self.bot.gateway.ensure_chunked(guild) # get_member de cada membro do top 10
             for idx, (uid, stats) in enumerate(sorted_scores):
                 user = guild.get_member(uid)
                 name = user.mention if user else f"ID: {uid}"
@@ -268,24 +352,29 @@ class FactionActions(commands.Cog):
     async def add_points(self, interaction: discord.Interaction, membro: discord.Member, acoes: int = 0, vitorias: int = 0, mvps: int = 0):
         await interaction.response.defer(ephemeral=True)
         
-        # Update or Insert (Upsert)
-        await self.bot.db.execute("""
-            INSERT INTO ranking_bonus (user_id, guild_id, bonus_actions, bonus_wins, bonus_mvps)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET
-            bonus_actions = bonus_actions + excluded.bonus_actions,
-            bonus_wins = bonus_wins + excluded.bonus_wins,
-            bonus_mvps = bonus_mvps + excluded.bonus_mvps
-        """, (membro.id, interaction.guild.id, acoes, vitorias, mvps))
-        
-        await self.bot.db.commit()
+        # Update or Insert (Upsert) + ranking materializado, no mesmo commit
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            await part.write_queue.transaction([
+                ("""
+                    INSERT INTO ranking_bonus (user_id, guild_id, bonus_actions, bonus_wins, bonus_mvps)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                    bonus_actions = bonus_actions + excluded.bonus_actions,
+                    bonus_wins = bonus_wins + excluded.bonus_wins,
+                    bonus_mvps = bonus_mvps + excluded.bonus_mvps
+                """, (membro.id, interaction.guild.id, acoes, vitorias, mvps)),
+                (RANKING_USER_DELTA, (interaction.guild.id, '_BONUS', membro.id, acoes, vitorias, mvps))
+            ])
         await interaction.followup.send(f"✅ Adicionado para {membro.mention}:\n+ {acoes} Ações\n+ {vitorias} Vitórias\n+ {mvps} MVPs", ephemeral=True)
 
     @app_commands.command(name="remover_pontos", description="⚠️ Remove TODOS os pontos manuais de um usuário.")
     @app_commands.checks.has_permissions(administrator=True)
     async def remove_points(self, interaction: discord.Interaction, membro: discord.Member):
-        await self.bot.db.execute("DELETE FROM ranking_bonus WHERE user_id = ? AND guild_id = ?", (membro.id, interaction.guild.id))
-        await self.bot.db.commit()
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            await part.write_queue.transaction([
+                ("DELETE FROM ranking_bonus WHERE user_id = ? AND guild_id = ?", (membro.id, interaction.guild.id)),
+                ("DELETE FROM faction_ranking WHERE guild_id = ? AND category = '_BONUS' AND user_id = ?", (interaction.guild.id, membro.id))
+            ])
         await interaction.response.send_message(f"✅ Pontos manuais de {membro.mention} removidos.", ephemeral=True)
 
 
@@ -382,16 +471,17 @@ class FactionActions(commands.Cog):
 
             # 5. Salva no Banco
             try:
-                await self.bot.db.execute("""
-                    INSERT INTO faction_actions (
-                        message_id, channel_id, guild_id, responsible_id, 
-                        action_name, date_time, slots, status, participants, cancellations, category
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    message.id, channel.id, interaction.guild.id, interaction.user.id,
-                    acao, data_hora_str, vagas, "OPEN", json.dumps([]), json.dumps([]), categoria
-                ))
-                await self.bot.db.commit()
+                async with self.bot.partitions.acquire(interaction.guild.id) as part:
+                    await part.db.execute("""
+                        INSERT INTO faction_actions (
+                            message_id, channel_id, guild_id, responsible_id,
+                            action_name, date_time, slots, status, participants, cancellations, category
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        message.id, channel.id, interaction.guild.id, interaction.user.id,
+                        acao, data_hora_str, vagas, "OPEN", "[]", "[]", categoria
+                    ))
+                    await part.db.commit()
             except Exception as dbe:
                 # Tenta apagar a mensagem se falhar no banco para não ficar fantasma
                 await message.delete()
@@ -416,8 +506,8 @@ class FactionActions(commands.Cog):
 
         embed = discord.Embed(title=f"⚔️ {data['name']} | {data.get('category', 'PVP')}", color=color)
         
-        responsible = guild.get_member(data['responsible'])
-        resp_name = responsible.mention if responsible else "Desconhecido"
+        # Menção direta pelo ID: o Discord resolve o nome, sem depender do cache de membros (sem chunk no startup)
+        resp_name = f"<@{data['responsible']}>" if data.get('responsible') else "Desconhecido"
 
         embed.add_field(name="📅 Data/Hora", value=data['datetime'], inline=True)
         embed.add_field(name="👮 Responsável", value=resp_name, inline=True)
@@ -430,10 +520,7 @@ class FactionActions(commands.Cog):
         for i in range(slots):
             idx = i + 1
             if i < len(participants):
-                uid = participants[i]
-                user = guild.get_member(uid)
-                name = user.mention if user else f"ID: {uid}"
-                participants_text += f"`{idx}.` {name}\n"
+                participants_text += f"`{idx}.` <@{participants[i]}>\n"
             else:
                 participants_text += f"`{idx}.` *Vaga Disponível*\n"
         
@@ -470,7 +557,6 @@ class FactionActions(commands.Cog):
     # ====================================================
     @commands.Cog.listener()
     async def on_ready(self):
-        await self._check_db_columns()
         self.bot.add_view(ActionView(self.bot, {}))
         self.bot.add_view(ActionCreationDashboard(self.bot, self))
         print("✅ [FactionActions] Dashboard de Criação carregado.")
@@ -606,19 +692,33 @@ class ActionView(ui.View):
                 self.join_action.label = f"Participar ({participants_len}/{slots})"
                 self.join_action.disabled = False
 
-    async def _update_message(self, interaction, new_data):
-        # Atualiza DB
-        await self.bot.db.execute("""
-            UPDATE faction_actions 
-            SET status=?, participants=?, cancellations=?, profit=?, action_name=?, date_time=?, slots=?
-            WHERE message_id=?
-        """, (
-            new_data['status'], json.dumps(new_data['participants']), 
-            json.dumps(new_data['cancellations']), new_data.get('profit'), 
-            new_data['name'], new_data['datetime'], new_data['slots'],
-            interaction.message.id
-        ))
-        await self.bot.db.commit()
+    async def _update_message(self, interaction, new_data, persist=True, old_status=None):
+        # Atualiza DB (Fila de escrita: aguarda o commit em lote)
+        # Participantes ficam em action_participants; aqui só os campos da ação.
+        # Finalização (old_status): o UPDATE só vale se o status ainda for o lido; o ranking materializado
+        # entra no mesmo run(fn) e só se o UPDATE pegou a linha (dois cliques não contam o resultado duas vezes).
+        # Retorna False se outro clique mudou o status antes (nada é gravado nem editado).
+        if persist:
+            update_sql = "UPDATE faction_actions SET status=?, profit=?, action_name=?, date_time=?, slots=? WHERE message_id=?"
+            params = (
+                new_data['status'], new_data.get('profit'),
+                new_data['name'], new_data['datetime'], new_data['slots'],
+                interaction.message.id
+            )
+            async with self.bot.partitions.acquire(interaction.guild.id) as part:
+                if old_status:
+                    async def finish(db):
+                        cursor = await db.execute(update_sql + " AND status=?", (*params, old_status))
+                        changed = cursor.rowcount
+                        await cursor.close()
+                        if changed != 1: return False
+                        for sql, values in ranking_result_statements(new_data, old_status):
+                            cursor = await db.execute(sql, values)
+                            await cursor.close()
+                        return True
+                    if not await part.write_queue.run(finish): return False
+                else:
+                    await part.write_queue.execute(update_sql, params)
 
         # Reconstrói Embed
         cog = self.bot.get_cog("FactionActions")
@@ -638,19 +738,25 @@ class ActionView(ui.View):
 
 
         await interaction.message.edit(embed=embed, view=new_view)
+        return True
 
     async def _get_current_data(self, interaction):
-        # Busca dados atualizados do DB
-        async with self.bot.db.execute("SELECT * FROM faction_actions WHERE message_id = ?", (interaction.message.id,)) as cursor:
-            row = await cursor.fetchone()
-        
-        if not row: return None
-        
-        cols = [d[0] for d in cursor.description]
-        data = dict(zip(cols, row))
-        
-        data['participants'] = json.loads(data['participants'])
-        data['cancellations'] = json.loads(data['cancellations'])
+        # Busca dados atualizados do DB (arquivo da guild no modo particionado)
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            async with part.db.execute("SELECT * FROM faction_actions WHERE message_id = ?", (interaction.message.id,)) as cursor:
+                row = await cursor.fetchone()
+
+            if not row: return None
+
+            cols = [d[0] for d in cursor.description]
+            data = dict(zip(cols, row))
+
+            # Participantes e cancelamentos (ordem de entrada)
+            data['participants'], data['cancellations'] = [], []
+            async with part.db.execute("SELECT user_id, state, reason FROM action_participants WHERE message_id = ? ORDER BY joined_at, rowid", (interaction.message.id,)) as cursor:
+                for uid, state, reason in await cursor.fetchall():
+                    if state == 'IN': data['participants'].append(uid)
+                    else: data['cancellations'].append({"user_id": uid, "reason": reason})
         
         # Renomeia chaves para compatibilidade
         data['name'] = data['action_name']
@@ -673,17 +779,50 @@ class ActionView(ui.View):
         if len(data['participants']) >= data['slots']:
             return await interaction.response.send_message("❌ Ação lotada!", ephemeral=True)
 
+        # Uma linha por participante (reentrada reaproveita a linha cancelada)
+        # A vaga é conferida dentro do próprio INSERT: dois cliques simultâneos não passam do limite
+        async def join(db):
+            cursor = await db.execute("""
+                INSERT INTO action_participants (message_id, user_id, guild_id, state, joined_at, reason)
+                SELECT message_id, ?, ?, 'IN', ?, NULL FROM faction_actions
+                WHERE message_id = ? AND status NOT IN ('WIN', 'LOSS')
+                AND (SELECT COUNT(*) FROM action_participants WHERE message_id = ? AND state = 'IN') < slots
+                ON CONFLICT(message_id, user_id) DO UPDATE SET state = 'IN', joined_at = excluded.joined_at, reason = NULL
+                WHERE action_participants.state != 'IN'
+            """, (interaction.user.id, interaction.guild.id, int(time.time()), interaction.message.id, interaction.message.id))
+            joined = cursor.rowcount
+            await cursor.close()
+            if joined: return "joined"
+            # Nada gravado: ou a ação lotou, ou o clique duplo já tinha entrado
+            async with db.execute("SELECT 1 FROM action_participants WHERE message_id = ? AND user_id = ? AND state = 'IN'", (interaction.message.id, interaction.user.id)) as cursor:
+                return "already" if await cursor.fetchone() else None
+
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            result = await part.write_queue.run(join)
+        if result == "already":
+            return await interaction.response.send_message("⚠️ Você já está participando!", ephemeral=True)
+        if not result:
+            return await interaction.response.send_message("❌ Ação lotada!", ephemeral=True)
+
         data['participants'].append(interaction.user.id)
+        data['cancellations'] = [c for c in data['cancellations'] if c['user_id'] != interaction.user.id]
         
-        if len(data['participants']) >= data['slots']:
+        status_changed = False
+        if len(data['participants']) >= data['slots'] and data['status'] != 'FULL':
             data['status'] = 'FULL'
+            status_changed = True
         
-        await self._update_message(interaction, data)
+        await self._update_message(interaction, data, persist=status_changed)
         await interaction.response.send_message("✅ Você entrou na ação!", ephemeral=True)
 
     @ui.button(label="Cancelar", style=discord.ButtonStyle.secondary, emoji="✖️", custom_id="act_leave")
     async def leave_action(self, interaction: discord.Interaction, button: ui.Button):
         data = await self._get_current_data(interaction)
+        if not data: return await interaction.response.send_message("❌ Ação não encontrada.", ephemeral=True)
+
+        if data['status'] in FINISHED:
+            return await interaction.response.send_message("❌ Esta ação já foi finalizada.", ephemeral=True)
+
         if interaction.user.id not in data['participants']:
             return await interaction.response.send_message("⚠️ Você não está nessa ação.", ephemeral=True)
 
@@ -701,8 +840,10 @@ class ActionView(ui.View):
         data = await self._get_current_data(interaction)
         if interaction.user.id != data['responsible']: return await interaction.response.send_message("❌ Apenas o responsável.", ephemeral=True)
 
+        old_status = data['status']
         data['status'] = 'LOSS'
-        await self._update_message(interaction, data)
+        if not await self._update_message(interaction, data, old_status=old_status):
+            return await interaction.response.send_message("⚠️ O status da ação mudou enquanto você registrava. Tente de novo.", ephemeral=True)
         await self._log_result(interaction, data) # Loga o resultado
         await interaction.response.send_message("✅ Resultado registrado: Derrota.", ephemeral=True)
 
@@ -809,34 +950,49 @@ class MVPVotingView(ui.View):
         if target_id == 0: return await interaction.response.send_message("❌ Opção inválida.", ephemeral=True)
         
         # Registra Voto
-        try:
-            await self.bot.db.execute("INSERT INTO action_mvp_votes (message_id, voter_id, target_id) VALUES (?, ?, ?)", (self.message.id, interaction.user.id, target_id))
-            await self.bot.db.commit()
-            await interaction.response.send_message(f"✅ Voto registrado em <@{target_id}>!", ephemeral=True)
-        except:
-            # Se já votou, atualiza
-            await self.bot.db.execute("UPDATE action_mvp_votes SET target_id = ? WHERE message_id = ? AND voter_id = ?", (target_id, self.message.id, interaction.user.id))
-            await self.bot.db.commit()
-            await interaction.response.send_message(f"✅ Voto atualizado para <@{target_id}>!", ephemeral=True)
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            try:
+                await part.db.execute("INSERT INTO action_mvp_votes (message_id, voter_id, target_id, guild_id) VALUES (?, ?, ?, ?)", (self.message.id, interaction.user.id, target_id, interaction.guild.id))
+                await part.db.commit()
+                await interaction.response.send_message(f"✅ Voto registrado em <@{target_id}>!", ephemeral=True)
+            except:
+                # Se já votou, atualiza
+                await part.db.execute("UPDATE action_mvp_votes SET target_id = ? WHERE message_id = ? AND voter_id = ?", (target_id, self.message.id, interaction.user.id))
+                await part.db.commit()
+                await interaction.response.send_message(f"✅ Voto atualizado para <@{target_id}>!", ephemeral=True)
 
     @ui.button(label="Encerrar Votação (Responsável)", style=discord.ButtonStyle.danger, row=1)
     async def close_voting(self, interaction: discord.Interaction, button: ui.Button):
         if interaction.user.id != self.data['responsible']:
             return await interaction.response.send_message("❌ Apenas o responsável pode encerrar.", ephemeral=True)
             
-        # Contabiliza Votos
-        async with self.bot.db.execute("SELECT target_id, COUNT(*) as votes FROM action_mvp_votes WHERE message_id = ? GROUP BY target_id ORDER BY votes DESC LIMIT 1", (self.message.id,)) as cursor:
-            res = await cursor.fetchone()
-            
-        if not res:
-            return await interaction.response.send_message("⚠️ Nenhum voto registrado.", ephemeral=True)
-            
-        mvp_id = res[0]
-        votes = res[1]
-        
-        # Atualiza Ação com MVP
-        await self.bot.db.execute("UPDATE faction_actions SET mvp_id = ? WHERE message_id = ?", (mvp_id, self.message.id))
-        await self.bot.db.commit()
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            # Contabiliza Votos
+            async with part.db.execute("SELECT target_id, COUNT(*) as votes FROM action_mvp_votes WHERE message_id = ? GROUP BY target_id ORDER BY votes DESC LIMIT 1", (self.message.id,)) as cursor:
+                res = await cursor.fetchone()
+
+            if not res:
+                return await interaction.response.send_message("⚠️ Nenhum voto registrado.", ephemeral=True)
+
+            mvp_id = res[0]
+            votes = res[1]
+
+            # Atualiza Ação com MVP (+ ranking materializado no mesmo run(fn))
+            # O MVP antigo vem do banco, não da memória: o UPDATE só vale se ele ainda for o lido,
+            # e os deltas só entram se o UPDATE pegou a linha (dois encerramentos não contam duas vezes).
+            async def set_mvp(db):
+                async with db.execute("SELECT status, mvp_id FROM faction_actions WHERE message_id = ?", (self.message.id,)) as cursor:
+                    row = await cursor.fetchone()
+                if not row: return
+                status, old_mvp = row
+                cursor = await db.execute("UPDATE faction_actions SET mvp_id = ? WHERE message_id = ? AND mvp_id IS ?", (mvp_id, self.message.id, old_mvp))
+                changed = cursor.rowcount
+                await cursor.close()
+                if changed != 1: return
+                for sql, values in ranking_mvp_statements({**self.data, 'status': status}, old_mvp, mvp_id):
+                    cursor = await db.execute(sql, values)
+                    await cursor.close()
+            await part.write_queue.run(set_mvp)
         
         # Atualiza Embed da Ação
         self.data['mvp_id'] = mvp_id
@@ -862,14 +1018,21 @@ class CancelModal(ui.Modal, title="Cancelar Participação"):
         self.bot = bot; self.view = view; self.data = data
 
     async def on_submit(self, interaction: discord.Interaction):
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            await part.write_queue.execute(
+                "UPDATE action_participants SET state = 'CANCELLED', reason = ? WHERE message_id = ? AND user_id = ?",
+                (self.reason.value, interaction.message.id, interaction.user.id)
+            )
+
         if interaction.user.id in self.data['participants']:
             self.data['participants'].remove(interaction.user.id)
         
         self.data['cancellations'].append({"user_id": interaction.user.id, "reason": self.reason.value})
 
-        if self.data['status'] == 'FULL': self.data['status'] = 'OPEN'
+        status_changed = self.data['status'] == 'FULL'
+        if status_changed: self.data['status'] = 'OPEN'
 
-        await self.view._update_message(interaction, self.data)
+        await self.view._update_message(interaction, self.data, persist=status_changed)
         await interaction.response.send_message("✅ Participação cancelada.", ephemeral=True)
 
 class ProfitModal(ui.Modal, title="Registrar Vitória"):
@@ -880,10 +1043,12 @@ class ProfitModal(ui.Modal, title="Registrar Vitória"):
         self.bot = bot; self.view = view; self.data = data
 
     async def on_submit(self, interaction: discord.Interaction):
+        old_status = self.data['status']
         self.data['status'] = 'WIN'
         self.data['profit'] = self.profit.value
         
-        await self.view._update_message(interaction, self.data)
+        if not await self.view._update_message(interaction, self.data, old_status=old_status):
+            return await interaction.response.send_message("⚠️ O status da ação mudou enquanto você registrava. Tente de novo.", ephemeral=True)
         await self.view._log_result(interaction, self.data) # Loga o resultado
         await interaction.response.send_message("✅ Vitória registrada com lucro!", ephemeral=True)
 
@@ -1044,9 +1209,12 @@ class ResetRankingConfirmView(ui.View):
         await interaction.response.defer()
         
         # Deleta dados do servidor
-        await self.bot.db.execute("DELETE FROM faction_actions WHERE guild_id = ?", (interaction.guild.id,))
-        await self.bot.db.execute("DELETE FROM action_mvp_votes WHERE guild_id = ?", (interaction.guild.id,))
-        await self.bot.db.commit()
+        async with self.bot.partitions.acquire(interaction.guild.id) as part:
+            await part.db.execute("DELETE FROM faction_actions WHERE guild_id = ?", (interaction.guild.id,))
+            await part.db.execute("DELETE FROM action_mvp_votes WHERE guild_id = ?", (interaction.guild.id,))
+            await part.db.execute("DELETE FROM action_participants WHERE guild_id = ?", (interaction.guild.id,))
+            await part.db.execute("DELETE FROM faction_ranking WHERE guild_id = ? AND category != '_BONUS'", (interaction.guild.id,))
+            await part.db.commit()
         
         await interaction.edit_original_response(content="✅ **Ranking resetado com sucesso!** Todo o histórico foi apagado.", embed=None, view=None)
 
@@ -12,7 +12,7 @@ import io
 import importlib
 import matplotlib.pyplot as plt
 from collections import deque
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 try:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -25,13 +25,14 @@ class General(commands.Cog):
         self.bot.add_view(PingView(self))
 
     def cog_unload(self):
-        self.auto_update_ping.cancel()
+        self.bot.scheduler.unregister("ping_panels")
 
     def __init__(self, bot):
         self.bot = bot
         self.start_time = time.time()
         self.latency_history = deque(maxlen=20)
-        self.auto_update_ping.start()
+        # Uma execução por guild com painel ativo, espalhadas ao longo do minuto
+        self.bot.scheduler.register("ping_panels", self.auto_update_ping, interval=60, keys=self._ping_guilds)
 
     def generate_graph(self):
         """Gera um gráfico de latência em memória com eixos."""
@@ -107,16 +108,19 @@ class General(commands.Cog):
 
         return embed
 
-    @tasks.loop(minutes=1)
-    async def auto_update_ping(self):
-        async with self.bot.db.execute("SELECT message_id, channel_id, guild_id, user_id FROM active_pings") as cursor:
+    async def _ping_guilds(self):
+        async with self.bot.db.execute("SELECT DISTINCT guild_id FROM active_pings") as cursor:
+            return [row[0] for row in await cursor.fetchall() if self.bot.get_guild(row[0])]
+
+    async def auto_update_ping(self, guild_id):
+        guild = self.bot.get_guild(guild_id)
+        if not guild: return
+
+        async with self.bot.db.execute("SELECT message_id, channel_id, user_id FROM active_pings WHERE guild_id = ?", (guild_id,)) as cursor:
             pings = await cursor.fetchall()
 
-        for msg_id, chan_id, guild_id, user_id in pings:
+        for msg_id, chan_id, user_id in pings:
             try:
-                guild = self.bot.get_guild(guild_id)
-                if not guild: continue
-                
                 channel = guild.get_channel(chan_id)
                 if not channel: continue
                 
@@ -147,10 +151,6 @@ class General(commands.Cog):
             except Exception as e:
                 print(f"❌ [PING] Erro ao atualizar msg {msg_id}: {e}")
 
-    @auto_update_ping.before_loop
-    async def before_auto_update(self):
-        await self.bot.wait_until_ready()
-
     @app_commands.command(name="ping", description="📊 Exibe o painel de controle.")
     async def ping(self, interaction: discord.Interaction):
         importlib.reload(config) 
@@ -185,12 +185,7 @@ class General(commands.Cog):
         await interaction.response.defer()
         
         # 1. Identificar Tier
-        raw_tier = 'free'
-        try:
-            async with self.bot.db.execute("SELECT tier FROM licenses WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-                row = await cursor.fetchone()
-            if row: raw_tier = row[0]
-        except: pass
+        raw_tier = self.bot.licenses.tier(interaction.guild.id, 'free') # Em memória (LicenseService)
         
         # DEBUG: Ver o que está vindo do banco
         print(f"🕵️ [HELP DEBUG] Guild: {interaction.guild.name} | Raw Tier: '{raw_tier}'")
@@ -1,50 +1,69 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands, ui
 import datetime
 import random
 import asyncio
-import json
+from utils import json_codec
+import time
+from database.migrations import run_migrations, add_columns, backfill_epoch
+
+# ====================================================
+# 🧬 MIGRAÇÕES DO MÓDULO
+# ====================================================
+async def _m001_giveaway_tables(db):
+    # Tabela PRINCIPAL de Sorteios
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS giveaways (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER,
+            guild_id INTEGER,
+            title TEXT,
+            description TEXT,
+            prize TEXT,
+            winners_count INTEGER,
+            end_time TIMESTAMP,
+            host_id INTEGER,
+            requirements TEXT DEFAULT '{}',
+            status TEXT DEFAULT 'OPEN'
+        )
+    """)
+    # Bancos antigos (antes de Title/Desc)
+    await add_columns(db, "giveaways", [("title", "TEXT"), ("description", "TEXT")])
+
+    # Tabela de PARTICIPANTES
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS giveaway_entries (
+            giveaway_id INTEGER,
+            user_id INTEGER,
+            PRIMARY KEY (giveaway_id, user_id)
+        )
+    """)
+
+async def _m002_giveaway_epoch(db):
+    # Fim do sorteio em epoch + índice (status, end_ts) para o loop de 10s
+    await add_columns(db, "giveaways", [("end_ts", "INTEGER")])
+    await backfill_epoch(db, "giveaways", "end_time", "end_ts")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_giveaway_status_end ON giveaways(status, end_ts)")
+
+MIGRATIONS = [
+    (1, "Tabelas de sorteio", _m001_giveaway_tables),
+    (2, "Coluna epoch e índice de expiração", _m002_giveaway_epoch),
+]
 
 class GiveawaySystem(commands.GroupCog, name="sorteio"):
     def __init__(self, bot):
         self.bot = bot
         
     async def cog_load(self):
-        # Tabela PRINCIPAL de Sorteios
-        await self.bot.db.execute("""
-            CREATE TABLE IF NOT EXISTS giveaways (
-                message_id INTEGER PRIMARY KEY,
-                channel_id INTEGER,
-                guild_id INTEGER,
-                title TEXT,
-                description TEXT,
-                prize TEXT,
-                winners_count INTEGER,
-                end_time TIMESTAMP,
-                host_id INTEGER,
-                requirements TEXT DEFAULT '{}',
-                status TEXT DEFAULT 'OPEN'
-            )
-        """)
+        # Migração DB (versionada: só roda se houver versão pendente)
+        await run_migrations(self.bot.db, "giveaway", MIGRATIONS)
         
-        # Tabela de PARTICIPANTES
-        await self.bot.db.execute("""
-            CREATE TABLE IF NOT EXISTS giveaway_entries (
-                giveaway_id INTEGER,
-                user_id INTEGER,
-                PRIMARY KEY (giveaway_id, user_id)
-            )
-        """)
-        await self.bot.db.commit()
-        print("✅ [Giveaway] Tabelas carregadas.")
-        
-        # Inicia loop
-        self.check_giveaways.start()
+        # Inicia loop (agendador central)
+        self.bot.scheduler.register("giveaways", self.check_giveaways, interval=10)
 
     def cog_unload(self):
-        try: self.check_giveaways.cancel()
-        except: pass
+        self.bot.scheduler.unregister("giveaways")
 
     # ====================================================
     # 🔄 PERSISTÊNCIA & LOAD
@@ -87,13 +106,8 @@ class GiveawaySystem(commands.GroupCog, name="sorteio"):
             new_emoji = emoji
             msg.append(f"🎟️ Emoji atualizado para {emoji}")
             
-        await self.bot.db.execute("""
-            INSERT INTO config (guild_id, giveaway_color, giveaway_emoji)
-            VALUES (?, ?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET
-            giveaway_color = excluded.giveaway_color,
-            giveaway_emoji = excluded.giveaway_emoji
-        """, (interaction.guild.id, new_color, new_emoji))
+        await self.bot.db.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", (interaction.guild.id,))
+        await self.bot.db.execute("UPDATE config SET giveaway_color = ?, giveaway_emoji = ? WHERE guild_id = ?", (new_color, new_emoji, interaction.guild.id))
         await self.bot.db.commit()
         
         if not msg:
@@ -122,28 +136,32 @@ class GiveawaySystem(commands.GroupCog, name="sorteio"):
     # ====================================================
     # 🔄 LOOP DE VALIDAÇÃO
     # ====================================================
-    @tasks.loop(seconds=10)
     async def check_giveaways(self):
-        await self.bot.wait_until_ready()
-        now = datetime.datetime.now()
+        now = int(time.time())
         
-        async with self.bot.db.execute("SELECT message_id, channel_id, guild_id, prize, winners_count, host_id, title, description FROM giveaways WHERE status = 'OPEN' AND end_time <= ?", (now,)) as cursor:
+        async with self.bot.db.execute("SELECT message_id, channel_id, guild_id, prize, winners_count, host_id, title, description FROM giveaways WHERE status = 'OPEN' AND end_ts <= ?", (now,)) as cursor:
             ended_giveaways = await cursor.fetchall()
             
         for gw in ended_giveaways:
+            # Modo cluster: o banco é compartilhado, só o processo que tem a guild sorteia
+            if not self.bot.get_guild(gw[2]): continue
             await self.end_giveaway(gw)
 
     async def end_giveaway(self, gw_data):
         # Desempacota com segurança (caso tabela mude, mas aqui controlamos)
         message_id, channel_id, guild_id, prize, winners_count, host_id, title, desc = gw_data
         
-        # 1. Marca como FINALIZADO
-        await self.bot.db.execute("UPDATE giveaways SET status = 'FINISHED' WHERE message_id = ?", (message_id,))
-        await self.bot.db.commit()
-
         guild = self.bot.get_guild(guild_id)
         if not guild: return
 
+        # 1. Marca como FINALIZADO (só quem mudar OPEN -> FINISHED sorteia: clique duplo/outro ciclo não sorteia de novo)
+        async def claim(db):
+            cursor = await db.execute("UPDATE giveaways SET status = 'FINISHED' WHERE message_id = ? AND status = 'OPEN'", (message_id,))
+            changed = cursor.rowcount
+            await cursor.close()
+            return changed
+        if await self.bot.write_queue.run(claim) != 1: return
+
         channel = guild.get_channel(channel_id)
         if not channel: return
 
@@ -183,7 +201,7 @@ class GiveawaySystem(commands.GroupCog, name="sorteio"):
         embed.add_field(name="Link do Sorteio", value=f"[Ir para Mensagem]({msg.jump_url})")
         
         # Tenta pegar avatar do primeiro ganhador
-        first_winner = guild.get_member(winners[0])
+        first_winner = await self.bot.gateway.get_or_fetch_member(guild, winners[0])
         if first_winner:
             embed.set_thumbnail(url=first_winner.display_avatar.url)
         else:
@@ -349,9 +367,9 @@ class GiveawayModal(ui.Modal, title="Criar Sorteio"):
         msg = await interaction.original_response()
         
         await self.bot.db.execute("""
-            INSERT INTO giveaways (message_id, channel_id, guild_id, prize, winners_count, end_time, host_id, requirements, title, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (msg.id, interaction.channel.id, interaction.guild.id, self.prize.value, winners_count, end_time, interaction.user.id, json.dumps(requirements), self.gw_title.value, self.gw_desc.value))
+            INSERT INTO giveaways (message_id, channel_id, guild_id, prize, winners_count, end_time, end_ts, host_id, requirements, title, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (msg.id, interaction.channel.id, interaction.guild.id, self.prize.value, winners_count, end_time, timestamp, interaction.user.id, json_codec.dumps(requirements), self.gw_title.value, self.gw_desc.value))
         await self.bot.db.commit()
 
 # ====================================================
@@ -375,7 +393,7 @@ class GiveawayView(ui.View):
             
         if res:
             try:
-                reqs = json.loads(res[0])
+                reqs = json_codec.loads_cached(res[0]) # Requisitos não mudam depois de criado: decodifica 1x
                 if reqs.get('role_id'):
                     role = interaction.guild.get_role(reqs['role_id'])
                     if role and role not in interaction.user.roles:
@@ -384,19 +402,21 @@ class GiveawayView(ui.View):
 
         joined = False
         try:
-            await self.bot.db.execute("INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)", (interaction.message.id, interaction.user.id))
-            await self.bot.db.commit()
-            joined = True
-            await interaction.response.send_message("✅ **Sucesso!** Você entrou no sorteio. Boa sorte! 🍀", ephemeral=True)
-        except:
-            try:
-                await self.bot.db.execute("DELETE FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?", (interaction.message.id, interaction.user.id))
-                await self.bot.db.commit()
+            async with self.bot.db.execute("SELECT 1 FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?", (interaction.message.id, interaction.user.id)) as cursor:
+                already_in = await cursor.fetchone()
+
+            # Fila de escrita: aguarda o commit em lote antes de recontar
+            if not already_in:
+                await self.bot.write_queue.execute("INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)", (interaction.message.id, interaction.user.id))
+                joined = True
+                await interaction.response.send_message("✅ **Sucesso!** Você entrou no sorteio. Boa sorte! 🍀", ephemeral=True)
+            else:
+                await self.bot.write_queue.execute("DELETE FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?", (interaction.message.id, interaction.user.id))
                 joined = False
                 await interaction.response.send_message("❌ **Você saiu** do sorteio.", ephemeral=True)
-            except Exception as e:
-                 await interaction.response.send_message(f"Erro: {e}", ephemeral=True)
-                 return
+        except Exception as e:
+            await interaction.response.send_message(f"Erro: {e}", ephemeral=True)
+            return
 
         # UPDATE LIVE COUNTER
         try:
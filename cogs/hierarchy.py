@@ -1,54 +1,57 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands, ui
 import datetime
 import asyncio
 
+from database.migrations import run_migrations, add_columns
+
 INVISIBLE_WIDE_URL = "https://raw.githubusercontent.com/bpevs/transparent-textures/master/1000x1.png"
 
+# ====================================================
+# 🧬 MIGRAÇÕES DO MÓDULO
+# ====================================================
+async def _m001_hierarchy_tables(db):
+    # Tabela de Cargos
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS hierarchy_roles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            role_id INTEGER,
+            label TEXT,
+            priority INTEGER,
+            group_name TEXT DEFAULT 'Principal'
+        )
+    """)
+    await add_columns(db, "hierarchy_roles", [("group_name", "TEXT DEFAULT 'Principal'")])
+
+    # Tabela de Mensagens Ativas (Para Auto-Update)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS hierarchy_messages (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER,
+            guild_id INTEGER,
+            group_name TEXT
+        )
+    """)
+
+MIGRATIONS = [
+    (1, "Tabelas de hierarquia", _m001_hierarchy_tables),
+]
+
 class Hierarchy(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.daily_update.start()
+        # Diário às 03:00 (UTC, como era no tasks.loop); guilds espalhadas na hora seguinte
+        self.bot.scheduler.register("hierarchy_daily", self.daily_update, at=datetime.time(hour=3, minute=0),
+                                    window=3600, keys=self._hierarchy_guilds)
 
     def cog_unload(self):
-        self.daily_update.cancel()
+        self.bot.scheduler.unregister("hierarchy_daily")
 
     async def cog_load(self):
-        # Migração DB
-        print("🔍 [HIERARCHY] Verificando tabelas...")
-        
-        # Tabela de Cargos
-        try:
-            async with self.bot.db.execute("SELECT group_name FROM hierarchy_roles LIMIT 1") as cursor: pass
-        except:
-            print("⚠️ [HIERARCHY] Atualizando tabela de cargos...")
-            try:
-                await self.bot.db.execute("""
-                    CREATE TABLE IF NOT EXISTS hierarchy_roles (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        guild_id INTEGER,
-                        role_id INTEGER,
-                        label TEXT,
-                        priority INTEGER,
-                        group_name TEXT DEFAULT 'Principal'
-                    )
-                """)
-                try: await self.bot.db.execute("ALTER TABLE hierarchy_roles ADD COLUMN group_name TEXT DEFAULT 'Principal'")
-                except: pass
-                await self.bot.db.commit()
-            except Exception as e: print(f"❌ [HIERARCHY] Erro migração roles: {e}")
-
-        # Tabela de Mensagens Ativas (Para Auto-Update)
-        await self.bot.db.execute("""
-            CREATE TABLE IF NOT EXISTS hierarchy_messages (
-                message_id INTEGER PRIMARY KEY,
-                channel_id INTEGER,
-                guild_id INTEGER,
-                group_name TEXT
-            )
-        """)
-        await self.bot.db.commit()
+        # Migração DB (versionada: só roda se houver versão pendente)
+        await run_migrations(self.bot.db, "hierarchy", MIGRATIONS)
         
         # Registra View Persistente
         self.bot.add_view(RefreshHierarchyView(self.bot, self))
@@ -57,20 +60,28 @@ class Hierarchy(commands.Cog):
     # ====================================================
     # 🔄 AUTO-UPDATE (00:00)
     # ====================================================
-    @tasks.loop(time=datetime.time(hour=3, minute=0)) 
-    async def daily_update(self):
+    async def _hierarchy_guilds(self):
         print("🔄 [HIERARCHY] Iniciando atualização diária...")
-        async with self.bot.db.execute("SELECT message_id, channel_id, guild_id, group_name FROM hierarchy_messages") as cursor:
+        async with self.bot.db.execute("SELECT DISTINCT guild_id FROM hierarchy_messages") as cursor:
+            return [row[0] for row in await cursor.fetchall() if self.bot.get_guild(row[0])]
+
+    async def daily_update(self, guild_id):
+        guild = self.bot.get_guild(guild_id)
+        if not guild: return
+
+        async with self.bot.db.execute("SELECT message_id, channel_id, group_name FROM hierarchy_messages WHERE guild_id = ?", (guild_id,)) as cursor:
             messages = await cursor.fetchall()
             
-        for msg_id, chan_id, guild_id, group_name in messages:
+        for msg_id, chan_id, group_name in messages:
             try:
-                guild = self.bot.get_guild(guild_id)
-                if not guild: continue
-                
                 channel = guild.get_channel(chan_id)
                 if not channel: continue
                 
+                embed = await self._build_hierarchy_embed(guild, group_name)
+                if not embed: continue
+                # Mesmos membros nos cargos desde ontem: nem busca a mensagem
+                if self.bot.scheduler.unchanged("hierarchy_daily", msg_id, embed.description): continue
+
                 try:
                     message = await channel.fetch_message(msg_id)
                 except discord.NotFound:
@@ -78,17 +89,12 @@ class Hierarchy(commands.Cog):
                     await self.bot.db.commit()
                     continue
                 
-                embed = await self._build_hierarchy_embed(guild, group_name)
-                if embed:
-                    await message.edit(embed=embed)
+                await message.edit(embed=embed)
                     
             except Exception as e:
+                self.bot.scheduler.forget("hierarchy_daily", msg_id)
                 print(f"❌ [HIERARCHY] Erro ao atualizar msg {msg_id}: {e}")
 
-    @daily_update.before_loop
-    async def before_daily_update(self):
-        await self.bot.wait_until_ready()
-
     # ====================================================
     # 🏗️ CONSTRUTOR DE EMBED
     # ====================================================
@@ -99,6 +105,8 @@ class Hierarchy(commands.Cog):
         if not rows:
             return None
 
+        await self.bot.gateway.ensure_chunked(guild) # role.members precisa da guild baixada
+
         embed = discord.Embed(title=f"🏛️ {group_name.upper()}", color=0x2b2d31)
         embed.set_thumbnail(url=guild.icon.url if guild.icon else self.bot.user.display_avatar.url)
         embed.set_image(url=INVISIBLE_WIDE_URL)
@@ -160,6 +168,8 @@ class Hierarchy(commands.Cog):
         if not rows:
             return await interaction.followup.send(f"❌ Grupo '{grupo}' não encontrado ou vazio.", ephemeral=True)
 
+        await self.bot.gateway.ensure_chunked(interaction.guild)
+
         final_text = f"**LISTA: {grupo.upper()}**\n\n"
         
         for role_id, label in rows:
@@ -4,32 +4,32 @@ from discord import app_commands, ui
 import datetime
 import aiosqlite
 
+from database.migrations import run_migrations, add_columns
+
 INVISIBLE_WIDE_URL = "https://raw.githubusercontent.com/bpevs/transparent-textures/master/1000x1.png"
 
+# ====================================================
+# 🧬 MIGRAÇÕES DO MÓDULO
+# ====================================================
+async def _m001_log_columns(db):
+    await add_columns(db, "config", [
+        ("log_voice_channel_id", "INTEGER"),
+        ("log_message_channel_id", "INTEGER"),
+        ("log_nickname_channel_id", "INTEGER"),
+        ("log_ban_channel_id", "INTEGER"),
+    ])
+
+MIGRATIONS = [
+    (1, "Colunas de canais de log", _m001_log_columns),
+]
+
 class Logs(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
     async def cog_load(self):
-        # Migração Automática de DB
-        print("🔍 [LOGS] Verificando colunas de log no banco de dados...")
-        try:
-            # Tenta adicionar colunas se não existirem
-            async with self.bot.db.execute("SELECT log_voice_channel_id, log_message_channel_id, log_nickname_channel_id, log_ban_channel_id FROM config LIMIT 1") as cursor:
-                pass
-        except Exception:
-            print("⚠️ [LOGS] Colunas de log não encontradas ou incompletas. Atualizando...")
-            try:
-                # Adiciona colunas uma a uma (SQLite não falha se já existir em versões recentes, mas garantindo)
-                columns = ["log_voice_channel_id", "log_message_channel_id", "log_nickname_channel_id", "log_ban_channel_id"]
-                for col in columns:
-                    try:
-                        await self.bot.db.execute(f"ALTER TABLE config ADD COLUMN {col} INTEGER")
-                    except: pass
-                await self.bot.db.commit()
-                print("✅ [LOGS] Colunas verificadas/adicionadas.")
-            except Exception as e:
-                print(f"❌ [LOGS] Erro na migração: {e}")
+        # Migração DB (versionada: só roda se houver versão pendente)
+        await run_migrations(self.bot.db, "logs", MIGRATIONS)
 
     # ====================================================
     # ⚙️ PAINEL DE CONFIGURAÇÃO
@@ -69,13 +69,13 @@ class Logs(commands.Cog):
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         if member.bot: return
+        if not self.bot.module_gate.enabled(member.guild.id, "logs"): return # Fora do plano da guild: nem lê a config
         
         # Busca canal de log
-        async with self.bot.db.execute("SELECT log_voice_channel_id FROM config WHERE guild_id = ?", (member.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-        if not row or not row[0]: return
+        cfg = await self.bot.config_cache.get(member.guild.id) # Cache em memória (sem query)
+        if not cfg.log_voice_channel_id: return
         
-        log_channel = member.guild.get_channel(row[0])
+        log_channel = member.guild.get_channel(cfg.log_voice_channel_id)
         if not log_channel: return
 
         embed = discord.Embed(timestamp=datetime.datetime.now())
@@ -110,12 +110,12 @@ class Logs(commands.Cog):
     @commands.Cog.listener()
     async def on_message_delete(self, message):
         if message.author.bot or not message.guild: return
+        if not self.bot.module_gate.enabled(message.guild.id, "logs"): return # Fora do plano da guild: nem lê a config
 
-        async with self.bot.db.execute("SELECT log_message_channel_id FROM config WHERE guild_id = ?", (message.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-        if not row or not row[0]: return
+        cfg = await self.bot.config_cache.get(message.guild.id) # Cache em memória (sem query)
+        if not cfg.log_message_channel_id: return
         
-        log_channel = message.guild.get_channel(row[0])
+        log_channel = message.guild.get_channel(cfg.log_message_channel_id)
         if not log_channel: return
 
         embed = discord.Embed(title="🗑️ Mensagem Apagada", color=0xe74c3c, timestamp=datetime.datetime.now())
@@ -136,12 +136,12 @@ class Logs(commands.Cog):
     async def on_message_edit(self, before, after):
         if before.author.bot or not before.guild: return
         if before.content == after.content: return # Ignora mudanças que não são de texto (ex: embed load)
+        if not self.bot.module_gate.enabled(before.guild.id, "logs"): return # Fora do plano da guild: nem lê a config
 
-        async with self.bot.db.execute("SELECT log_message_channel_id FROM config WHERE guild_id = ?", (before.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-        if not row or not row[0]: return
+        cfg = await self.bot.config_cache.get(before.guild.id) # Cache em memória (sem query)
+        if not cfg.log_message_channel_id: return
         
-        log_channel = before.guild.get_channel(row[0])
+        log_channel = before.guild.get_channel(cfg.log_message_channel_id)
         if not log_channel: return
 
         embed = discord.Embed(title="✏️ Mensagem Editada", color=0x3498db, timestamp=datetime.datetime.now())
@@ -160,12 +160,12 @@ class Logs(commands.Cog):
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
         if before.nick == after.nick: return
+        if not self.bot.module_gate.enabled(before.guild.id, "logs"): return # Fora do plano da guild: nem lê a config
         
-        async with self.bot.db.execute("SELECT log_nickname_channel_id FROM config WHERE guild_id = ?", (before.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-        if not row or not row[0]: return
+        cfg = await self.bot.config_cache.get(before.guild.id) # Cache em memória (sem query)
+        if not cfg.log_nickname_channel_id: return
         
-        log_channel = before.guild.get_channel(row[0])
+        log_channel = before.guild.get_channel(cfg.log_nickname_channel_id)
         if not log_channel: return
 
         embed = discord.Embed(title="🏷️ Nickname Alterado", color=0x9b59b6, timestamp=datetime.datetime.now())
@@ -182,11 +182,11 @@ class Logs(commands.Cog):
     # --- MEMBRO BANIDO ---
     @commands.Cog.listener()
     async def on_member_ban(self, guild, user):
-        async with self.bot.db.execute("SELECT log_ban_channel_id FROM config WHERE guild_id = ?", (guild.id,)) as cursor:
-            row = await cursor.fetchone()
-        if not row or not row[0]: return
+        if not self.bot.module_gate.enabled(guild.id, "logs"): return # Fora do plano da guild: nem lê a config
+        cfg = await self.bot.config_cache.get(guild.id) # Cache em memória (sem query)
+        if not cfg.log_ban_channel_id: return
         
-        log_channel = guild.get_channel(row[0])
+        log_channel = guild.get_channel(cfg.log_ban_channel_id)
         if not log_channel: return
 
         embed = discord.Embed(title="🔨 Membro Banido", color=0xff0000, timestamp=datetime.datetime.now())
@@ -201,11 +201,11 @@ class Logs(commands.Cog):
     # --- MEMBRO DESBANIDO ---
     @commands.Cog.listener()
     async def on_member_unban(self, guild, user):
-        async with self.bot.db.execute("SELECT log_ban_channel_id FROM config WHERE guild_id = ?", (guild.id,)) as cursor:
-            row = await cursor.fetchone()
-        if not row or not row[0]: return
+        if not self.bot.module_gate.enabled(guild.id, "logs"): return # Fora do plano da guild: nem lê a config
+        cfg = await self.bot.config_cache.get(guild.id) # Cache em memória (sem query)
+        if not cfg.log_ban_channel_id: return
         
-        log_channel = guild.get_channel(row[0])
+        log_channel = guild.get_channel(cfg.log_ban_channel_id)
         if not log_channel: return
 
         embed = discord.Embed(title="🔓 Membro Desbanido", color=0x2ecc71, timestamp=datetime.datetime.now())
@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import logging
 import datetime
 import time
@@ -67,6 +67,7 @@ class Monitor(commands.Cog):
         plt.style.use('dark_background')
 
     async def cog_load(self):
+        self.bot.router.tap(self.count_message) # Contagem síncrona no roteador (sem listener por mensagem)
         self.bot.add_view(MonitorView(self))
         print("[+] [Monitor] Views persistentes carregadas.")
         
@@ -78,6 +79,10 @@ class Monitor(commands.Cog):
         if self.bot.is_ready():
             await self.start_session()
 
+    def cog_unload(self):
+        self.bot.router.untap(self.count_message)
+        self.bot.scheduler.unregister("monitor_panel")
+
     def get_uptime_str(self):
         diff = int(time.time() - self.start_time)
         d, r = divmod(diff, 86400); h, r = divmod(r, 3600); m, s = divmod(r, 60)
@@ -128,9 +133,7 @@ class Monitor(commands.Cog):
     async def on_ready(self):
         if not self.is_monitoring: await self.start_session()
 
-    @commands.Cog.listener()
-    async def on_message(self, m):
-        if m.author.bot: return
+    def count_message(self, m):
         self.stats["msgs"] += 1
         if m.attachments: self.stats["uploads"] += 1
 
@@ -155,8 +158,8 @@ class Monitor(commands.Cog):
             self.dm_message = await user.send("🚀 **Cockpit Iniciado...**", view=MonitorView(self))
             self.is_monitoring = True
             
-            if not self.update_loop.is_running(): 
-                self.update_loop.start()
+            if "monitor_panel" not in self.bot.scheduler.jobs:
+                self.bot.scheduler.register("monitor_panel", self.update_panel, interval=60)
                 
         except Exception as e: 
             print(f"❌ [Monitor] Erro ao iniciar sessão DM: {e}")
@@ -216,7 +219,7 @@ class Monitor(commands.Cog):
             
         except discord.NotFound:
             # Se a mensagem foi apagada, tenta reiniciar
-            self.update_loop.cancel()
+            self.bot.scheduler.unregister("monitor_panel")
             self.is_monitoring = False
             await self.start_session()
         except Exception as e: 
@@ -228,10 +231,6 @@ class Monitor(commands.Cog):
             try: await self.dm_message.channel.send(f"🚨 **ALERTA:** {msg}", delete_after=60)
             except: pass
 
-    @tasks.loop(minutes=1) 
-    async def update_loop(self):
-        await self.update_panel()
-
     @commands.hybrid_command(name="monitor", hidden=True, description="Força o início do painel de monitoramento.")
     async def force_mon(self, ctx):
         if ctx.author.id == self.admin_id:
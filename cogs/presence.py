@@ -3,7 +3,7 @@ import sys
 import os
 import random
 import asyncio
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands, ui
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,10 +15,10 @@ AUTHORIZED_ID = 216807300810276866
 class Presence(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.presence_loop.start()
+        self.bot.scheduler.register("presence", self.presence_loop, interval=60)
 
     def cog_unload(self):
-        self.presence_loop.cancel()
+        self.bot.scheduler.unregister("presence")
 
     # ====================================================
     # 🖥️ COMANDO DO PAINEL
@@ -89,10 +89,7 @@ class Presence(commands.Cog):
     # ====================================================
     # 🔄 LOOP DE ROTAÇÃO
     # ====================================================
-    @tasks.loop(seconds=60)
     async def presence_loop(self):
-        await self.bot.wait_until_ready()
-        
         # [V8] Check de Trava Global (ex: Bot Stream Ativo)
         if getattr(self.bot, 'presence_locked', False):
             return
@@ -106,9 +103,8 @@ class Presence(commands.Cog):
             interval = cfg[0] if cfg else 60
             state_str = cfg[1] if cfg else "online"
 
-            # Ajusta intervalo dinamicamente
-            if self.presence_loop.seconds != interval:
-                self.presence_loop.change_interval(seconds=interval)
+            # Ajusta intervalo dinamicamente (vale a partir do próximo ciclo)
+            self.bot.scheduler.set_interval("presence", interval)
 
             # Pega atividades
             async with self.bot.db.execute("SELECT activity_type, activity_text, activity_url FROM presence") as cursor:
@@ -2,6 +2,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import datetime
+import time
 from typing import Optional
 
 # ==============================================================================
@@ -34,14 +35,16 @@ class PunishmentDashboardView(discord.ui.View):
     @discord.ui.select(cls=discord.ui.ChannelSelect, channel_types=[discord.ChannelType.text], placeholder="Canal de Tickets...", min_values=1, max_values=1, row=1)
     async def select_ticket_channel(self, interaction: discord.Interaction, select: discord.ui.ChannelSelect):
         channel = select.values[0]
-        await self.bot.db.execute("INSERT INTO config (guild_id, ticket_panel_channel_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET ticket_panel_channel_id = ?", (interaction.guild.id, channel.id, channel.id))
+        await self.bot.db.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", (interaction.guild.id,))
+        await self.bot.db.execute("UPDATE config SET ticket_panel_channel_id = ? WHERE guild_id = ?", (channel.id, interaction.guild.id))
         await self.bot.db.commit()
         await interaction.response.send_message(f"✅ Canal de Tickets vinculado: {channel.mention}", ephemeral=True)
 
     @discord.ui.select(cls=discord.ui.ChannelSelect, channel_types=[discord.ChannelType.text], placeholder="Canal de Alinhamento...", min_values=1, max_values=1, row=2)
     async def select_align_channel(self, interaction: discord.Interaction, select: discord.ui.ChannelSelect):
         channel = select.values[0]
-        await self.bot.db.execute("INSERT INTO config (guild_id, alignment_channel_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET alignment_channel_id = ?", (interaction.guild.id, channel.id, channel.id))
+        await self.bot.db.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", (interaction.guild.id,))
+        await self.bot.db.execute("UPDATE config SET alignment_channel_id = ? WHERE guild_id = ?", (channel.id, interaction.guild.id))
         await self.bot.db.commit()
         await interaction.response.send_message(f"✅ Canal de Alinhamento vinculado: {channel.mention}", ephemeral=True)
 
@@ -156,6 +159,7 @@ class Punishments(commands.Cog):
         targets = []
         if user: targets.append(user)
         if role:
+            await self.bot.gateway.ensure_chunked(interaction.guild)
             for m in role.members:
                 if m not in targets: targets.append(m)
 
@@ -175,9 +179,9 @@ class Punishments(commands.Cog):
             # 1. DB Log
             # Saving 'punicao' in the 'conclusion' column to persist it for history
             await self.bot.db.execute("""
-                INSERT INTO org_punishments (guild_id, user_id, staff_id, type, reason, conclusion)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (interaction.guild.id, target.id, interaction.user.id, "manual", motivo, punicao))
+                INSERT INTO org_punishments (guild_id, user_id, staff_id, type, reason, conclusion, ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (interaction.guild.id, target.id, interaction.user.id, "manual", motivo, punicao, int(time.time())))
             
             # 2. Notification (Public Channel or DM)
             # Layout Premium / "Senior Dev" Style (Ticket Sync)
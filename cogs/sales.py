@@ -2,33 +2,49 @@ import discord
 from discord.ext import commands
 from discord import app_commands, ui
 import datetime
+import time
+
+from database.migrations import run_migrations, add_columns, backfill_epoch
 
 INVISIBLE_WIDE_URL = "https://raw.githubusercontent.com/bpevs/transparent-textures/master/1000x1.png"
 
+# ====================================================
+# 🧬 MIGRAÇÕES DO MÓDULO
+# ====================================================
+async def _m001_sales_table(db):
+    # Tabela de Vendas
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            seller_id INTEGER,
+            item TEXT,
+            quantity INTEGER,
+            price INTEGER,
+            buyer TEXT,
+            is_partnership INTEGER,
+            timestamp TIMESTAMP
+        )
+    """)
+
+async def _m002_sales_epoch(db):
+    # Data em epoch + índice (guild_id, ts): ranking semanal/mensal vira range scan
+    await add_columns(db, "sales", [("ts", "INTEGER")])
+    await backfill_epoch(db, "sales", "timestamp", "ts")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_sales_guild_ts ON sales(guild_id, ts)")
+
+MIGRATIONS = [
+    (1, "Tabela de vendas", _m001_sales_table),
+    (2, "Coluna epoch e índice por período", _m002_sales_epoch),
+]
+
 class Sales(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
     async def cog_load(self):
-        # Tabela de Vendas
-        await self.bot.db.execute("""
-            CREATE TABLE IF NOT EXISTS sales (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                seller_id INTEGER,
-                item TEXT,
-                quantity INTEGER,
-                price INTEGER,
-                buyer TEXT,
-                is_partnership INTEGER,
-                timestamp TIMESTAMP
-            )
-        """)
-        
-        # Atualiza Config se necessário (existem outras colunas no bot_db.py, aqui só garante as de log se falhar lá)
-        # O bot_db.py já cuida das migrações principais.
-        await self.bot.db.commit()
-        print("✅ [Sales] Tabelas carregadas.")
+        # Migração DB (versionada: só roda se houver versão pendente)
+        await run_migrations(self.bot.db, "sales", MIGRATIONS)
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -125,26 +141,31 @@ class Sales(commands.Cog):
     async def sales_ranking(self, interaction: discord.Interaction, periodo: app_commands.Choice[str] = None):
         period_val = periodo.value if periodo else "all"
         guild_id = interaction.guild.id
+        params = (guild_id,)
         
+        # Períodos: limite inferior em epoch (range scan em idx_sales_guild_ts)
         if period_val == "weekly":
             query = """
                 SELECT seller_id, SUM(price) as total 
                 FROM sales 
-                WHERE guild_id = ? AND timestamp >= datetime('now', '-7 days', 'localtime')
+                WHERE guild_id = ? AND ts >= ?
                 GROUP BY seller_id 
                 ORDER BY total DESC 
                 LIMIT 10
             """
+            params = (guild_id, int(time.time()) - 7 * 86400)
             title_text = "🏆 Ranking Semanal de Vendas"
         elif period_val == "monthly":
             query = """
                 SELECT seller_id, SUM(price) as total 
                 FROM sales 
-                WHERE guild_id = ? AND timestamp >= datetime('now', 'start of month', 'localtime')
+                WHERE guild_id = ? AND ts >= ?
                 GROUP BY seller_id 
                 ORDER BY total DESC 
                 LIMIT 10
             """
+            month_start = datetime.datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            params = (guild_id, int(month_start.timestamp()))
             title_text = "🏆 Ranking Mensal de Vendas"
         else:
             query = """
@@ -157,7 +178,7 @@ class Sales(commands.Cog):
             """
             title_text = "🏆 Ranking Geral de Vendas"
             
-        async with self.bot.db.execute(query, (guild_id,)) as cursor:
+        async with self.bot.db.execute(query, params) as cursor:
             rows = await cursor.fetchall()
             
         if not rows:
@@ -250,12 +271,11 @@ class SalesTypeView(ui.View):
         self.add_item(btn_part)
 
     async def _finish(self, interaction, is_partnership):
-        # Salva no DB
-        await self.bot.db.execute("""
-            INSERT INTO sales (guild_id, seller_id, item, quantity, price, buyer, is_partnership, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (interaction.guild.id, interaction.user.id, self.data['item'], self.data['qty'], self.data['price'], self.data['buyer'], 1 if is_partnership else 0, datetime.datetime.now()))
-        await self.bot.db.commit()
+        # Salva no DB (Write-Behind: o commit sai no próximo lote da fila)
+        self.bot.write_queue.enqueue("""
+            INSERT INTO sales (guild_id, seller_id, item, quantity, price, buyer, is_partnership, timestamp, ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (interaction.guild.id, interaction.user.id, self.data['item'], self.data['qty'], self.data['price'], self.data['buyer'], 1 if is_partnership else 0, datetime.datetime.now(), int(time.time())))
         
         # Log
         async with self.bot.db.execute("SELECT sales_log_channel_id FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
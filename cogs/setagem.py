@@ -5,46 +5,50 @@ import datetime
 import asyncio
 import re
 
+from database.migrations import run_migrations, add_columns
+
 INVISIBLE_WIDE_URL = "https://raw.githubusercontent.com/bpevs/transparent-textures/master/1000x1.png"
 
+# ====================================================
+# 🧬 MIGRAÇÕES DO MÓDULO
+# ====================================================
+async def _m001_set_tables(db):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS set_config (
+            guild_id INTEGER PRIMARY KEY,
+            channel_analysis INTEGER,
+            channel_log INTEGER,
+            role_verified INTEGER,
+            role_unverified INTEGER,
+            set_approve_emoji TEXT,
+            set_reject_emoji TEXT,
+            embed_color TEXT
+        )
+    """)
+    # Caso a tabela já exista sem embed_color
+    await add_columns(db, "set_config", [("embed_color", "TEXT")])
+
+    # Tabela de Cargos Selecionáveis
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS set_selectable_roles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            role_id INTEGER,
+            label TEXT
+        )
+    """)
+
+MIGRATIONS = [
+    (1, "Tabelas de setagem", _m001_set_tables),
+]
+
 class Setagem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
     async def cog_load(self):
-        # Migração DB
-        print("🔍 [SETAGEM] Verificando tabelas e colunas...")
-        await self.bot.db.execute("""
-            CREATE TABLE IF NOT EXISTS set_config (
-                guild_id INTEGER PRIMARY KEY,
-                channel_analysis INTEGER,
-                channel_log INTEGER,
-                role_verified INTEGER,
-                role_unverified INTEGER,
-                set_approve_emoji TEXT,
-                set_reject_emoji TEXT,
-                embed_color TEXT
-            )
-        """)
-        
-        # Migração de Coluna (Caso a tabela já exista sem embed_color)
-        try:
-            await self.bot.db.execute("ALTER TABLE set_config ADD COLUMN embed_color TEXT")
-            await self.bot.db.commit()
-            print("✅ [SETAGEM] Coluna 'embed_color' adicionada.")
-        except Exception:
-            pass # Coluna já existe
-
-        # Tabela de Cargos Selecionáveis
-        await self.bot.db.execute("""
-            CREATE TABLE IF NOT EXISTS set_selectable_roles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                role_id INTEGER,
-                label TEXT
-            )
-        """)
-        await self.bot.db.commit()
+        # Migração DB (versionada: só roda se houver versão pendente)
+        await run_migrations(self.bot.db, "setagem", MIGRATIONS)
         
         # Registra View Persistente
         self.bot.add_view(self.SetRequestView(self.bot, self))
@@ -198,7 +202,7 @@ class Setagem(commands.Cog):
             role_unver = interaction.guild.get_role(config[1]) if config[1] else None
             log_channel = interaction.guild.get_channel(config[2]) if config[2] else None
             
-            target = interaction.guild.get_member(self.target_id)
+            target = await self.bot.gateway.get_or_fetch_member(interaction.guild, self.target_id)
             
             # Ações Logic
             status_text = "Aprovado com sucesso!"
@@ -279,7 +283,7 @@ class Setagem(commands.Cog):
 
         async def on_submit(self, interaction: discord.Interaction):
             await interaction.response.defer()
-            target = interaction.guild.get_member(self.target_id)
+            target = await self.bot.gateway.get_or_fetch_member(interaction.guild, self.target_id)
             
             # Update Staff Embed (Red)
             embed = self.original_msg.embeds[0]
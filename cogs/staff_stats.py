@@ -6,6 +6,7 @@ import os
 import io
 import csv
 import datetime
+import asyncio
 
 # Tenta importar as configurações
 try:
@@ -18,6 +19,16 @@ except ImportError:
 # URL Mágica para esticar o Embed
 INVISIBLE_WIDE_URL = "https://raw.githubusercontent.com/bpevs/transparent-textures/master/1000x1.png"
 
+# Ranking geral: avaliações quentes + agregados arquivados (archive_totals) somados por staff
+RANKING_WITH_ARCHIVE = """
+    SELECT staff_id, SUM(n) AS total, SUM(s) * 1.0 / SUM(n) AS media FROM (
+        SELECT staff_id, COUNT(*) AS n, SUM(stars) AS s FROM staff_ratings WHERE guild_id = ? GROUP BY staff_id
+        UNION ALL
+        SELECT subject_id, rows, total FROM archive_totals WHERE guild_id = ? AND source = 'staff_ratings'
+    )
+    GROUP BY staff_id ORDER BY media DESC, total DESC LIMIT 10
+"""
+
 class StaffStats(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -41,19 +52,19 @@ class StaffStats(commands.Cog):
 
         mode = periodo.value if periodo else "geral"
         
-        sql = "SELECT staff_id, COUNT(*) as total, AVG(stars) as media FROM staff_ratings WHERE guild_id = ?"
-        params = [interaction.guild.id]
-
         if mode == "mes":
-            current_month = datetime.datetime.now().strftime('%Y-%m-01')
-            sql += " AND date >= ?"
-            params.append(current_month)
+            # Início do mês em epoch (range scan em idx_rating_guild_ts). O mês inteiro ainda está na base quente
+            month_start = datetime.datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            sql = "SELECT staff_id, COUNT(*) as total, AVG(stars) as media FROM staff_ratings WHERE guild_id = ? AND ts >= ?"
+            sql += " GROUP BY staff_id ORDER BY media DESC, total DESC LIMIT 10"
+            params = [interaction.guild.id, int(month_start.timestamp())]
             title_text = f"🏆 Staff do Mês ({datetime.datetime.now().strftime('%m/%Y')})"
         else:
+            # Geral: base quente + agregados do que já foi para o arquivo frio
+            sql = RANKING_WITH_ARCHIVE
+            params = [interaction.guild.id, interaction.guild.id]
             title_text = "🏆 Ranking Geral de Atendimento"
 
-        sql += " GROUP BY staff_id ORDER BY media DESC, total DESC LIMIT 10"
-
         async with self.bot.db.execute(sql, tuple(params)) as cursor:
             rank_data = await cursor.fetchall()
 
@@ -67,6 +78,7 @@ class StaffStats(commands.Cog):
         embed.set_image(url=INVISIBLE_WIDE_URL)
         
         medals = ["🥇", "🥈", "🥉"]
+        await self.bot.gateway.ensure_chunked(interaction.guild) # get_member de cada staff (Ex-Staff = saiu do servidor)
         
         description = ""
         for idx, row in enumerate(rank_data):
@@ -96,9 +108,19 @@ class StaffStats(commands.Cog):
         async with self.bot.db.execute("SELECT staff_id, user_id, stars, date FROM staff_ratings WHERE guild_id = ? ORDER BY date DESC", (interaction.guild.id,)) as cursor:
             rows = await cursor.fetchall()
 
+        # Avaliações antigas que a retenção já moveu para o arquivo frio
+        archive = getattr(self.bot, 'archive', None)
+        if archive:
+            archived = await asyncio.to_thread(lambda: [
+                (r.get("staff_id"), r.get("user_id"), r.get("stars"), r.get("date"))
+                for r in archive.read(interaction.guild.id, "staff_ratings")
+            ])
+            rows = list(rows) + sorted(archived, key=lambda r: r[3] or "", reverse=True)
+
         if not rows:
             return await interaction.followup.send("❌ Banco de dados vazio.")
 
+        await self.bot.gateway.ensure_chunked(interaction.guild) # get_member de staff e avaliadores
         output = io.StringIO()
         writer = csv.writer(output)
         writer.writerow(["Data", "Nome Staff", "ID Staff", "Nome Cliente", "ID Cliente", "Nota"])
@@ -131,8 +153,15 @@ class StaffStats(commands.Cog):
     async def my_stats(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        query = "SELECT COUNT(*) as total, AVG(stars) as media FROM staff_ratings WHERE guild_id = ? AND staff_id = ?"
-        async with self.bot.db.execute(query, (interaction.guild.id, interaction.user.id)) as cursor:
+        query = """
+            SELECT SUM(n), SUM(s) * 1.0 / SUM(n) FROM (
+                SELECT COUNT(*) AS n, SUM(stars) AS s FROM staff_ratings WHERE guild_id = ? AND staff_id = ?
+                UNION ALL
+                SELECT rows, total FROM archive_totals WHERE guild_id = ? AND source = 'staff_ratings' AND subject_id = ?
+            )
+        """
+        params = (interaction.guild.id, interaction.user.id, interaction.guild.id, interaction.user.id)
+        async with self.bot.db.execute(query, params) as cursor:
             data = await cursor.fetchone()
 
         total, media = data if data else (0, 0)
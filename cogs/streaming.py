@@ -11,6 +11,13 @@ class Streaming(commands.Cog):
         # Regex básico para Twitch e Youtube
         self.url_regex = re.compile(r"(https?://(?:www\.|go\.)?twitch\.tv/([a-z0-9_]+))|(https?://(?:www\.)?youtube\.com/watch\?v=([a-zA-Z0-9_-]+))|(https?://youtu\.be/([a-zA-Z0-9_-]+))")
 
+    async def cog_load(self):
+        # Só recebe mensagens do canal de divulgação (roteador central, sem listener próprio)
+        self.bot.router.register("streaming", self.on_stream_message)
+
+    def cog_unload(self):
+        self.bot.router.unregister("streaming")
+
     async def get_stream_metadata(self, url):
         """Tenta obter título e jogo da página (Simples Scraping)"""
         try:
@@ -50,19 +57,14 @@ class Streaming(commands.Cog):
             print(f"Erro scraping: {e}")
             return None
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot: return
-        if not message.guild: return
-        
-        # 1. Verifica se está no canal de divulgação configurado
-        config = await self.bot.db.execute("SELECT streaming_channel_id, streaming_role_id FROM config WHERE guild_id = ?", (message.guild.id,))
-        row = await config.fetchone()
+    async def on_stream_message(self, message):
+        # 1. Confere o canal com a config (o índice do roteador pode estar sendo atualizado)
+        cfg = await self.bot.config_cache.get(message.guild.id) # Cache em memória (sem query)
         
-        if not row or not row[0]: return # Não configurado
+        if not cfg.streaming_channel_id: return # Não configurado
         
-        streaming_channel_id = row[0]
-        streaming_role_id = row[1]
+        streaming_channel_id = cfg.streaming_channel_id
+        streaming_role_id = cfg.streaming_role_id
         
         if message.channel.id != streaming_channel_id: return
 
@@ -121,9 +123,9 @@ class Streaming(commands.Cog):
             
             # 6. Salvar no DB
             await self.bot.db.execute("""
-                INSERT INTO active_streams (message_id, channel_id, guild_id, user_id, start_time, stream_url)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (sent_msg.id, message.channel.id, message.guild.id, message.author.id, str(datetime.now()), url))
+                INSERT INTO active_streams (message_id, channel_id, guild_id, user_id, start_time, start_ts, stream_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (sent_msg.id, message.channel.id, message.guild.id, message.author.id, str(datetime.now()), int(datetime.now().timestamp()), url))
             await self.bot.db.commit()
 
     async def _terminate_stream(self, guild, user_id, active_stream_data):
@@ -163,10 +165,9 @@ class Streaming(commands.Cog):
                      pass
 
              # 4. Remove Cargo
-             config = await self.bot.db.execute("SELECT streaming_role_id FROM config WHERE guild_id = ?", (guild.id,))
-             row = await config.fetchone()
-             if row and row[0]:
-                 role = guild.get_role(row[0])
+             cfg = await self.bot.config_cache.get(guild.id)
+             if cfg.streaming_role_id:
+                 role = guild.get_role(cfg.streaming_role_id)
                  target_member = guild.get_member(user_id)
                  if role and target_member:
                      try: await target_member.remove_roles(role)
@@ -175,6 +176,7 @@ class Streaming(commands.Cog):
 
     @commands.Cog.listener()
     async def on_presence_update(self, before, after):
+        if not self.bot.module_gate.enabled(after.guild.id, "streaming"): return # Plano sem streaming: sem SQL por presença
         # Otimização: Só checa se o user tiver cargo de streaming OU estiver na tabela active_streams
         is_streaming = False
         for activity in after.activities:
@@ -239,9 +241,7 @@ class Streaming(commands.Cog):
         # Check de Permissão (Dono ou V8)
         is_owner = interaction.user.id == int(interaction.client.owner_id or 0)
         if not is_owner:
-             async with self.bot.db.execute("SELECT tier FROM licenses WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-                row = await cursor.fetchone()
-             if not row or row[0] != 'v8':
+             if self.bot.licenses.tier(interaction.guild.id) != 'v8':
                  await interaction.response.send_message("🔒 **Recurso Exclusivo V8.**", ephemeral=True)
                  return
         
@@ -267,7 +267,9 @@ class StreamingConfigView(discord.ui.View):
         if interaction.user != self.author: return
         channel = select.values[0]
         
-        await self.bot.db.execute("INSERT INTO config (guild_id, streaming_channel_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET streaming_channel_id = ?", (interaction.guild.id, channel.id, channel.id))
+        # config é uma view (sem UPSERT): garante a linha e atualiza
+        await self.bot.db.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", (interaction.guild.id,))
+        await self.bot.db.execute("UPDATE config SET streaming_channel_id = ? WHERE guild_id = ?", (channel.id, interaction.guild.id))
         await self.bot.db.commit()
         
         await interaction.response.send_message(f"✅ Canal definido para {channel.mention}", ephemeral=True)
@@ -277,7 +279,8 @@ class StreamingConfigView(discord.ui.View):
         if interaction.user != self.author: return
         role = select.values[0]
         
-        await self.bot.db.execute("INSERT INTO config (guild_id, streaming_role_id) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET streaming_role_id = ?", (interaction.guild.id, role.id, role.id))
+        await self.bot.db.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", (interaction.guild.id,))
+        await self.bot.db.execute("UPDATE config SET streaming_role_id = ? WHERE guild_id = ?", (role.id, interaction.guild.id))
         await self.bot.db.commit()
         
         await interaction.response.send_message(f"✅ Cargo definido para {role.mention}", ephemeral=True)
@@ -4,6 +4,7 @@ import os
 import datetime
 from discord.ext import commands
 from discord import app_commands, ui
+from database.config_store import module_config
 
 try:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,6 +25,13 @@ class Suggestions(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        # Mensagens do canal de sugestões chegam pelo roteador central
+        self.bot.router.register("suggestions", self.on_suggestion_message)
+
+    def cog_unload(self):
+        self.bot.router.unregister("suggestions")
+
     # ====================================================
     # 🖥️ PAINEL ADMIN
     # ====================================================
@@ -34,9 +42,7 @@ class Suggestions(commands.Cog):
         await self.send_panel(interaction)
 
     async def send_panel(self, interaction: discord.Interaction, is_edit=False):
-        async with self.bot.db.execute("SELECT * FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            data = dict(zip([d[0] for d in cursor.description], row)) if row else {}
+        data = await module_config(self.bot.db, interaction.guild.id, "suggestions") # Só config_suggestions
 
         chan_id = data.get('sugg_channel_id')
         chan = self.bot.get_channel(chan_id) if chan_id else None
@@ -44,7 +50,7 @@ class Suggestions(commands.Cog):
         color = data.get('sugg_color') or config.EMBED_COLOR
         up_emj = data.get('sugg_up_emoji') or "✅"
         down_emj = data.get('sugg_down_emoji') or "❌"
-        count = data.get('sugg_count', 0)
+        count = await self.bot.counters.peek(interaction.guild.id, "suggestion")
 
         embed = discord.Embed(title="💡 Gerenciador de Sugestões", color=color)
         embed.set_thumbnail(url=self.bot.user.display_avatar.url)
@@ -69,14 +75,10 @@ class Suggestions(commands.Cog):
     # ====================================================
     # 📨 EVENTO DE MENSAGEM (GATILHO)
     # ====================================================
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot: return
-        
-        async with self.bot.db.execute("SELECT sugg_channel_id FROM config WHERE guild_id = ?", (message.guild.id,)) as cursor:
-            res = await cursor.fetchone()
+    async def on_suggestion_message(self, message):
+        cfg = await self.bot.config_cache.get(message.guild.id) # Cache em memória (sem query)
         
-        if not res or message.channel.id != res[0]: return
+        if not cfg.sugg_channel_id or message.channel.id != cfg.sugg_channel_id: return
 
         try: await message.delete()
         except: pass 
@@ -101,15 +103,15 @@ class Suggestions(commands.Cog):
         async with self.bot.db.execute("SELECT vote_type FROM suggestion_votes WHERE message_id = ? AND user_id = ?", (msg_id, user_id)) as cursor:
             existing = await cursor.fetchone()
 
+        # Fila de escrita: aguarda o commit em lote antes de recontar os votos
         if existing:
             if existing[0] == vote_type:
-                await self.bot.db.execute("DELETE FROM suggestion_votes WHERE message_id = ? AND user_id = ?", (msg_id, user_id))
+                await self.bot.write_queue.execute("DELETE FROM suggestion_votes WHERE message_id = ? AND user_id = ?", (msg_id, user_id))
             else:
-                await self.bot.db.execute("UPDATE suggestion_votes SET vote_type = ? WHERE message_id = ? AND user_id = ?", (vote_type, msg_id, user_id))
+                await self.bot.write_queue.execute("UPDATE suggestion_votes SET vote_type = ? WHERE message_id = ? AND user_id = ?", (vote_type, msg_id, user_id))
         else:
-            await self.bot.db.execute("INSERT INTO suggestion_votes (message_id, user_id, vote_type) VALUES (?, ?, ?)", (msg_id, user_id, vote_type))
+            await self.bot.write_queue.execute("INSERT INTO suggestion_votes (message_id, user_id, vote_type) VALUES (?, ?, ?)", (msg_id, user_id, vote_type))
         
-        await self.bot.db.commit()
         await self.refresh_buttons(interaction, msg_id)
 
     async def refresh_buttons(self, interaction, msg_id):
@@ -123,12 +125,11 @@ class Suggestions(commands.Cog):
         perc_up = (votes['up'] / total * 100) if total > 0 else 0
         perc_down = (votes['down'] / total * 100) if total > 0 else 0
 
-        async with self.bot.db.execute("SELECT sugg_up_emoji, sugg_down_emoji, sugg_color FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-            res = await cursor.fetchone()
+        cfg = await self.bot.config_cache.get(interaction.guild.id)
         
-        up_emj = res[0] or "✅"
-        down_emj = res[1] or "❌"
-        base_color = res[2] or config.EMBED_COLOR
+        up_emj = cfg.sugg_up_emoji or "✅"
+        down_emj = cfg.sugg_down_emoji or "❌"
+        base_color = cfg.sugg_color or config.EMBED_COLOR
 
         if total == 0: new_color = base_color
         elif perc_up >= 60: new_color = 0x2ecc71 
@@ -205,15 +206,13 @@ class ConfirmSuggestionView(ui.View):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            async with self.bot.db.execute("SELECT sugg_count, sugg_color, sugg_up_emoji, sugg_down_emoji FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
+            async with self.bot.db.execute("SELECT sugg_color, sugg_up_emoji, sugg_down_emoji FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
                 res = await cursor.fetchone()
-                count = (res[0] or 0) + 1
-                color = res[1] or config.EMBED_COLOR
-                up_emj = res[2] or "✅"
-                down_emj = res[3] or "❌"
+                color = res[0] or config.EMBED_COLOR
+                up_emj = res[1] or "✅"
+                down_emj = res[2] or "❌"
 
-            await self.bot.db.execute("UPDATE config SET sugg_count = ? WHERE guild_id = ?", (count, interaction.guild.id))
-            await self.bot.db.commit()
+            count = await self.bot.counters.next(interaction.guild.id, "suggestion")
 
             # Construct Embed
             embed = discord.Embed(title=f"💡 Sugestão #{count:03d}", color=color)
@@ -1,5 +1,6 @@
 import discord
 import datetime
+import time
 import asyncio
 import sys
 import os
@@ -7,6 +8,7 @@ import html
 import uuid
 from discord.ext import commands
 from discord import app_commands, ui
+from database.config_store import module_config
 import aiohttp
 
 try:
@@ -95,9 +97,7 @@ class Tickets(commands.Cog):
         await self.send_admin_panel(interaction)
 
     async def send_admin_panel(self, interaction: discord.Interaction, is_edit=False):
-        async with self.bot.db.execute("SELECT * FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            cfg = dict(zip([d[0] for d in cursor.description], row)) if row else {}
+        cfg = await module_config(self.bot.db, interaction.guild.id, "tickets") # Só config_tickets
 
         async with self.bot.db.execute("SELECT COUNT(*) FROM ticket_categories WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
             cat_count = (await cursor.fetchone())[0]
@@ -137,7 +137,7 @@ class Tickets(commands.Cog):
     # ====================================================
     async def create_ticket(self, interaction, category_id, reason):
         async with self.bot.db.execute("""
-            SELECT ticket_category_id, ticket_support_role_id, ticket_count, 
+            SELECT ticket_category_id, ticket_support_role_id,
                    tk_emoji_claim, tk_emoji_admin, tk_emoji_close, ticket_color, tk_emoji_voice 
             FROM config WHERE guild_id = ?
         """, (interaction.guild.id,)) as cursor:
@@ -146,8 +146,7 @@ class Tickets(commands.Cog):
         if not res or not res[1]:
             return await interaction.followup.send("❌ Sistema em manutenção ou não configurado.", ephemeral=True)
         
-        global_cat_id, role_id, count, e_claim, e_admin, e_close, t_color, e_voice = res
-        count = (count or 0) + 1
+        global_cat_id, role_id, e_claim, e_admin, e_close, t_color, e_voice = res
         
         async with self.bot.db.execute("SELECT label, emoji, location_id FROM ticket_categories WHERE id = ?", (category_id,)) as cursor:
             cat_data = await cursor.fetchone()
@@ -155,8 +154,7 @@ class Tickets(commands.Cog):
             cat_emoji = cat_data[1] if cat_data else "🎫"
             specific_cat_id = cat_data[2] if cat_data else None
 
-        await self.bot.db.execute("UPDATE config SET ticket_count = ? WHERE guild_id = ?", (count, interaction.guild.id))
-        await self.bot.db.commit()
+        count = await self.bot.counters.next(interaction.guild.id, "ticket")
 
         target_category_id = specific_cat_id if specific_cat_id else global_cat_id
         category = self.bot.get_channel(target_category_id)
@@ -179,7 +177,7 @@ class Tickets(commands.Cog):
         except Exception as e:
             return await interaction.followup.send(f"❌ Erro ao criar canal: {e}", ephemeral=True)
 
-        await self.bot.db.execute("INSERT INTO active_tickets (channel_id, guild_id, user_id, opened_at) VALUES (?, ?, ?, ?)", (ticket_channel.id, interaction.guild.id, interaction.user.id, datetime.datetime.now().isoformat()))
+        await self.bot.db.execute("INSERT INTO active_tickets (channel_id, guild_id, user_id, opened_at, opened_ts) VALUES (?, ?, ?, ?, ?)", (ticket_channel.id, interaction.guild.id, interaction.user.id, datetime.datetime.now().isoformat(), int(time.time())))
         await self.bot.db.commit()
 
         embed = discord.Embed(color=final_color)
@@ -308,7 +306,7 @@ class RatingView(ui.View):
     async def rate(self, interaction, stars):
         # 1. Salva no Banco
         staff_id = self.staff_member.id if self.staff_member else 0
-        await self.bot.db.execute("INSERT INTO staff_ratings (guild_id, staff_id, user_id, stars, date) VALUES (?, ?, ?, ?, ?)", (self.guild.id, staff_id, interaction.user.id, stars, datetime.datetime.now().isoformat()))
+        await self.bot.db.execute("INSERT INTO staff_ratings (guild_id, staff_id, user_id, stars, date, ts) VALUES (?, ?, ?, ?, ?, ?)", (self.guild.id, staff_id, interaction.user.id, stars, datetime.datetime.now().isoformat(), int(time.time())))
         await self.bot.db.commit()
         
         # 2. Envia Embed para o Canal de Log
@@ -490,8 +488,8 @@ async def perform_ticket_close_timer(bot, channel, closed_by_user, view, message
             t_data = await cursor.fetchone()
         opener_id, opened_at_str, claimer_id = t_data if t_data else (None, None, None)
         
-        opener = channel.guild.get_member(opener_id) if opener_id else None
-        claimer = channel.guild.get_member(claimer_id) if claimer_id else None
+        opener = await bot.gateway.get_or_fetch_member(channel.guild, opener_id)
+        claimer = await bot.gateway.get_or_fetch_member(channel.guild, claimer_id)
         
         opened_dt = datetime.datetime.fromisoformat(opened_at_str) if opened_at_str else datetime.datetime.now()
         closed_dt = datetime.datetime.now()
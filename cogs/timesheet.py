@@ -1,6 +1,6 @@
 import discord
 from discord import app_commands, ui
-from discord.ext import commands, tasks
+from discord.ext import commands
 import datetime
 import asyncio
 
@@ -19,10 +19,11 @@ SEPARATOR = "━━━━━━━━━━━━━━━━━━━━━━
 class Timesheet(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.management_update_loop.start()
+        # Uma execução por guild, espalhadas nos 2 minutos; painel só é editado se as sessões mudaram
+        self.bot.scheduler.register("timesheet_panel", self.management_update_loop, interval=120, keys=self._panel_guilds)
 
     def cog_unload(self):
-        self.management_update_loop.cancel()
+        self.bot.scheduler.unregister("timesheet_panel")
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -72,7 +73,7 @@ class Timesheet(commands.Cog):
             return await interaction.response.send_message(f"🚫 Use este comando apenas em <#{row[0]}>.", ephemeral=True)
 
         # 2. Verifica se já existe sessão aberta
-        async with self.bot.db.execute("SELECT start_time, status, total_seconds FROM time_sessions WHERE user_id = ? AND guild_id = ? AND status != 'CLOSED' ORDER BY id DESC LIMIT 1", (interaction.user.id, interaction.guild.id)) as cursor:
+        async with self.bot.db.execute("SELECT start_time, status, total_seconds FROM time_sessions WHERE guild_id = ? AND user_id = ? AND status != 'CLOSED' ORDER BY id DESC LIMIT 1", (interaction.guild.id, interaction.user.id)) as cursor:
             session = await cursor.fetchone()
 
         # 3. Cria Embed Inicial (Design Senior)
@@ -108,13 +109,23 @@ class Timesheet(commands.Cog):
     # ====================================================
     # 🏢 DEPARTAMENTO 2: GERÊNCIA (DASHBOARD)
     # ====================================================
-    @tasks.loop(minutes=2)
-    async def management_update_loop(self):
+    def _panel_guilds(self):
+        guild_ids = []
         for guild in self.bot.guilds:
-            try:
-                await self.update_management_panel(guild)
-            except Exception as e:
-                print(f"Erro no loop de gerência para {guild.name}: {e}")
+            if not self.bot.module_gate.enabled(guild.id, "timesheet"): continue
+            cfg = self.bot.config_cache.peek(guild.id)
+            if cfg is not None and not cfg.ts_channel_management: continue # Sem painel configurado
+            guild_ids.append(guild.id)
+        return guild_ids
+
+    async def management_update_loop(self, guild_id):
+        guild = self.bot.get_guild(guild_id)
+        if not guild: return
+        try:
+            await self.update_management_panel(guild, scheduled=True)
+        except Exception as e:
+            self.bot.scheduler.forget("timesheet_panel", guild_id)
+            print(f"Erro no loop de gerência para {guild.name}: {e}")
 
     @app_commands.command(name="ponto_admin_force_panel", description="🛠️ Força a atualização do Painel de Gerência (Torre de Controle).")
     @app_commands.checks.has_permissions(administrator=True)
@@ -123,8 +134,8 @@ class Timesheet(commands.Cog):
         await self.update_management_panel(interaction.guild)
         await interaction.followup.send("✅ Painel de Gerência atualizado com sucesso!", ephemeral=True)
 
-    async def update_management_panel(self, guild):
-        """Atualiza a mensagem fixa no canal de gerência."""
+    async def update_management_panel(self, guild, scheduled=False):
+        """Atualiza a mensagem fixa no canal de gerência (scheduled: pula se nada mudou desde a última edição)."""
         # 1. Busca Configuração
         async with self.bot.db.execute("SELECT ts_channel_management FROM config WHERE guild_id = ?", (guild.id,)) as cursor:
             row = await cursor.fetchone()
@@ -135,8 +146,11 @@ class Timesheet(commands.Cog):
         if not channel: return
 
         # 2. Busca Sessões Abertas (Join com Users se possível, ou fetch manual)
-        async with self.bot.db.execute("SELECT user_id, start_time, status FROM time_sessions WHERE guild_id = ? AND status != 'CLOSED' ORDER BY start_time DESC", (guild.id,)) as cursor:
+        async with self.bot.db.execute("SELECT user_id, start_time, status FROM time_sessions WHERE guild_id = ? AND status != 'CLOSED' ORDER BY start_ts DESC", (guild.id,)) as cursor:
             sessions = await cursor.fetchall()
+        # Tempo decorrido é <t:R> (o Discord atualiza sozinho): mesmas sessões = mesmo painel
+        if scheduled and self.bot.scheduler.unchanged("timesheet_panel", guild.id, (channel.id, tuple(sessions))): return
+        if sessions: await self.bot.gateway.ensure_chunked(guild) # get_member dos operadores
 
         # 3. Monta Texto
         embed = discord.Embed(title="PAINEL DE GESTÃO", color=0xffffff)
@@ -166,7 +180,7 @@ class Timesheet(commands.Cog):
         # Estratégia: Busca última msg do bot no canal. Se for embed de Gerência, edita. Senão cria.
         target_msg = None
         async for msg in channel.history(limit=10):
-            if msg.author == self.bot.user and msg.embeds and (msg.embeds[0].title == "🔭 Torre de Controle" or msg.embeds[0].title == "TORRE DE CONTROLE"):
+            if msg.author == self.bot.user and msg.embeds and msg.embeds[0].title in ("PAINEL DE GESTÃO", "🔭 Torre de Controle", "TORRE DE CONTROLE"):
                 target_msg = msg
                 break
         
@@ -192,6 +206,12 @@ class OperatorView(ui.View):
         discord.SelectOption(label="Retomar", value="RESUME", description="Voltar da pausa"),
         discord.SelectOption(label="Encerrar Plantão", value="END", description="Finalizar e gerar relatório")
     ])
+    async def _log(self, guild_id, user_id, action, now, session_id, details):
+        # Histórico detalhado: vai para o arquivo da guild no modo particionado (fire-and-forget)
+        async with self.bot.partitions.acquire(guild_id) as part:
+            part.write_queue.enqueue("INSERT INTO timesheet_logs (guild_id, user_id, action, timestamp, session_id, details) VALUES (?, ?, ?, ?, ?, ?)",
+                                     (guild_id, user_id, action, now, session_id, details))
+
     async def callback(self, interaction: discord.Interaction, select: ui.Select):
         action = select.values[0]
         guild_id = interaction.guild.id
@@ -199,7 +219,7 @@ class OperatorView(ui.View):
         now = datetime.datetime.now()
         
         # Busca sessão atual
-        async with self.bot.db.execute("SELECT id, start_time, status, total_seconds FROM time_sessions WHERE user_id = ? AND guild_id = ? AND status != 'CLOSED' ORDER BY id DESC LIMIT 1", (user_id, guild_id)) as cursor:
+        async with self.bot.db.execute("SELECT id, start_time, status, total_seconds FROM time_sessions WHERE guild_id = ? AND user_id = ? AND status != 'CLOSED' ORDER BY id DESC LIMIT 1", (guild_id, user_id)) as cursor:
             session = await cursor.fetchone()
 
         # Busca Role Config
@@ -218,15 +238,11 @@ class OperatorView(ui.View):
             if session:
                 return await interaction.response.send_message("⚠️ Você já tem uma sessão aberta!", ephemeral=True)
             
-            await self.bot.db.execute("INSERT INTO time_sessions (guild_id, user_id, start_time, status) VALUES (?, ?, ?, 'OPEN')", (guild_id, user_id, str(now)))
-            
-            # Pega ID da sessão criada
-            async with self.bot.db.execute("SELECT id FROM time_sessions WHERE user_id = ? AND guild_id = ? ORDER BY id DESC LIMIT 1", (user_id, guild_id)) as cursor:
-                 new_session = await cursor.fetchone()
-            session_id = new_session[0]
+            # Fila de escrita: aguarda o commit e já recebe o ID da sessão criada (lastrowid)
+            session_id = await self.bot.write_queue.execute("INSERT INTO time_sessions (guild_id, user_id, start_time, start_ts, status) VALUES (?, ?, ?, ?, 'OPEN')", (guild_id, user_id, str(now), int(now.timestamp())))
 
             # Log Detalhado
-            await self.bot.db.execute("INSERT INTO timesheet_logs (guild_id, user_id, action, timestamp, session_id, details) VALUES (?, ?, 'START', ?, ?, 'Início de Turno')", (guild_id, user_id, now, session_id))
+            await self._log(guild_id, user_id, 'START', now, session_id, 'Início de Turno')
 
             if role: await interaction.user.add_roles(role, reason="Ponto Iniciado")
             msg_resp = "Plantão Iniciado!"
@@ -236,9 +252,9 @@ class OperatorView(ui.View):
             if not session: return await interaction.response.send_message("Nenhuma sessão aberta.", ephemeral=True)
             if session[2] == 'PAUSED': return await interaction.response.send_message("Já está pausado.", ephemeral=True)
             
-            await self.bot.db.execute("UPDATE time_sessions SET status = 'PAUSED' WHERE id = ?", (session[0],))
+            self.bot.write_queue.enqueue("UPDATE time_sessions SET status = 'PAUSED' WHERE id = ?", (session[0],))
             # Log Detalhado
-            await self.bot.db.execute("INSERT INTO timesheet_logs (guild_id, user_id, action, timestamp, session_id, details) VALUES (?, ?, 'PAUSE', ?, ?, 'Pausa Iniciada')", (guild_id, user_id, now, session[0]))
+            await self._log(guild_id, user_id, 'PAUSE', now, session[0], 'Pausa Iniciada')
             
             msg_resp = "Plantão Pausado."
             new_status = "PAUSED"
@@ -247,9 +263,9 @@ class OperatorView(ui.View):
             if not session: return await interaction.response.send_message("Nenhuma sessão aberta.", ephemeral=True)
             if session[2] == 'OPEN': return await interaction.response.send_message("Já está em andamento.", ephemeral=True)
             
-            await self.bot.db.execute("UPDATE time_sessions SET status = 'OPEN' WHERE id = ?", (session[0],))
+            self.bot.write_queue.enqueue("UPDATE time_sessions SET status = 'OPEN' WHERE id = ?", (session[0],))
             # Log Detalhado
-            await self.bot.db.execute("INSERT INTO timesheet_logs (guild_id, user_id, action, timestamp, session_id, details) VALUES (?, ?, 'RESUME', ?, ?, 'Retorno de Pausa')", (guild_id, user_id, now, session[0]))
+            await self._log(guild_id, user_id, 'RESUME', now, session[0], 'Retorno de Pausa')
             
             msg_resp = "Plantão Retomado."
             new_status = "OPEN"
@@ -261,10 +277,10 @@ class OperatorView(ui.View):
             start_dt = datetime.datetime.fromisoformat(session[1])
             duration = (now - start_dt).total_seconds()
             
-            await self.bot.db.execute("UPDATE time_sessions SET status = 'CLOSED', end_time = ?, total_seconds = ? WHERE id = ?", (str(now), int(duration), session[0]))
+            self.bot.write_queue.enqueue("UPDATE time_sessions SET status = 'CLOSED', end_time = ?, end_ts = ?, total_seconds = ? WHERE id = ?", (str(now), int(now.timestamp()), int(duration), session[0]))
             
             # Log Detalhado Final
-            await self.bot.db.execute("INSERT INTO timesheet_logs (guild_id, user_id, action, timestamp, session_id, details) VALUES (?, ?, 'END', ?, ?, 'Fim de Turno')", (guild_id, user_id, now, session[0]))
+            await self._log(guild_id, user_id, 'END', now, session[0], 'Fim de Turno')
 
             if role: await interaction.user.remove_roles(role, reason="Ponto Encerrado")
             
@@ -278,7 +294,7 @@ class OperatorView(ui.View):
                 chan = interaction.guild.get_channel(log_channel_id)
                 if chan:
                     # Busca histórico de pausas
-                    async with self.bot.db.execute("SELECT action, timestamp FROM timesheet_logs WHERE session_id = ? ORDER BY id ASC", (session[0],)) as cursor:
+                    async with self.bot.partitions.acquire(guild_id) as part, part.db.execute("SELECT action, timestamp FROM timesheet_logs WHERE session_id = ? ORDER BY id ASC", (session[0],)) as cursor:
                         logs = await cursor.fetchall()
                     
                     pauses_txt = ""
@@ -302,7 +318,8 @@ class OperatorView(ui.View):
                     
                     await chan.send(embed=e_log)
 
-        await self.bot.db.commit()
+        # Aguarda o lote com as escritas acima ser commitado
+        await self.bot.write_queue.flush()
         await interaction.response.send_message(msg_resp, ephemeral=True)
         
         # Atualiza a Embed do Operador (Design Consistent)
@@ -38,7 +38,7 @@ class VerificationDropdown(discord.ui.Select):
         if self.values[0] == self.correct_code:
             view = self.view
             guild = interaction.guild
-            member = guild.get_member(view.user_id)
+            member = await interaction.client.gateway.get_or_fetch_member(guild, view.user_id)
             
             if member:
                 try:
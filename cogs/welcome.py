@@ -4,6 +4,7 @@ import os
 import datetime
 from discord.ext import commands
 from discord import app_commands, ui
+from database.config_store import module_config
 
 try:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -36,13 +37,7 @@ class Welcome(commands.Cog):
         await self.send_panel(interaction)
 
     async def send_panel(self, interaction: discord.Interaction, is_edit=False):
-        async with self.bot.db.execute("SELECT * FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                cols = [d[0] for d in cursor.description]
-                data = dict(zip(cols, row))
-            else:
-                data = {}
+        data = await module_config(self.bot.db, interaction.guild.id, "welcome") # Só config_welcome
 
         w_id = data.get('welcome_channel_id')
         l_id = data.get('logs_channel_id')
@@ -85,13 +80,7 @@ class Welcome(commands.Cog):
     # 🧠 LÓGICA DE PROCESSAMENTO
     # ====================================================
     async def process_join(self, member):
-        async with self.bot.db.execute("SELECT * FROM config WHERE guild_id = ?", (member.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                cols = [d[0] for d in cursor.description]
-                data = dict(zip(cols, row))
-            else:
-                data = {}
+        data = await self.bot.config_cache.get(member.guild.id) # Cache em memória (sem query)
 
         color = data.get('welcome_color') or config.EMBED_COLOR
         banner = data.get('welcome_banner')
@@ -129,11 +118,10 @@ class Welcome(commands.Cog):
             except: pass
 
     async def process_leave(self, member):
-        async with self.bot.db.execute("SELECT logs_channel_id FROM config WHERE guild_id = ?", (member.guild.id,)) as cursor:
-            res = await cursor.fetchone()
+        cfg = await self.bot.config_cache.get(member.guild.id)
         
-        if not res or not res[0]: return
-        channel = self.bot.get_channel(res[0])
+        if not cfg.logs_channel_id: return
+        channel = self.bot.get_channel(cfg.logs_channel_id)
         if not channel: return
 
         roles = [r.name for r in member.roles if r.name != "@everyone"]
@@ -150,9 +138,11 @@ class Welcome(commands.Cog):
         await channel.send(embed=embed)
 
     @commands.Cog.listener()
-    async def on_member_join(self, member): await self.process_join(member)
+    async def on_member_join(self, member):
+        if self.bot.module_gate.enabled(member.guild.id, "welcome"): await self.process_join(member)
     @commands.Cog.listener()
-    async def on_member_remove(self, member): await self.process_leave(member)
+    async def on_member_remove(self, member):
+        if self.bot.module_gate.enabled(member.guild.id, "welcome"): await self.process_leave(member)
 
 # ====================================================
 # 🎛️ MODALS (VISUAL & BOTOES)
@@ -259,7 +249,9 @@ class WelcomePanel(ui.View):
     @ui.select(cls=discord.ui.ChannelSelect, placeholder="Canal de Entrada", channel_types=[discord.ChannelType.text], row=0, custom_id="welcome_sel_welcome")
     async def sel_welcome(self, interaction: discord.Interaction, select: ui.ChannelSelect):
         await interaction.response.defer()
-        await self.bot.db.execute("INSERT OR REPLACE INTO config (guild_id, welcome_channel_id) VALUES (?, ?)", (interaction.guild.id, select.values[0].id))
+        # UPDATE em vez de REPLACE: o REPLACE recriava a linha e zerava o resto da config da guild
+        await self.bot.db.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", (interaction.guild.id,))
+        await self.bot.db.execute("UPDATE config SET welcome_channel_id = ? WHERE guild_id = ?", (select.values[0].id, interaction.guild.id))
         await self.bot.db.commit()
         await self.cog.send_panel(interaction, is_edit=True)
 
@@ -281,9 +273,7 @@ class WelcomePanel(ui.View):
 
     @ui.button(label="Configurar Botões", style=discord.ButtonStyle.secondary, emoji="🔗", row=2, custom_id="welcome_btn_links")
     async def links_btn(self, interaction: discord.Interaction, button: ui.Button):
-        async with self.bot.db.execute("SELECT * FROM config WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-            row = await cursor.fetchone()
-            data = dict(zip([d[0] for d in cursor.description], row)) if row else {}
+        data = await module_config(self.bot.db, interaction.guild.id, "welcome")
         await interaction.response.send_message("Selecione:", view=ButtonSelectView(self.bot, self.cog, interaction, data), ephemeral=True)
 
     @ui.button(label="Toggle DM", style=discord.ButtonStyle.secondary, emoji="📨", row=2, custom_id="welcome_btn_dm")
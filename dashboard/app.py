@@ -6,6 +6,7 @@ from discord.ext import commands
 
 import aiohttp
 from quart import Quart, render_template, redirect, url_for, request, session, jsonify, abort, Blueprint, send_from_directory
+from utils import json_codec
 
 # Inicializa o App Quart
 app = Quart(__name__, template_folder='templates', static_folder='static')
@@ -336,29 +337,13 @@ async def api_servers_purge():
     data = await request.get_json()
     guild_id = data.get('guild_id')
     
-    if not bot.db: return jsonify({"error": "DB Error"}), 500
+    if not bot.db or not bot.purge_engine: return jsonify({"error": "DB Error"}), 500
+    if not guild_id: return jsonify({"error": "Missing guild_id"}), 400
 
-    # LISTA DE TABELAS PARA LIMPAR
-    # Adicione aqui todas as tabelas que têm guild_id
-    tables = [
-        "config", "licenses", "active_tickets", "faction_actions", 
-        "ticket_panels" # Adicionar outras se existirem
-    ]
-    
-    deleted_count = 0
     try:
-        for table in tables:
-            # Verifica se tabela existe antes de tentar deletar (segurança)
-            # Simplificação: assume que existem. Em prod, verificar sqlite_master.
-            try:
-                await bot.db.execute(f"DELETE FROM {table} WHERE guild_id = ?", (guild_id,))
-            except: pass # Ignora erro se tabela não tiver guild_id ou não existir
-            
-        # Remove também da Audit Log para sair da fila
-        await bot.db.execute("DELETE FROM audit_logs WHERE target_id = ? AND action = 'BOT_REMOVED'", (guild_id,))
-        
-        await bot.db.commit()
-        return jsonify({"success": True, "message": "Dados limpos com sucesso!"})
+        # Todas as tabelas com guild_id (inclusive licença) + saída da fila de limpeza, em background
+        job = bot.purge_engine.submit("guilds", [guild_id], keep_license=False, clear_queue=True)
+        return jsonify({"success": True, "job": job.to_dict(), "message": f"Limpeza iniciada (job #{job.id})."})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -533,6 +518,53 @@ async def api_health():
         "issues": issues
     })
 
+@owner_bp.route('/api/cache/stats')
+async def api_cache_stats():
+    """Hit/Miss dos caches em memória (eventos do gateway não devem tocar o SQLite)"""
+    if not bot: return jsonify({"error": "Bot not ready"}), 503
+    
+    cache = getattr(bot, 'config_cache', None)
+    return jsonify({
+        "config": cache.stats() if cache else None,
+        "json": json_codec.cache_stats(),
+        "licenses": bot.licenses.stats() if getattr(bot, 'licenses', None) else None,
+        "router": bot.router.stats() if getattr(bot, 'router', None) else None,
+        "module_gate": bot.module_gate.stats() if getattr(bot, 'module_gate', None) else None
+    })
+
+@owner_bp.route('/api/cluster/shards')
+async def api_cluster_shards():
+    """Latência e guilds por shard (modo cluster: todos os processos, via cluster_shards)"""
+    if not bot: return jsonify({"error": "Bot not ready"}), 503
+
+    cluster = getattr(bot, 'cluster', None)
+    if not cluster: return jsonify({"error": "Cluster service not loaded"}), 503
+    return jsonify(cluster.stats())
+
+@owner_bp.route('/api/scheduler/jobs')
+async def api_scheduler_jobs():
+    """Jobs periódicos: guilds por ciclo, execuções puladas e duração da última rodada"""
+    if not bot: return jsonify({"error": "Bot not ready"}), 503
+
+    scheduler = getattr(bot, 'scheduler', None)
+    if not scheduler: return jsonify({"error": "Scheduler not loaded"}), 503
+    return jsonify(scheduler.stats())
+
+@owner_bp.route('/api/gateway/stats')
+async def api_gateway_stats():
+    """Intents/cache de membros em uso e memória residente estimada por guild"""
+    if not bot: return jsonify({"error": "Bot not ready"}), 503
+
+    gateway = getattr(bot, 'gateway', None)
+    if not gateway: return jsonify({"error": "Gateway profile not loaded"}), 503
+    gate = getattr(bot, 'module_gate', None)
+    return jsonify({
+        "profile": gateway.stats(),
+        # Licenciados depois do boot com intents fora da conexão atual: precisam de reinício
+        "restart_needed": gateway.missing(gate.enabled_modules()) if gate else [],
+        "memory": gateway.memory_report(bot.guilds, top=int(request.args.get('top', 20)))
+    })
+
 @owner_bp.route('/api/ghost_join', methods=['POST'])
 async def api_ghost_join():
     if not bot: return jsonify({"error": "Bot not ready"}), 503
@@ -686,10 +718,7 @@ async def api_tiers_update():
             await bot.db.execute("DELETE FROM tier_definitions WHERE tier_name = ? AND module_name = ?", (tier, module))
             
         await bot.db.commit()
-        
-        # Recarrega no Bot imediatamente
-        if hasattr(bot, 'load_tier_permissions'):
-            await bot.load_tier_permissions()
+        # O tier_map do bot já foi atualizado pelo listener de escrita (pub/sub), sem reler a tabela
         
         return jsonify({"success": True})
     except Exception as e:
@@ -707,100 +736,64 @@ async def database_page():
 
 @owner_bp.route('/api/database/cleanup_inactive', methods=['POST'])
 async def api_database_cleanup_inactive():
-    if not bot or not bot.db: return jsonify({"error": "Bot not ready"}), 503
+    if not bot or not bot.db or not bot.purge_engine: return jsonify({"error": "Bot not ready"}), 503
     
     try:
-        # 1. Identificar Guilds Ativas
-        active_ids = [g.id for g in bot.guilds]
-        
-        # 2. Identificar Guilds no Banco (Exceto Licenses e global_bans)
-        # Vamos varrer tabelas principais que usam guild_id
-        tables = [
-            "config", 
-            "active_tickets", 
-            "ticket_categories",
-            "staff_ratings",
-            "presence",
-            "suggestion_votes",
-            "faction_actions", 
-            "action_mvp_votes",
-            "active_pings",
-            "active_streams",
-            "embed_templates",
-            "org_punishments", 
-            "time_sessions"
-        ]
-        
-        deleted_count = 0
-        
-        for table in tables:
-            try:
-                # 3. Verificação de Segurança (Coluna Existe?)
-                # Isso impede erros caso o usuário tenha um banco antigo sem a migração
-                async with bot.db.execute(f"PRAGMA table_info({table})") as cursor:
-                    cols = [row[1] for row in await cursor.fetchall()]
-                
-                if "guild_id" not in cols:
-                    print(f"⚠️ [CLEANUP] Tabela {table} pulada (sem guild_id).")
-                    continue
-
-                # 4. Pega IDs distintos na tabela
-                async with bot.db.execute(f"SELECT DISTINCT guild_id FROM {table}") as cursor:
-                    rows = await cursor.fetchall()
-                    db_ids = [row[0] for row in rows if row[0]]
-                    
-                # 5. Identifica fantasmas (db_ids que nao estao em active_ids)
-                ghost_ids = [gid for gid in db_ids if gid not in active_ids]
-                
-                if ghost_ids:
-                    # Deleta em massa
-                    placeholders = ','.join('?' for _ in ghost_ids)
-                    await bot.db.execute(f"DELETE FROM {table} WHERE guild_id IN ({placeholders})", tuple(ghost_ids))
-                    deleted_count += bot.db.total_changes
-            except Exception as ex:
-                print(f"❌ [CLEANUP ERROR] Falha na tabela {table}: {ex}")
-                continue
-                
-        await bot.db.commit()
-        
-        return jsonify({"success": True, "deleted_rows": deleted_count})
-        
+        # Guilds ativas vão para uma tabela temporária; o motor apaga o resto em blocos (licenças mantidas)
+        job = bot.purge_engine.submit("inactive")
+        return jsonify({"success": True, "job": job.to_dict()})
+    except RuntimeError as e:
+        # Cluster sem heartbeat de todos os processos: a lista de guilds ativas não é confiável
+        return jsonify({"error": str(e)}), 409
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@owner_bp.route('/api/database/jobs')
+async def api_db_jobs():
+    """Progresso dos jobs de limpeza (?id=N para um só)"""
+    if not bot or not bot.purge_engine: return jsonify({"error": "Bot not ready"}), 503
+    job_id = request.args.get('id')
+    if job_id:
+        job = bot.purge_engine.get(int(job_id))
+        if not job: return jsonify({"error": "Job não encontrado"}), 404
+        return jsonify(job.to_dict())
+    return jsonify(bot.purge_engine.list())
+
 @owner_bp.route('/api/database/stats')
 async def api_db_stats():
     if not bot or not bot.db: return jsonify({"error": "Bot not ready"}), 503
     
+    if not bot.maintenance: return jsonify({"error": "Maintenance not ready"}), 503
+    
     try:
-        # File Size
-        import os
-        db_path = "database/bot_data.db"
-        size_mb = os.path.getsize(db_path) / (1024 * 1024) if os.path.exists(db_path) else 0
-        
-        # Table Counts
-        tables = ["licenses", "config", "audit_logs", "faction_actions", "active_tickets"]
-        counts = {}
-        total_rows = 0
-        
-        for table in tables:
-            try:
-                async with bot.db.execute(f"SELECT COUNT(*) FROM {table}") as cursor:
-                    row = await cursor.fetchone()
-                    count = row[0]
-                    counts[table] = count
-                    total_rows += count
-            except:
-                counts[table] = 0
+        # Sem COUNT(*): tamanho por PRAGMAs, linhas estimadas pelo ANALYZE (sqlite_stat1)
+        stats = await bot.maintenance.snapshot()
+        counts = {table: info["rows"] or 0 for table, info in stats["tables"].items()}
 
         return jsonify({
-            "size_mb": round(size_mb, 2),
-            "total_rows": total_rows,
-            "details": counts
+            "size_mb": stats["size_mb"],
+            "free_mb": stats["free_mb"],
+            "wal_mb": stats["wal_mb"],
+            "total_rows": sum(counts.values()),
+            "details": counts,
+            "stats_at": stats["stats_at"],
+            "partitions": bot.partitions.stats() if getattr(bot, 'partitions', None) else None # Arquivos por guild (DB_PARTITION=1)
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@owner_bp.route('/api/database/maintenance', methods=['GET', 'POST'])
+async def api_db_maintenance():
+    """Páginas por tabela, free-list e última rodada. POST roda a manutenção agora (?quiet=1 inclui vacuum)."""
+    if not bot or not bot.maintenance: return jsonify({"error": "Bot not ready"}), 503
+    
+    try:
+        if request.method == 'POST':
+            await bot.maintenance.run(quiet=bool(request.args.get('quiet')))
+        return jsonify(await bot.maintenance.snapshot())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @owner_bp.route('/api/database/guilds')
 async def api_db_guilds():
     if not bot or not bot.db: return jsonify({"error": "Bot not ready"}), 503
@@ -860,40 +853,49 @@ async def api_db_wipe():
     keep_license = data.get('keep_license', True)
     
     if not guild_id: return jsonify({"error": "Missing guild_id"}), 400
+    if not bot or not bot.purge_engine: return jsonify({"error": "Bot not ready"}), 503
     
     try:
-        # LISTA DE TABELAS PARA LIMPAR
-        tables = [
-            "config", "ticket_categories", "active_tickets", "staff_ratings", 
-            "presence", "suggestion_votes", "faction_actions", "action_mvp_votes",
-            "active_pings", "embed_templates", "audit_logs"
-        ]
-        
-        deleted_count = 0
-        for table in tables:
-            try:
-                # Verifica se tabela tem coluna guild_id
-                # (Assumindo que todas listadas acima têm. Se não, try/except segura)
-                async with bot.db.execute(f"DELETE FROM {table} WHERE guild_id = ?", (guild_id,)) as cursor:
-                    deleted_count += cursor.rowcount
-            except:
-                pass
-        
-        # Limpa License se solicitado
-        if not keep_license:
-            async with bot.db.execute("DELETE FROM licenses WHERE guild_id = ?", (guild_id,)) as cursor:
-                deleted_count += cursor.rowcount
-                
-        await bot.db.commit()
-        return jsonify({"success": True, "deleted_rows": deleted_count})
-        
+        job = bot.purge_engine.submit("guilds", [guild_id], keep_license=keep_license)
+        return jsonify({"success": True, "job": job.to_dict()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@owner_bp.route('/queries')
+async def queries_page():
+    user = session.get('user')
+    if not user: return redirect(url_for('owner.login'))
+    return await render_template('queries.html', user=user)
+
+@owner_bp.route('/api/database/queries', methods=['GET', 'DELETE'])
+async def api_db_queries():
+    """Latência por statement (count/total/p95/p99) + slow log com o cog que chamou"""
+    if not bot or not bot.db: return jsonify({"error": "Bot not ready"}), 503
+    stats = getattr(bot.db, 'query_stats', None)
+    if not stats: return jsonify({"error": "Instrumentação desligada (DB_QUERY_STATS=0)"}), 404
+
+    if request.method == 'DELETE':
+        stats.reset()
+        return jsonify({"success": True})
+    return jsonify(stats.snapshot(limit=int(request.args.get('limit', 100))))
+
 @owner_bp.route('/api/database/backup')
 async def api_db_backup():
+    # Entrega o snapshot consistente mais recente (nunca o .db aberto pelo bot)
+    # ?fresh=1 força um snapshot novo antes do download
     try:
-        return await send_from_directory('database', 'bot_data.db', as_attachment=True)
+        service = bot.backup_service
+        path = service.latest()
+        if not path or request.args.get('fresh'):
+            path = await service.run_backup()
+        return await send_from_directory(service.backup_dir, os.path.basename(path), as_attachment=True)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@owner_bp.route('/api/database/backups')
+async def api_db_backups():
+    try:
+        return jsonify(bot.backup_service.stats())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -903,16 +905,19 @@ async def api_db_restore():
     f = files.get('file')
     
     if f:
-        # Salva como .db (sobrescrevendo?? Perigoso! Mas é o pedido)
-        # O ideal seria salvar um .bak antes
-        import shutil
-        shutil.copy("database/bot_data.db", "database/bot_data.db.bak")
-        
-        await f.save("database/bot_data.db")
-        
-        # Reinicia conexão DB no bot?? Complexo.
-        # Melhor pedir restart.
-        return jsonify({"success": True, "message": "Banco restaurado. REINICIE O BOT IMEDIATAMENTE."})
+        # Hot restore: valida, pausa a fila, troca o arquivo e reaquece os caches (sem reiniciar)
+        from database.restore import hot_restore, RestoreError
+        upload_path = "database/.restore-upload"
+        await f.save(upload_path)
+        try:
+            result = await hot_restore(bot, upload_path)
+            return jsonify({"success": True, "message": f"Banco restaurado sem reinício (pausa de {result['paused_ms']}ms).", **result})
+        except RestoreError as e:
+            return jsonify({"error": f"Backup rejeitado: {e}"}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        finally:
+            if os.path.exists(upload_path): os.remove(upload_path)
         
     return jsonify({"error": "No file"}), 400
 
@@ -0,0 +1,252 @@
+import asyncio
+import datetime
+import gzip
+import os
+import shutil
+import time
+from utils import json_codec
+from database.partitions import PARTITIONED_TABLES
+
+# ====================================================
+# ⚙️ CONFIGURAÇÃO DA RETENÇÃO (Configurável via .env)
+# ====================================================
+DB_ARCHIVE_DIR = os.getenv('DB_ARCHIVE_DIR', 'database/archive')
+DB_ARCHIVE_CHUNK = int(os.getenv('DB_ARCHIVE_CHUNK', 500))   # Linhas movidas por transação
+# Dias na base quente por tabela. Ex: DB_RETENTION="timesheet_logs:60,audit_logs:365" (0 desliga)
+DB_RETENTION = os.getenv('DB_RETENTION', '')
+
+DEFAULT_RETENTION_DAYS = {
+    "timesheet_logs": 90,
+    "time_pauses": 90,
+    "audit_logs": 180,
+    "giveaways": 60,
+    "faction_actions": 120,
+    "staff_ratings": 365, # Precisa ser maior que 1 mês (o ranking "Staff do Mês" lê só a base quente)
+}
+
+DISCORD_EPOCH_MS = 1420070400000
+
+def snowflake_at(when):
+    """Menor snowflake (message_id) criado em `when`: compara idade pelo próprio ID."""
+    return (int(when.timestamp() * 1000) - DISCORD_EPOCH_MS) << 22
+
+def retention_days():
+    days = dict(DEFAULT_RETENTION_DAYS)
+    for item in DB_RETENTION.split(','):
+        if ':' not in item: continue
+        table, value = item.split(':', 1)
+        try: days[table.strip()] = int(value)
+        except ValueError: print(f"⚠️ [ARCHIVE] DB_RETENTION inválido: {item}")
+    return days
+
+# ====================================================
+# 📜 POLÍTICAS (o que sai da base quente e como)
+# ====================================================
+# cutoff: como a idade é comparada -> 'text' (data TEXT local), 'epoch' ou 'snowflake' (message_id)
+# guild: expressão SQL da guild dona da linha (None = arquivo global)
+# children: tabelas filhas levadas junto, embutidas na linha arquivada
+# aggregate: (coluna_sujeito, coluna_valor) somados em archive_totals para rankings/relatórios
+POLICIES = [
+    {
+        "table": "timesheet_logs", "key": "id", "guild": "guild_id",
+        "where": "timestamp < ?", "cutoff": "text",
+    },
+    {
+        "table": "time_pauses", "key": "id",
+        "guild": "(SELECT s.guild_id FROM time_sessions s WHERE s.id = time_pauses.session_id)",
+        "where": "start_time < ? AND session_id IN (SELECT id FROM time_sessions WHERE status = 'CLOSED')", "cutoff": "text",
+    },
+    {
+        # BOT_REMOVED alimenta a fila de limpeza do painel: fica na base quente
+        "table": "audit_logs", "key": "id", "guild": None,
+        "where": "timestamp < ? AND action != 'BOT_REMOVED'", "cutoff": "text",
+    },
+    {
+        "table": "giveaways", "key": "message_id", "guild": "guild_id",
+        "where": "status != 'OPEN' AND end_ts < ?", "cutoff": "epoch",
+        "children": [("giveaway_entries", "giveaway_id")],
+    },
+    {
+        "table": "faction_actions", "key": "message_id", "guild": "guild_id",
+        "where": "status IN ('WIN', 'LOSS') AND message_id < ?", "cutoff": "snowflake",
+        "children": [("action_participants", "message_id"), ("action_mvp_votes", "message_id")],
+    },
+    {
+        "table": "staff_ratings", "key": "id", "guild": "guild_id",
+        "where": "ts < ?", "cutoff": "epoch",
+        "aggregate": ("staff_id", "stars"),
+    },
+]
+
+ARCHIVE_TOTALS_UPSERT = """
+    INSERT INTO archive_totals (guild_id, source, subject_id, rows, total) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(guild_id, source, subject_id) DO UPDATE SET rows = rows + excluded.rows, total = total + excluded.total
+"""
+
+def _cutoff_value(kind, days):
+    when = datetime.datetime.now() - datetime.timedelta(days=days)
+    if kind == "epoch": return int(when.timestamp())
+    if kind == "snowflake": return snowflake_at(when)
+    return when.strftime("%Y-%m-%d %H:%M:%S")
+
+# ====================================================
+# 🧊 ARQUIVO FRIO (JSONL comprimido por guild)
+# ====================================================
+class ArchiveService:
+    """
+    Move linhas antigas das tabelas de histórico para arquivos frios:
+    database/archive/<guild_id>/<tabela>.jsonl.gz (um membro gzip anexado por rodada).
+    - Seleção em blocos pela chave; arquivo gravado ANTES do DELETE (falha = duplicata no frio, nunca perda).
+    - DELETE + agregados (archive_totals) na mesma transação da WriteQueue.
+    - Rankings somam archive_totals ao que ainda está quente (ex: ranking de staff).
+    - Modo particionado: tabelas que moram no arquivo da guild são arquivadas guild por guild.
+    Chamado pelo MaintenanceService na janela de madrugada.
+    """
+    def __init__(self, db, write_queue, archive_dir=DB_ARCHIVE_DIR, chunk=DB_ARCHIVE_CHUNK, partitions=None):
+        self.db = db
+        self.write_queue = write_queue
+        self.partitions = partitions # PartitionManager (None ou desligado = tudo no banco central)
+        self.archive_dir = archive_dir
+        self.chunk = max(1, chunk)
+        self.lock = asyncio.Lock()
+        self.last_run = None # {"at", "moved": {tabela: linhas}, "seconds"}
+
+    async def run(self):
+        async with self.lock:
+            started = time.perf_counter()
+            days = retention_days()
+            existing = {row[0] for row in await self.db.execute_fetchall("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+            moved = {}
+            for policy in POLICIES:
+                table = policy["table"]
+                if table not in existing or days.get(table, 0) <= 0: continue
+                cutoff = _cutoff_value(policy["cutoff"], days[table])
+                try:
+                    # Central primeiro (no modo particionado sobram só guilds que ainda não abriram o arquivo)
+                    moved[table] = await self._archive_table(policy, cutoff, existing)
+                    if self.partitions and self.partitions.enabled and table in PARTITIONED_TABLES:
+                        for guild_id in self.partitions.guild_ids():
+                            async with self.partitions.acquire(guild_id) as part:
+                                moved[table] += await self._archive_table(policy, cutoff, existing, part.db, part.write_queue)
+                except Exception as e:
+                    print(f"❌ [ARCHIVE] Falha ao arquivar {table}: {e}")
+
+            self.last_run = {
+                "at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "moved": moved,
+                "seconds": round(time.perf_counter() - started, 2)
+            }
+            if any(moved.values()):
+                print(f"🧊 [ARCHIVE] {sum(moved.values())} linhas movidas para o arquivo frio: {moved}")
+            return moved
+
+    async def _archive_table(self, policy, cutoff, existing, db=None, write_queue=None):
+        db = db or self.db
+        write_queue = write_queue or self.write_queue
+        table, key = policy["table"], policy["key"]
+        guild_expr = policy["guild"] or "NULL"
+        children = [c for c in policy.get("children", []) if c[0] in existing]
+        aggregate = policy.get("aggregate")
+        total = 0
+
+        while True:
+            async with db.execute(
+                f"SELECT {guild_expr} AS _guild, * FROM {table} WHERE {policy['where']} ORDER BY {key} LIMIT ?",
+                (cutoff, self.chunk)) as cursor:
+                cols = [d[0] for d in cursor.description][1:]
+                rows = await cursor.fetchall()
+            if not rows: return total
+
+            records = {} # guild -> [dict]
+            keys = []
+            for row in rows:
+                record = dict(zip(cols, row[1:]))
+                keys.append(record[key])
+                records.setdefault(row[0], []).append(record)
+
+            # Filhas embutidas no registro (ex: participantes da ação)
+            for child, fk in children:
+                placeholders = ",".join("?" * len(keys))
+                async with db.execute(f"SELECT * FROM {child} WHERE {fk} IN ({placeholders})", keys) as cursor:
+                    child_cols = [d[0] for d in cursor.description]
+                    by_parent = {}
+                    for child_row in await cursor.fetchall():
+                        item = dict(zip(child_cols, child_row))
+                        by_parent.setdefault(item[fk], []).append(item)
+                for guild_records in records.values():
+                    for record in guild_records:
+                        record[child] = by_parent.get(record[key], [])
+
+            await asyncio.to_thread(self._append, table, records)
+
+            statements = []
+            placeholders = ",".join("?" * len(keys))
+            for child, fk in children:
+                statements.append((f"DELETE FROM {child} WHERE {fk} IN ({placeholders})", keys))
+            statements.append((f"DELETE FROM {table} WHERE {key} IN ({placeholders})", keys))
+            if aggregate:
+                subject, value = aggregate
+                totals = {}
+                for guild_id, guild_records in records.items():
+                    for record in guild_records:
+                        entry = totals.setdefault((guild_id, record[subject]), [0, 0])
+                        entry[0] += 1
+                        entry[1] += record[value] or 0
+                for (guild_id, subject_id), (count, value_sum) in totals.items():
+                    statements.append((ARCHIVE_TOTALS_UPSERT, (guild_id, table, subject_id, count, value_sum)))
+            await write_queue.transaction(statements)
+
+            total += len(rows)
+            if len(rows) < self.chunk: return total
+            await asyncio.sleep(0) # Deixa o resto do bot respirar entre blocos
+
+    # ====================================================
+    # 📁 ARQUIVOS (Thread)
+    # ====================================================
+    def guild_dir(self, guild_id):
+        return os.path.join(self.archive_dir, str(guild_id) if guild_id is not None else "global")
+
+    def _append(self, table, records):
+        for guild_id, guild_records in records.items():
+            folder = self.guild_dir(guild_id)
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{table}.jsonl.gz")
+            # Cada rodada anexa um membro gzip novo; gzip.open lê todos em sequência
+            with gzip.open(path, "ab", compresslevel=6) as f:
+                for record in guild_records:
+                    f.write(json_codec.dumps(record, default=str).encode() + b"\n")
+                f.flush()
+                os.fsync(f.fileobj.fileno())
+
+    def read(self, guild_id, table):
+        """Itera os registros arquivados de uma guild (relatórios/exportação)."""
+        path = os.path.join(self.guild_dir(guild_id), f"{table}.jsonl.gz")
+        if not os.path.exists(path): return
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip(): yield json_codec.loads(line)
+
+    def delete_guild(self, guild_id):
+        folder = self.guild_dir(guild_id)
+        if os.path.isdir(folder): shutil.rmtree(folder, ignore_errors=True)
+
+    def stats(self):
+        files = 0
+        size = 0
+        guilds = 0
+        if os.path.isdir(self.archive_dir):
+            for entry in os.scandir(self.archive_dir):
+                if not entry.is_dir(): continue
+                guilds += 1
+                for file in os.scandir(entry.path):
+                    files += 1
+                    size += file.stat().st_size
+        return {
+            "dir": self.archive_dir,
+            "guilds": guilds,
+            "files": files,
+            "size_mb": round(size / (1024 * 1024), 2),
+            "retention_days": retention_days(),
+            "last_run": self.last_run
+        }
@@ -0,0 +1,221 @@
+import asyncio
+import datetime
+import gzip
+import os
+import shutil
+import sqlite3
+import tarfile
+import time
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ====================================================
+# ⚙️ CONFIGURAÇÃO DOS BACKUPS (Configurável via .env)
+# ====================================================
+DB_BACKUP_DIR = os.getenv('DB_BACKUP_DIR', 'database/backups')
+DB_BACKUP_INTERVAL_MIN = int(os.getenv('DB_BACKUP_INTERVAL_MIN', 60))   # Intervalo entre snapshots
+DB_BACKUP_PAGES = int(os.getenv('DB_BACKUP_PAGES', 256))                # Páginas copiadas por passo
+DB_BACKUP_STEP_SLEEP_MS = int(os.getenv('DB_BACKUP_STEP_SLEEP_MS', 5))  # Pausa entre passos
+DB_BACKUP_COMPRESSION = os.getenv('DB_BACKUP_COMPRESSION', 'gzip')      # gzip | zstd (se instalado)
+DB_BACKUP_KEEP_HOURLY = int(os.getenv('DB_BACKUP_KEEP_HOURLY', 24))
+DB_BACKUP_KEEP_DAILY = int(os.getenv('DB_BACKUP_KEEP_DAILY', 7))
+DB_BACKUP_KEEP_WEEKLY = int(os.getenv('DB_BACKUP_KEEP_WEEKLY', 4))
+
+SNAPSHOT_PREFIX = "bot_data-"
+SNAPSHOT_FORMAT = "%Y%m%d-%H%M%S"
+EXTENSIONS = {"gzip": ".db.gz", "zstd": ".db.zst"}
+ARCHIVE_EXTENSIONS = {"gzip": ".tar.gz", "zstd": ".tar.zst"} # Modo particionado: banco central + arquivos das guilds
+CENTRAL_MEMBER = "bot_data.db"                               # Nomes dentro do .tar
+GUILDS_MEMBER = "guilds"
+
+# ====================================================
+# 💾 SERVIÇO DE BACKUP ONLINE (API de backup do SQLite)
+# ====================================================
+class BackupService:
+    """
+    Snapshots consistentes sem parar o bot:
+    - Cópia feita numa thread com conexão própria (somente leitura), em passos de poucas páginas.
+    - Uma transação de leitura segura o snapshot durante a cópia (WAL: escritores não bloqueiam).
+    - Compressão gzip (ou zstd, se o pacote zstandard existir) e rotação horária/diária/semanal.
+    - Modo particionado (DB_PARTITION=1): cada arquivo de guild é copiado do mesmo jeito e o snapshot
+      vira um .tar com o banco central + guilds/<guild_id>.db (o restore entende os dois formatos).
+    """
+    def __init__(self, db_path, backup_dir=DB_BACKUP_DIR, interval_min=DB_BACKUP_INTERVAL_MIN, partitions=None):
+        self.db_path = db_path
+        self.partitions = partitions # PartitionManager (arquivos das guilds entram no snapshot)
+        self.backup_dir = backup_dir
+        self.interval = max(1, interval_min) * 60
+        self.compression = "zstd" if DB_BACKUP_COMPRESSION == "zstd" and zstandard else "gzip"
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.last_backup = None # {"file", "size", "seconds", "at"}
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._loop())
+        return self
+
+    async def close(self):
+        if not self.task: return
+        self.task.cancel()
+        try: await self.task
+        except asyncio.CancelledError: pass
+        self.task = None
+
+    async def _loop(self):
+        while True:
+            # Só faz backup no boot se o último snapshot já estiver velho
+            newest = self.latest()
+            age = time.time() - os.path.getmtime(newest) if newest else self.interval
+            if age < self.interval:
+                await asyncio.sleep(self.interval - age)
+            try:
+                await self.run_backup()
+            except Exception as e:
+                print(f"❌ [BACKUP] Falha no backup agendado: {e}")
+                await asyncio.sleep(60)
+
+    async def run_backup(self):
+        """Gera um snapshot agora. Retorna o caminho do arquivo comprimido."""
+        async with self.lock:
+            started = time.perf_counter()
+            path = await asyncio.to_thread(self._backup_sync)
+            removed = await asyncio.to_thread(self.prune)
+
+            elapsed = round(time.perf_counter() - started, 2)
+            self.last_backup = {
+                "file": os.path.basename(path),
+                "size": os.path.getsize(path),
+                "seconds": elapsed,
+                "at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            print(f"💾 [BACKUP] Snapshot {self.last_backup['file']} ({self.last_backup['size'] // 1024} KB) em {elapsed}s. Rotação removeu {removed}.")
+            return path
+
+    # ====================================================
+    # 🧵 THREAD DE CÓPIA
+    # ====================================================
+    def _backup_sync(self):
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime(SNAPSHOT_FORMAT)
+        guild_files = self._guild_files()
+        ext = (ARCHIVE_EXTENSIONS if guild_files else EXTENSIONS)[self.compression]
+        raw_path = os.path.join(self.backup_dir, f".{SNAPSHOT_PREFIX}{stamp}.tmp")
+        final_path = os.path.join(self.backup_dir, f"{SNAPSHOT_PREFIX}{stamp}{ext}")
+        copy_path = raw_path + ".db"
+
+        try:
+            if guild_files:
+                with tarfile.open(raw_path, "w") as tar:
+                    self._copy_database(self.db_path, copy_path)
+                    tar.add(copy_path, arcname=CENTRAL_MEMBER)
+                    for guild_id, path in guild_files:
+                        if not self._copy_database(path, copy_path, missing_ok=True): continue # Purgada durante o backup
+                        tar.add(copy_path, arcname=f"{GUILDS_MEMBER}/{guild_id}.db")
+            else:
+                self._copy_database(self.db_path, raw_path)
+
+            self._compress(raw_path, final_path + ".part")
+            os.replace(final_path + ".part", final_path)
+        finally:
+            for leftover in (raw_path, copy_path, final_path + ".part"):
+                if os.path.exists(leftover): os.remove(leftover)
+        return final_path
+
+    def _guild_files(self):
+        if not self.partitions or not self.partitions.enabled: return []
+        return [(guild_id, self.partitions.path(guild_id)) for guild_id in sorted(self.partitions.guild_ids())]
+
+    @staticmethod
+    def _copy_database(src_path, dst_path, missing_ok=False):
+        """Cópia online de um arquivo SQLite (API de backup). False se o arquivo sumiu e missing_ok."""
+        if os.path.exists(dst_path): os.remove(dst_path)
+        try:
+            src = sqlite3.connect(f"file:{os.path.abspath(src_path)}?mode=ro", uri=True, isolation_level=None)
+        except sqlite3.OperationalError:
+            if missing_ok and not os.path.exists(src_path): return False
+            raise
+        dst = sqlite3.connect(dst_path)
+        try:
+            # Transação de leitura aberta: todos os passos enxergam o mesmo snapshot
+            src.execute("BEGIN")
+            src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+            src.backup(dst, pages=max(1, DB_BACKUP_PAGES), sleep=DB_BACKUP_STEP_SLEEP_MS / 1000)
+            src.execute("COMMIT")
+
+            check = dst.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok": raise RuntimeError(f"quick_check falhou em {os.path.basename(src_path)}: {check}")
+        finally:
+            dst.close()
+            src.close()
+        return True
+
+    def _compress(self, src_path, dst_path):
+        with open(src_path, "rb") as fin:
+            if self.compression == "zstd":
+                with open(dst_path, "wb") as fout:
+                    zstandard.ZstdCompressor(level=10).copy_stream(fin, fout)
+            else:
+                with gzip.open(dst_path, "wb", compresslevel=6) as fout:
+                    shutil.copyfileobj(fin, fout, 1024 * 1024)
+
+    # ====================================================
+    # 🗂️ SNAPSHOTS E ROTAÇÃO
+    # ====================================================
+    def snapshots(self):
+        """Lista [(datetime, caminho)] do mais novo para o mais antigo."""
+        if not os.path.isdir(self.backup_dir): return []
+        result = []
+        for name in os.listdir(self.backup_dir):
+            if not name.startswith(SNAPSHOT_PREFIX): continue
+            ext = next((e for e in (*EXTENSIONS.values(), *ARCHIVE_EXTENSIONS.values()) if name.endswith(e)), None)
+            if not ext: continue
+            try: when = datetime.datetime.strptime(name[len(SNAPSHOT_PREFIX):-len(ext)], SNAPSHOT_FORMAT)
+            except ValueError: continue
+            result.append((when, os.path.join(self.backup_dir, name)))
+        return sorted(result, reverse=True)
+
+    def latest(self):
+        snaps = self.snapshots()
+        return snaps[0][1] if snaps else None
+
+    def prune(self):
+        """Mantém o mais novo de cada hora/dia/semana dentro das janelas configuradas."""
+        keep = set()
+        buckets = (
+            (DB_BACKUP_KEEP_HOURLY, lambda d: d.strftime("%Y%m%d%H")),
+            (DB_BACKUP_KEEP_DAILY, lambda d: d.strftime("%Y%m%d")),
+            (DB_BACKUP_KEEP_WEEKLY, lambda d: "%d-%02d" % d.isocalendar()[:2]),
+        )
+        snaps = self.snapshots()
+        for limit, bucket in buckets:
+            seen = []
+            for when, path in snaps: # Do mais novo para o mais antigo
+                key = bucket(when)
+                if key in seen: continue
+                if len(seen) >= limit: break
+                seen.append(key)
+                keep.add(path)
+
+        removed = 0
+        for _, path in snaps:
+            if path in keep: continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                print(f"⚠️ [BACKUP] Não foi possível remover {path}: {e}")
+        return removed
+
+    def stats(self):
+        snaps = self.snapshots()
+        return {
+            "compression": self.compression,
+            "interval_min": self.interval // 60,
+            "snapshots": len(snaps),
+            "total_size": sum(os.path.getsize(p) for _, p in snaps),
+            "latest": os.path.basename(snaps[0][1]) if snaps else None,
+            "last_backup": self.last_backup
+        }
@@ -1,445 +1,702 @@
 import aiosqlite
+import asyncio
+import contextlib
+import itertools
 import os
+import time
+from database.query_stats import QueryStats, TimedCursor, DB_QUERY_STATS
+from database.migrations import load_schema_versions, run_migrations, add_columns, backfill_epoch
+from database.config_store import split_config
+from database.tiers import TIERS
 
 DB_NAME = "database/bot_data.db"
 
+# ====================================================
+# ⚙️ TUNING DO SQLITE (Configurável via .env)
+# ====================================================
+DB_READERS = int(os.getenv('DB_READERS', 4))                  # Conexões somente-leitura do pool
+DB_CACHE_SIZE = int(os.getenv('DB_CACHE_SIZE', -16000))       # Negativo = KiB (≈16MB por conexão)
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 268435456))      # 256MB de memory-map
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')        # NORMAL é seguro em WAL
+DB_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', 5000))     # ms
+
+# Comandos que podem ir para os leitores (o resto vai para o escritor)
+READ_PREFIXES = ("SELECT", "WITH", "PRAGMA TABLE_INFO", "EXPLAIN")
+
+# ====================================================
+# 🧬 MIGRAÇÕES DO CORE (Numeradas e Idempotentes)
+# ====================================================
+# Para mudar o schema: adicione uma nova função e uma nova entrada em CORE_MIGRATIONS.
+# Nunca edite uma migração que já foi publicada.
+
+async def _m001_base_tables(db):
+    # ====================================================
+    # 1. CRIAÇÃO DAS TABELAS
+    # ====================================================
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS config (
+            guild_id INTEGER PRIMARY KEY,
+            welcome_channel_id INTEGER, logs_channel_id INTEGER, sales_log_channel_id INTEGER,
+            welcome_banner TEXT, welcome_color INTEGER DEFAULT 0,
+            welcome_dm_active INTEGER DEFAULT 1,
+            wl_btn_label TEXT, wl_btn_url TEXT, wl_btn_emoji TEXT,
+            btn1_label TEXT, btn1_url TEXT, btn1_emoji TEXT,
+            btn2_label TEXT, btn2_url TEXT, btn2_emoji TEXT,
+            btn3_label TEXT, btn3_url TEXT, btn3_emoji TEXT,
+            status_channel_id INTEGER, status_message_id INTEGER, server_ip TEXT,
+            presence_interval INTEGER DEFAULT 60, presence_state TEXT DEFAULT 'online',
+            sugg_channel_id INTEGER, sugg_count INTEGER DEFAULT 0,
+            sugg_color INTEGER DEFAULT 0, sugg_up_emoji TEXT, sugg_down_emoji TEXT,
+            bug_public_channel_id INTEGER, bug_staff_channel_id INTEGER, bug_count INTEGER DEFAULT 0,
+            bug_emoji_public TEXT, bug_emoji_analyze TEXT, bug_emoji_fixed TEXT, bug_emoji_invalid TEXT,
+            ticket_panel_channel_id INTEGER,
+            ticket_category_id INTEGER,
+            ticket_logs_id INTEGER,
+            ticket_support_role_id INTEGER,
+            ticket_count INTEGER DEFAULT 0,
+            ticket_title TEXT, ticket_desc TEXT, ticket_banner TEXT, ticket_color INTEGER DEFAULT 0,
+            ticket_viewer_url TEXT,
+            tk_emoji_claim TEXT, tk_emoji_admin TEXT, tk_emoji_close TEXT, tk_emoji_cancel TEXT, tk_emoji_voice TEXT,
+            rating_channel_id INTEGER,
+            action_channel_id INTEGER,
+            action_logs_channel_id INTEGER,
+            action_role_id INTEGER,
+            action_emoji_join TEXT, action_emoji_leave TEXT,
+            action_emoji_win TEXT, action_emoji_loss TEXT,
+            action_emoji_notify TEXT, action_emoji_edit TEXT,
+            action_ranking_channel_id INTEGER,
+            verification_role_id INTEGER,
+            ticket_backup_webhook TEXT,
+            verification_emoji TEXT,
+            giveaway_color INTEGER DEFAULT 3447003,
+            giveaway_emoji TEXT DEFAULT '🎉',
+            sales_panel_color INTEGER DEFAULT 3066993,
+            sales_btn_emoji TEXT DEFAULT '💰',
+            sales_emoji_normal TEXT DEFAULT '💵',
+            sales_emoji_partnership TEXT DEFAULT '🤝'
+        )
+    """)
+    
+    await db.execute("CREATE TABLE IF NOT EXISTS ticket_categories (id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER, label TEXT, description TEXT, emoji TEXT, location_id INTEGER)")
+    await db.execute("CREATE TABLE IF NOT EXISTS active_tickets (channel_id INTEGER PRIMARY KEY, guild_id INTEGER, user_id INTEGER, opened_at TEXT, claimed_by INTEGER)")
+    await db.execute("CREATE TABLE IF NOT EXISTS staff_ratings (id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER, staff_id INTEGER, user_id INTEGER, stars INTEGER, comment TEXT, date TEXT)")
+    await db.execute("CREATE TABLE IF NOT EXISTS presence (id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER, activity_type TEXT, activity_text TEXT, activity_url TEXT)")
+    await db.execute("CREATE TABLE IF NOT EXISTS suggestion_votes (message_id INTEGER, user_id INTEGER, vote_type TEXT, guild_id INTEGER, PRIMARY KEY (message_id, user_id))")
+    
+    # Tabela de Ações da Facção
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS faction_actions (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER,
+            guild_id INTEGER,
+            responsible_id INTEGER,
+            action_name TEXT,
+            date_time TEXT,
+            slots INTEGER,
+            status TEXT, -- OPEN, FULL, WIN, LOSS
+            profit TEXT,
+            participants TEXT, -- JSON List
+            cancellations TEXT, -- JSON List
+            mvp_id INTEGER
+        )
+    """)
+    
+    await db.execute("CREATE TABLE IF NOT EXISTS action_mvp_votes (message_id INTEGER, voter_id INTEGER, target_id INTEGER, guild_id INTEGER, PRIMARY KEY (message_id, voter_id))")
+    
+    # Tabela de Pings Ativos (Auto-Update)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS active_pings (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER,
+            guild_id INTEGER,
+            user_id INTEGER
+        )
+    """)
+    
+    # Tabela de Streams Ativas (Fase 11)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS active_streams (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER,
+            guild_id INTEGER,
+            user_id INTEGER,
+            start_time TEXT,
+            platform TEXT DEFAULT 'twitch',
+            stream_url TEXT
+        )
+    """)
+    
+    # Tabela de Templates de Embed
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS embed_templates (
+            name TEXT,
+            data TEXT, -- JSON Dump
+            guild_id INTEGER,
+            PRIMARY KEY (name, guild_id)
+        )
+    """)
+
+    # ====================================================
+    # NOVO: Tabelas do Painel do Dono & Advanced Features
+    # ====================================================
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS licenses (
+            key TEXT PRIMARY KEY,
+            guild_id INTEGER,
+            client_name TEXT,
+            expiration_date TEXT,
+            status TEXT DEFAULT 'active',
+            max_users INTEGER DEFAULT 0,
+            tier TEXT DEFAULT 'start'
+        )
+    """)
+
+    # ====================================================
+    # FASE 12: Organization Management (Punishments & Timesheet)
+    # ====================================================
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS org_punishments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            staff_id INTEGER,
+            type TEXT, -- 'warn', 'feedback', 'ban'
+            reason TEXT, -- Hidden from user (Staff Only)
+            conclusion TEXT, -- Staff notes
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS time_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            start_time TEXT,
+            end_time TEXT,
+            total_seconds INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'OPEN' -- OPEN, PAUSED, CLOSED
+        )
+    """)
+    
+    # Tabela para Pausas (Para descontar do total)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS time_pauses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            start_time TEXT,
+            end_time TEXT,
+            FOREIGN KEY(session_id) REFERENCES time_sessions(id)
+        )
+    """)
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS timesheet_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            action TEXT,
+            timestamp TEXT,
+            session_id INTEGER,
+            details TEXT
+        )
+    """)
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            action TEXT,
+            target TEXT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS global_bans (
+            user_id INTEGER PRIMARY KEY,
+            reason TEXT,
+            proof_url TEXT,
+            added_by INTEGER,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # ====================================================
+    # FASE 13: Dynamic Tier Management
+    # ====================================================
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS tier_definitions (
+            tier_name TEXT,
+            module_name TEXT,
+            PRIMARY KEY (tier_name, module_name)
+        )
+    """)
+    
+
+async def _m002_legacy_columns(db):
+    # Consolida as migrações antigas (PRAGMA table_info + ALTER) de bancos já existentes
+    await add_columns(db, "config", [
+        ("ts_channel_operator", "INTEGER"),
+        ("ts_channel_management", "INTEGER"),
+        ("ts_channel_history", "INTEGER"),
+        ("ts_role_id", "INTEGER"),
+        ("tk_emoji_claim", "TEXT"),
+        ("tk_emoji_admin", "TEXT"),
+        ("tk_emoji_close", "TEXT"),
+        ("tk_emoji_cancel", "TEXT"),
+        ("tk_emoji_voice", "TEXT"),
+        ("ticket_viewer_url", "TEXT"),
+        ("rating_channel_id", "INTEGER"),
+        ("action_channel_id", "INTEGER"),
+        ("action_logs_channel_id", "INTEGER"),
+        ("action_role_id", "INTEGER"),
+        ("action_emoji_join", "TEXT"),
+        ("action_emoji_leave", "TEXT"),
+        ("action_emoji_win", "TEXT"),
+        ("action_emoji_loss", "TEXT"),
+        ("action_emoji_notify", "TEXT"),
+        ("action_emoji_edit", "TEXT"),
+        ("action_ranking_channel_id", "INTEGER"),
+        ("verification_role_id", "INTEGER"),
+        ("ticket_backup_webhook", "TEXT"),
+        ("verification_emoji", "TEXT"),
+        ("welcome_dm_active", "INTEGER DEFAULT 1"),
+        ("giveaway_color", "INTEGER DEFAULT 3447003"),
+        ("giveaway_emoji", "TEXT DEFAULT '🎉'"),
+        ("sales_panel_color", "INTEGER DEFAULT 3066993"),
+        ("sales_btn_emoji", "TEXT DEFAULT '💰'"),
+        ("sales_log_channel_id", "INTEGER"),
+        ("sales_emoji_normal", "TEXT DEFAULT '💵'"),
+        ("sales_emoji_partnership", "TEXT DEFAULT '🤝'"),
+        ("streaming_role_id", "INTEGER"),
+        ("ticket_panel_channel_id", "INTEGER"),
+        ("alignment_channel_id", "INTEGER"),
+        ("timesheet_channel_id", "INTEGER"),
+        ("timesheet_message_id", "INTEGER"),
+        ("punish_title", "TEXT DEFAULT '⚠️ Notificação Administrativa'"),
+        ("punish_desc", "TEXT DEFAULT 'Você recebeu um apontamento administrativo.'"),
+        ("punish_emoji_warn", "TEXT DEFAULT '🟧'"),
+        ("punish_emoji_feedback", "TEXT DEFAULT '🟨'"),
+        ("punish_emoji_ban", "TEXT DEFAULT '🟥'"),
+        ("punish_color", "INTEGER DEFAULT 16766720"),
+        ("punish_channel_id", "INTEGER"),
+    ])
+    await add_columns(db, "licenses", [("tier", "TEXT DEFAULT 'start'"), ("max_users", "INTEGER DEFAULT 0")])
+    await add_columns(db, "faction_actions", [("mvp_id", "INTEGER")])
+    await add_columns(db, "active_tickets", [("guild_id", "INTEGER")])
+    await add_columns(db, "staff_ratings", [("guild_id", "INTEGER")])
+    await add_columns(db, "suggestion_votes", [("guild_id", "INTEGER")])
+    await add_columns(db, "action_mvp_votes", [("guild_id", "INTEGER")])
+
+async def _m003_indexes(db):
+    # ====================================================
+    # 3. INDICES
+    # ====================================================
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_cat_guild ON ticket_categories(guild_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_ticket_guild ON active_tickets(guild_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_rating_guild_staff ON staff_ratings(guild_id, staff_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_sugg_guild ON suggestion_votes(guild_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_mvp_guild ON action_mvp_votes(guild_id)")
+
+# Padrões dos planos: manifesto versionado em database/tiers.py (merge por hash no boot)
+DEFAULT_TIERS = TIERS
+
+async def _m004_seed_tiers(db):
+    # Semeia só o banco novo (tabela vazia): planos editados pelo dono num banco antigo ficam como estão.
+    # Mudanças nos padrões depois disso: suba o manifesto (database/tiers.py).
+    async with db.execute("SELECT 1 FROM tier_definitions LIMIT 1") as cursor:
+        if await cursor.fetchone(): return
+    print("🌱 [DATABASE] Seeding Default Tiers...")
+    await db.executemany("INSERT OR IGNORE INTO tier_definitions (tier_name, module_name) VALUES (?, ?)",
+                         [(tier, module) for tier, modules in DEFAULT_TIERS.items() for module in modules])
+
+async def _m005_epoch_columns(db):
+    # Datas normalizadas em epoch (INTEGER). As colunas TEXT antigas continuam para exibição.
+    await add_columns(db, "active_tickets", [("opened_ts", "INTEGER")])
+    await add_columns(db, "staff_ratings", [("ts", "INTEGER")])
+    await add_columns(db, "time_sessions", [("start_ts", "INTEGER"), ("end_ts", "INTEGER")])
+    await add_columns(db, "active_streams", [("start_ts", "INTEGER")])
+    await add_columns(db, "org_punishments", [("ts", "INTEGER")])
+
+    await backfill_epoch(db, "active_tickets", "opened_at", "opened_ts")
+    await backfill_epoch(db, "staff_ratings", "date", "ts")
+    await backfill_epoch(db, "time_sessions", "start_time", "start_ts")
+    await backfill_epoch(db, "time_sessions", "end_time", "end_ts")
+    await backfill_epoch(db, "active_streams", "start_time", "start_ts")
+    await backfill_epoch(db, "org_punishments", "timestamp", "ts", local=False) # CURRENT_TIMESTAMP (UTC)
+
+    # Índices compostos para os filtros quentes (rankings por período viram range scan)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_rating_guild_ts ON staff_ratings(guild_id, ts)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_session_guild_user_status ON time_sessions(guild_id, user_id, status)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_stream_guild_user ON active_streams(guild_id, user_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_punish_guild_user_id ON org_punishments(guild_id, user_id, id)")
+
+async def _m006_archive_totals(db):
+    # Agregados do que foi para o arquivo frio (rankings somam isso ao que está na base quente)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS archive_totals (
+            guild_id INTEGER,
+            source TEXT, -- Tabela de origem (ex: staff_ratings)
+            subject_id INTEGER, -- Quem é ranqueado (ex: staff_id)
+            rows INTEGER DEFAULT 0,
+            total INTEGER DEFAULT 0, -- Soma da coluna de valor (ex: estrelas)
+            PRIMARY KEY (guild_id, source, subject_id)
+        )
+    """)
+
+async def _m007_counters(db):
+    # Sequências atômicas (UPSERT ... RETURNING). As colunas *_count da config ficam só como legado
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            guild_id INTEGER,
+            name TEXT, -- ticket, bug, suggestion
+            value INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, name)
+        ) WITHOUT ROWID
+    """)
+    for name, column in (("ticket", "ticket_count"), ("bug", "bug_count"), ("suggestion", "sugg_count")):
+        await db.execute(f"""
+            INSERT OR IGNORE INTO counters (guild_id, name, value)
+            SELECT guild_id, ?, {column} FROM config WHERE {column} > 0
+        """, (name,))
+
+async def _m008_split_config(db):
+    # config larga -> uma tabela por módulo (config_welcome, config_tickets...) + view `config` de compatibilidade.
+    # streaming_channel_id era usado pelo streaming mas nunca tinha sido criado
+    await add_columns(db, "config", [("streaming_channel_id", "INTEGER")])
+    await split_config(db)
+
+async def _m009_tier_manifest(db):
+    # Hash + pares do último manifesto de tiers aplicado (o merge do boot compara com isso)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS tier_manifest (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER,
+            hash TEXT,
+            pairs TEXT, -- JSON [[tier, módulo], ...]
+            applied_at TEXT
+        )
+    """)
+
+async def _m010_cluster(db):
+    # Modo cluster (launcher.py): cada processo publica seus shards; epoch avisa os outros para recarregar caches
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS cluster_shards (
+            shard_id INTEGER PRIMARY KEY,
+            cluster_id INTEGER,
+            pid INTEGER,
+            latency_ms REAL,
+            guilds INTEGER,
+            members INTEGER,
+            guild_ids TEXT, -- JSON [guild_id, ...] (purge de inativos enxerga o cluster inteiro)
+            updated_at REAL
+        )
+    """)
+    await db.execute("CREATE TABLE IF NOT EXISTS cluster_state (id INTEGER PRIMARY KEY CHECK (id = 1), epoch INTEGER DEFAULT 0)")
+    await db.execute("INSERT OR IGNORE INTO cluster_state (id, epoch) VALUES (1, 0)")
+
+CORE_MIGRATIONS = [
+    (1, "Tabelas base", _m001_base_tables),
+    (2, "Colunas legadas (config, licenses, guild_id)", _m002_legacy_columns),
+    (3, "Índices por guild", _m003_indexes),
+    (4, "Tiers padrão", _m004_seed_tiers),
+    (5, "Colunas epoch e índices compostos", _m005_epoch_columns),
+    (6, "Agregados do arquivo frio", _m006_archive_totals),
+    (7, "Sequências atômicas (counters)", _m007_counters),
+    (8, "Config dividida por módulo", _m008_split_config),
+    (9, "Manifesto de tiers", _m009_tier_manifest),
+    (10, "Shards do cluster", _m010_cluster),
+]
+
 async def create_db():
     if not os.path.exists('database'):
         os.makedirs('database')
 
     async with aiosqlite.connect(DB_NAME) as db:
-        # ====================================================
-        # 1. CRIAÇÃO DAS TABELAS
-        # ====================================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS config (
-                guild_id INTEGER PRIMARY KEY,
-                welcome_channel_id INTEGER, logs_channel_id INTEGER, sales_log_channel_id INTEGER,
-                welcome_banner TEXT, welcome_color INTEGER DEFAULT 0,
-                welcome_dm_active INTEGER DEFAULT 1,
-                wl_btn_label TEXT, wl_btn_url TEXT, wl_btn_emoji TEXT,
-                btn1_label TEXT, btn1_url TEXT, btn1_emoji TEXT,
-                btn2_label TEXT, btn2_url TEXT, btn2_emoji TEXT,
-                btn3_label TEXT, btn3_url TEXT, btn3_emoji TEXT,
-                status_channel_id INTEGER, status_message_id INTEGER, server_ip TEXT,
-                presence_interval INTEGER DEFAULT 60, presence_state TEXT DEFAULT 'online',
-                sugg_channel_id INTEGER, sugg_count INTEGER DEFAULT 0,
-                sugg_color INTEGER DEFAULT 0, sugg_up_emoji TEXT, sugg_down_emoji TEXT,
-                bug_public_channel_id INTEGER, bug_staff_channel_id INTEGER, bug_count INTEGER DEFAULT 0,
-                bug_emoji_public TEXT, bug_emoji_analyze TEXT, bug_emoji_fixed TEXT, bug_emoji_invalid TEXT,
-                ticket_panel_channel_id INTEGER,
-                ticket_category_id INTEGER,
-                ticket_logs_id INTEGER,
-                ticket_support_role_id INTEGER,
-                ticket_count INTEGER DEFAULT 0,
-                ticket_title TEXT, ticket_desc TEXT, ticket_banner TEXT, ticket_color INTEGER DEFAULT 0,
-                ticket_viewer_url TEXT,
-                tk_emoji_claim TEXT, tk_emoji_admin TEXT, tk_emoji_close TEXT, tk_emoji_cancel TEXT, tk_emoji_voice TEXT,
-                rating_channel_id INTEGER,
-                action_channel_id INTEGER,
-                action_logs_channel_id INTEGER,
-                action_role_id INTEGER,
-                action_emoji_join TEXT, action_emoji_leave TEXT,
-                action_emoji_win TEXT, action_emoji_loss TEXT,
-                action_emoji_notify TEXT, action_emoji_edit TEXT,
-                action_ranking_channel_id INTEGER,
-                action_ranking_channel_id INTEGER,
-                verification_role_id INTEGER,
-                ticket_backup_webhook TEXT,
-                verification_emoji TEXT,
-                giveaway_color INTEGER DEFAULT 3447003,
-                giveaway_emoji TEXT DEFAULT '🎉',
-                sales_panel_color INTEGER DEFAULT 3066993,
-                sales_btn_emoji TEXT DEFAULT '💰',
-                sales_emoji_normal TEXT DEFAULT '💵',
-                sales_emoji_partnership TEXT DEFAULT '🤝'
-            )
-        """)
-        
-        await db.execute("CREATE TABLE IF NOT EXISTS ticket_categories (id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER, label TEXT, description TEXT, emoji TEXT, location_id INTEGER)")
-        await db.execute("CREATE TABLE IF NOT EXISTS active_tickets (channel_id INTEGER PRIMARY KEY, guild_id INTEGER, user_id INTEGER, opened_at TEXT, claimed_by INTEGER)")
-        await db.execute("CREATE TABLE IF NOT EXISTS staff_ratings (id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER, staff_id INTEGER, user_id INTEGER, stars INTEGER, comment TEXT, date TEXT)")
-        await db.execute("CREATE TABLE IF NOT EXISTS presence (id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER, activity_type TEXT, activity_text TEXT, activity_url TEXT)")
-        await db.execute("CREATE TABLE IF NOT EXISTS suggestion_votes (message_id INTEGER, user_id INTEGER, vote_type TEXT, guild_id INTEGER, PRIMARY KEY (message_id, user_id))")
-        
-        # Tabela de Ações da Facção
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS faction_actions (
-                message_id INTEGER PRIMARY KEY,
-                channel_id INTEGER,
-                guild_id INTEGER,
-                responsible_id INTEGER,
-                action_name TEXT,
-                date_time TEXT,
-                slots INTEGER,
-                status TEXT, -- OPEN, FULL, WIN, LOSS
-                profit TEXT,
-                participants TEXT, -- JSON List
-                cancellations TEXT, -- JSON List
-                mvp_id INTEGER
-            )
-        """)
-        
-        await db.execute("CREATE TABLE IF NOT EXISTS action_mvp_votes (message_id INTEGER, voter_id INTEGER, target_id INTEGER, guild_id INTEGER, PRIMARY KEY (message_id, voter_id))")
-        
-        # Tabela de Pings Ativos (Auto-Update)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS active_pings (
-                message_id INTEGER PRIMARY KEY,
-                channel_id INTEGER,
-                guild_id INTEGER,
-                user_id INTEGER
-            )
-        """)
-        
-        # Tabela de Streams Ativas (Fase 11)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS active_streams (
-                message_id INTEGER PRIMARY KEY,
-                channel_id INTEGER,
-                guild_id INTEGER,
-                user_id INTEGER,
-                start_time TEXT,
-                platform TEXT DEFAULT 'twitch',
-                stream_url TEXT
-            )
-        """)
-        
-        # Tabela de Templates de Embed
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS embed_templates (
-                name TEXT,
-                data TEXT, -- JSON Dump
-                guild_id INTEGER,
-                PRIMARY KEY (name, guild_id)
-            )
-        """)
-
-        # ====================================================
-        # NOVO: Tabelas do Painel do Dono & Advanced Features
-        # ====================================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS licenses (
-                key TEXT PRIMARY KEY,
-                guild_id INTEGER,
-                client_name TEXT,
-                expiration_date TEXT,
-                status TEXT DEFAULT 'active',
-                max_users INTEGER DEFAULT 0,
-                tier TEXT DEFAULT 'start'
-            )
-        """)
-
-        # ====================================================
-        # FASE 12: Organization Management (Punishments & Timesheet)
-        # ====================================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS org_punishments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                user_id INTEGER,
-                staff_id INTEGER,
-                type TEXT, -- 'warn', 'feedback', 'ban'
-                reason TEXT, -- Hidden from user (Staff Only)
-                conclusion TEXT, -- Staff notes
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS time_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                user_id INTEGER,
-                start_time TEXT,
-                end_time TEXT,
-                total_seconds INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'OPEN' -- OPEN, PAUSED, CLOSED
-            )
-        """)
-        
-        # Tabela para Pausas (Para descontar do total)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS time_pauses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER,
-                start_time TEXT,
-                end_time TEXT,
-                FOREIGN KEY(session_id) REFERENCES time_sessions(id)
-            )
-        """)
-
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS timesheet_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                user_id INTEGER,
-                action TEXT,
-                timestamp TEXT,
-                session_id INTEGER,
-                details TEXT
-            )
-        """)
-
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT,
-                target TEXT,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS global_bans (
-                user_id INTEGER PRIMARY KEY,
-                reason TEXT,
-                proof_url TEXT,
-                added_by INTEGER,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # ====================================================
-        # FASE 13: Dynamic Tier Management
-        # ====================================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS tier_definitions (
-                tier_name TEXT,
-                module_name TEXT,
-                PRIMARY KEY (tier_name, module_name)
-            )
-        """)
-        
-        # ====================================================
-        # ATUALIZAÇÃO FORÇADA DE TIERS (Garanti que está sempre sync c/ código)
-        # ====================================================
-        print("🌱 [DATABASE] Seeding / Updating Default Tiers...")
-
-            
-        # Mapeamento oficial solicitado
-        # 'Sorteio' -> 'giveaway_system'
-        # 'Factionactions' -> 'faction_actions'
-        # 'Timessheet' -> 'timesheet'
-        defaults = {
-            'start': [
-                'admin', 'embed_creator', 'general', 'logs', 'tickets', 'webserver', 'welcome'
-            ],
-            'faction': [
-                'admin', 'embed_creator', 'faction_actions', 'general', 'hierarchy', 'logs', 
-                'punishments', 'sales', 'setagem', 'sorteio', 'streaming', 'suggestions', 
-                'tickets', 'timesheet', 'webserver', 'welcome'
-            ],
-            'police': [
-                'admin', 'embed_creator', 'faction_actions', 'general', 'hierarchy', 'logs', 
-                'punishments', 'setagem', 'sorteio', 'staff_stats', 'streaming', 
-                'suggestions', 'tickets', 'webserver', 'welcome'
-            ],
-            'v8': [
-                'admin', 'bugs', 'embed_creator', 'faction_actions', 'general', 'hierarchy', 
-                'logs', 'punishments', 'setagem', 'sorteio', 'staff_stats', 
-                'streaming', 'suggestions', 'tickets', 'verification', 'webserver', 'welcome'
-            ]
-        }
-        
-        # Limpa definições antigas desses tiers para garantir que fique igual ao solicitado
-        await db.execute("DELETE FROM tier_definitions WHERE tier_name IN ('start', 'faction', 'police', 'v8')")
-        
-        for tier, modules in defaults.items():
-            for module in modules:
-                await db.execute("INSERT INTO tier_definitions (tier_name, module_name) VALUES (?, ?)", (tier, module))
-        
-        # Migração Automática para Colunas Novas (Timesheet V2)
-        async with db.execute("PRAGMA table_info(config)") as cursor:
-            cols = [row[1] for row in await cursor.fetchall()]
-
-        new_cols = {
-            'ts_channel_operator': 'INTEGER',
-            'ts_channel_management': 'INTEGER',
-            'ts_channel_history': 'INTEGER',
-            'ts_role_id': 'INTEGER'
-        }
-
-        for col_name, col_type in new_cols.items():
-            if col_name not in cols:
-                print(f"⚠️ Migrando DB: Adicionando coluna '{col_name}' em config...")
-                await db.execute(f"ALTER TABLE config ADD COLUMN {col_name} {col_type}")
-            
-        await db.commit()
-
-        # ====================================================
-        # 2. MIGRAÇÃO SEGURA
-        # ====================================================
-        cols_config = [
-            ("tk_emoji_claim", "TEXT"), 
-            ("tk_emoji_admin", "TEXT"), 
-            ("tk_emoji_close", "TEXT"), 
-            ("tk_emoji_cancel", "TEXT"), 
-            ("tk_emoji_voice", "TEXT"),
-            ("ticket_viewer_url", "TEXT"),
-            ("rating_channel_id", "INTEGER"),
-            ("action_channel_id", "INTEGER"),
-            ("action_logs_channel_id", "INTEGER"),
-            ("action_role_id", "INTEGER"),
-            ("action_emoji_join", "TEXT"),
-            ("action_emoji_leave", "TEXT"),
-            ("action_emoji_win", "TEXT"),
-            ("action_emoji_loss", "TEXT"),
-            ("action_emoji_notify", "TEXT"),
-            ("action_emoji_edit", "TEXT"),
-            ("action_ranking_channel_id", "INTEGER"),
-            ("verification_role_id", "INTEGER"),
-            ("ticket_backup_webhook", "TEXT"),
-            ("ticket_backup_webhook", "TEXT"),
-            ("ticket_backup_webhook", "TEXT"),
-            ("verification_emoji", "TEXT"),
-            ("welcome_dm_active", "INTEGER DEFAULT 1"),
-            ("giveaway_color", "INTEGER DEFAULT 3447003"),
-            ("giveaway_emoji", "TEXT DEFAULT '🎉'"),
-            ("sales_panel_color", "INTEGER DEFAULT 3066993"),
-            ("sales_btn_emoji", "TEXT DEFAULT '💰'"),
-            ("sales_log_channel_id", "INTEGER"),
-            ("sales_emoji_normal", "TEXT DEFAULT '💵'"),
-            ("sales_emoji_partnership", "TEXT DEFAULT '🤝'"),
-            ("streaming_role_id", "INTEGER"),
-            ("ticket_panel_channel_id", "INTEGER"),
-            ("alignment_channel_id", "INTEGER"),
-            ("timesheet_channel_id", "INTEGER"),
-            ("timesheet_message_id", "INTEGER"),
-            ("punish_title", "TEXT DEFAULT '⚠️ Notificação Administrativa'"),
-            ("punish_desc", "TEXT DEFAULT 'Você recebeu um apontamento administrativo.'"),
-            ("punish_emoji_warn", "TEXT DEFAULT '🟧'"),
-            ("punish_emoji_feedback", "TEXT DEFAULT '🟨'"),
-            ("punish_emoji_ban", "TEXT DEFAULT '🟥'")
-        ]
-        
-        async with db.execute("PRAGMA table_info(config)") as cursor:
-            existing_config = [row[1] for row in await cursor.fetchall()]
-        
-        for c, t in cols_config:
-            if c not in existing_config:
-                try: 
-                    print(f"🔄 [DATABASE] Adicionando coluna: {c}")
-                    await db.execute(f"ALTER TABLE config ADD COLUMN {c} {t}")
-                except: pass
-                
-        # ====================================================
-        # MIGRAÇÕES (ALTER TABLE para bancos já existentes)
-        # ====================================================
+        # Só tem efeito em banco novo (vazio); os antigos são convertidos pelo MaintenanceService
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # 1 query quando o schema já está atualizado
+        await load_schema_versions(db)
+        await run_migrations(db, "core", CORE_MIGRATIONS)
+        print("✅ [DATABASE] Banco de dados verificado e atualizado.")
+
+
+
+# ====================================================
+# 🏊 POOL DE CONEXÕES (WAL + 1 Escritor + N Leitores)
+# ====================================================
+class _TrackedResult:
+    """
+    Envolve o Result do aiosqlite:
+    - mede o tempo da query (execute + fetch*) para o QueryStats;
+    - avisa os listeners DEPOIS que a escrita rodou.
+    """
+    def __init__(self, result, notify=None, sample=None, returns_cursor=True):
+        self.result = result
+        self.notify = notify
+        self.sample = sample
+        self.returns_cursor = returns_cursor
+        self.cursor = None
+
+    async def _run(self):
+        started = time.perf_counter()
         try:
-            # Verifica colunas da tabela licenses
-            async with db.execute("PRAGMA table_info(licenses)") as cursor:
-                columns = [row[1] for row in await cursor.fetchall()]
-
-            if 'tier' not in columns:
-                print("⚠️ [MIGRATION] Adicionando coluna 'tier' à tabela licenses...")
-                await db.execute("ALTER TABLE licenses ADD COLUMN tier TEXT DEFAULT 'start'")
-                print("✅ [MIGRATION] Coluna 'tier' adicionada com sucesso.")
-            
-            if 'max_users' not in columns:
-                print("⚠️ [MIGRATION] Adicionando coluna 'max_users' à tabela licenses...")
-                await db.execute("ALTER TABLE licenses ADD COLUMN max_users INTEGER DEFAULT 0")
-
-        except Exception as e:
-            print(f"❌ [MIGRATION ERROR] Falha ao verificar/migrar tabela licenses: {e}")
-            
-        # ====================================================
-        # MIGRAÇÃO FORÇADA DE PUNIÇÕES (FIX)
-        # ====================================================
+            cursor = await self.result
+        finally:
+            if self.sample: self.sample.add((time.perf_counter() - started) * 1000)
+        if self.notify: self.notify()
+        return TimedCursor(cursor, self.sample) if self.sample and self.returns_cursor else cursor
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def __aenter__(self):
+        self.cursor = await self._run()
+        return self.cursor
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.cursor.close()
+
+class _GatedResult:
+    """Usado durante a troca do arquivo (restore): espera o pool reabrir e então executa."""
+    def __init__(self, gate, factory):
+        self.gate = gate
+        self.factory = factory
+        self.inner = None
+
+    async def _run(self):
+        await self.gate.wait()
+        return await self.factory()
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def __aenter__(self):
+        await self.gate.wait()
+        self.inner = self.factory()
+        return await self.inner.__aenter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.inner.__aexit__(exc_type, exc, tb)
+
+class _LockedResult:
+    """Escritor reservado por outra task (lote da WriteQueue, manutenção): espera a vez e então executa."""
+    def __init__(self, pool, factory):
+        self.pool = pool
+        self.factory = factory
+        self.inner = None
+
+    async def _run(self):
+        async with self.pool.exclusive():
+            return await self.factory()
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def __aenter__(self):
+        async with self.pool.exclusive():
+            self.inner = self.factory()
+            return await self.inner.__aenter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.inner.__aexit__(exc_type, exc, tb)
+
+class DatabasePool:
+    """
+    Substituto do aiosqlite.Connection compartilhado (bot.db).
+    Leituras são distribuídas entre conexões somente-leitura (cada uma com sua thread),
+    escritas vão para uma única conexão escritora. Em WAL, leitores nunca bloqueiam o escritor.
+    Mantém a mesma API usada pelos cogs: execute / executemany / execute_fetchall / commit / close.
+    """
+    def __init__(self, path=DB_NAME, readers=DB_READERS, verbose=True):
+        self.path = path
+        self.reader_count = max(0, readers)
+        self.verbose = verbose # False nos arquivos por guild (abertos/fechados o tempo todo pelo LRU)
+        self.writer = None
+        self.readers = []
+        self._cycle = None
+        self.write_listeners = [] # Callbacks (sql, params, many) após cada escrita (ex: cache de config)
+        self.ready = asyncio.Event() # Limpo só durante a troca de arquivo (hot restore)
+        self.query_stats = QueryStats() if DB_QUERY_STATS else None # Latência por statement + slow log
+        self.write_lock = asyncio.Lock() # Escritor reservado (lote da WriteQueue): commit de outra task não pega escrita pela metade
+        self._lock_owner = None
+
+    async def _apply_pragmas(self, conn):
+        await conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT}")
+        await conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+        await conn.execute(f"PRAGMA cache_size = {DB_CACHE_SIZE}")
+        await conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+
+    async def open(self):
+        # 1. Escritor (define o WAL, que é persistente no arquivo)
+        self.writer = await aiosqlite.connect(self.path)
+        await self.writer.execute("PRAGMA journal_mode = WAL")
+        await self.writer.execute("PRAGMA foreign_keys = ON")
+        await self._apply_pragmas(self.writer)
+
+        # 2. Leitores (somente-leitura via URI)
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+        for _ in range(self.reader_count):
+            try:
+                conn = await aiosqlite.connect(uri, uri=True)
+                await self._apply_pragmas(conn)
+                self.readers.append(conn)
+            except Exception as e:
+                print(f"⚠️ [DATABASE] Falha ao abrir leitor do pool: {e}")
+                break
+
+        self._cycle = itertools.cycle(self.readers) if self.readers else None
+        self.ready.set()
+        if self.verbose: print(f"🏊 [DATABASE] Pool pronto: 1 escritor + {len(self.readers)} leitores (WAL).")
+        return self
+
+    async def swap_file(self, new_path, keep_old_as):
+        """
+        Troca o arquivo do banco por outro sem recriar o pool (bot.db continua o mesmo objeto).
+        Chamadas feitas durante a troca ficam aguardando e rodam no arquivo novo.
+        """
+        self.ready.clear()
         try:
-            async with db.execute("PRAGMA table_info(config)") as cursor:
-                cols_check = [row[1] for row in await cursor.fetchall()]
-
-            if "punish_title" not in cols_check:
-                print("⚠️ [FIX] Forçando criação de colunas de Punição...")
-                try: await db.execute("ALTER TABLE config ADD COLUMN punish_title TEXT DEFAULT '⚠️ Notificação Administrativa'")
-                except: pass
-                try: await db.execute("ALTER TABLE config ADD COLUMN punish_desc TEXT DEFAULT 'Você recebeu um apontamento administrativo.'") 
-                except: pass
-                try: await db.execute("ALTER TABLE config ADD COLUMN punish_emoji_warn TEXT DEFAULT '🟧'")
-                except: pass
-                try: await db.execute("ALTER TABLE config ADD COLUMN punish_emoji_feedback TEXT DEFAULT '🟨'")
-                except: pass
-                try: await db.execute("ALTER TABLE config ADD COLUMN punish_emoji_ban TEXT DEFAULT '🟥'")
-                except: pass
-            
-            if "punish_color" not in cols_check:
-                print("⚠️ [FIX] Adicionando coluna punish_color...")
-                try: await db.execute("ALTER TABLE config ADD COLUMN punish_color INTEGER DEFAULT 16766720")
-                except: pass
-
-            if "punish_channel_id" not in cols_check:
-                print("⚠️ [FIX] Adicionando coluna punish_channel_id...")
-                try: await db.execute("ALTER TABLE config ADD COLUMN punish_channel_id INTEGER")
-                except: pass
-
-        except Exception as e:
-            print(f"❌ [FIX ERROR] Erro na migração de punições: {e}")
-            
-        await db.commit()
-        print("✅ [DATABASE] Banco de dados verificado e atualizado.")
-                
-        # Migração para faction_actions (MVP)
-        async with db.execute("PRAGMA table_info(faction_actions)") as cursor:
-            existing_actions = [row[1] for row in await cursor.fetchall()]
-        if "mvp_id" not in existing_actions:
-            try: await db.execute("ALTER TABLE faction_actions ADD COLUMN mvp_id INTEGER")
-            except: pass
+            await self.writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            await self.close()
 
-        # Migração para Giveaways (Title/Desc)
-        async with db.execute("PRAGMA table_info(giveaways)") as cursor:
-            existing_gw = [row[1] for row in await cursor.fetchall()]
-        
-        if "title" not in existing_gw:
-            try: await db.execute("ALTER TABLE giveaways ADD COLUMN title TEXT")
-            except: pass
-        if "description" not in existing_gw:
-            try: await db.execute("ALTER TABLE giveaways ADD COLUMN description TEXT")
-            except: pass
+            os.replace(self.path, keep_old_as)
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(self.path + suffix): os.remove(self.path + suffix)
+            os.replace(new_path, self.path)
 
-        # Migrações extras
-        async with db.execute("PRAGMA table_info(active_tickets)") as cursor:
-            existing_tickets = [row[1] for row in await cursor.fetchall()]
-        if "guild_id" not in existing_tickets:
-            try: await db.execute("ALTER TABLE active_tickets ADD COLUMN guild_id INTEGER")
-            except: pass
+            try:
+                await self.open()
+            except Exception:
+                # Volta para o arquivo antigo se o novo não abrir
+                await self.close()
+                os.replace(self.path, new_path)
+                os.replace(keep_old_as, self.path)
+                await self.open()
+                raise
+        finally:
+            self.ready.set()
 
-        async with db.execute("PRAGMA table_info(staff_ratings)") as cursor:
-            existing_ratings = [row[1] for row in await cursor.fetchall()]
-        if "guild_id" not in existing_ratings:
-            try: await db.execute("ALTER TABLE staff_ratings ADD COLUMN guild_id INTEGER")
-            except: pass
+    def _route(self, sql):
+        """Escolhe a conexão: leitor para SELECT, escritor para o resto."""
+        if not self._cycle: return self.writer
+        # Transação aberta no escritor? Lê dele para enxergar o que ainda não foi commitado.
+        if self.writer.in_transaction: return self.writer
+        if sql.lstrip().upper().startswith(READ_PREFIXES) and "RETURNING" not in sql.upper():
+            return next(self._cycle)
+        return self.writer
 
-        async with db.execute("PRAGMA table_info(suggestion_votes)") as cursor:
-            existing_votes = [row[1] for row in await cursor.fetchall()]
-        if "guild_id" not in existing_votes:
-            try: await db.execute("ALTER TABLE suggestion_votes ADD COLUMN guild_id INTEGER")
-            except: pass
+    # ====================================================
+    # 🔒 ESCRITOR EXCLUSIVO (Lote da WriteQueue / Manutenção)
+    # ====================================================
+    @contextlib.asynccontextmanager
+    async def exclusive(self):
+        """
+        Reserva o escritor para a task atual. Enquanto isso, escritas/commits diretos das outras
+        tasks (cogs) esperam: um bot.db.commit() não commita um grupo da fila pela metade.
+        Re-entrante na mesma task (o fn(db) do lote usa o pool normalmente).
+        """
+        if self._owns_writer():
+            yield self
+            return
+        async with self.write_lock:
+            self._lock_owner = asyncio.current_task()
+            try: yield self
+            finally: self._lock_owner = None
 
-        async with db.execute("PRAGMA table_info(action_mvp_votes)") as cursor:
-            existing_mvp_votes = [row[1] for row in await cursor.fetchall()]
-        if "guild_id" not in existing_mvp_votes:
-            try: await db.execute("ALTER TABLE action_mvp_votes ADD COLUMN guild_id INTEGER")
-            except: pass
+    def _owns_writer(self):
+        return self._lock_owner is not None and self._lock_owner is asyncio.current_task()
+
+    def _writer_busy(self):
+        return self.write_lock.locked() and not self._owns_writer()
+
+    def _notify_write(self, sql, parameters, many=False):
+        for listener in self.write_listeners:
+            try: listener(sql, parameters, many)
+            except Exception as e: print(f"⚠️ [DATABASE] Listener de escrita falhou: {e}")
+
+    # --- API compatível com aiosqlite ---
+    def execute(self, sql, parameters=None):
+        # Retorna o Result do aiosqlite (funciona com await e com async with)
+        if not self.ready.is_set(): return _GatedResult(self.ready, lambda: self.execute(sql, parameters))
+        conn = self._route(sql)
+        if conn is self.writer and self._writer_busy(): return _LockedResult(self, lambda: self.execute(sql, parameters))
+        notify = (lambda: self._notify_write(sql, parameters)) if conn is self.writer and self.write_listeners else None
+        sample = self.query_stats.start(sql) if self.query_stats else None
+        if notify or sample:
+            return _TrackedResult(conn.execute(sql, parameters), notify, sample)
+        return conn.execute(sql, parameters)
+
+    def execute_fetchall(self, sql, parameters=None):
+        if not self.ready.is_set(): return _GatedResult(self.ready, lambda: self.execute_fetchall(sql, parameters))
+        conn = self._route(sql)
+        if conn is self.writer and self._writer_busy(): return _LockedResult(self, lambda: self.execute_fetchall(sql, parameters))
+        result = conn.execute_fetchall(sql, parameters)
+        if self.query_stats: return _TrackedResult(result, sample=self.query_stats.start(sql), returns_cursor=False)
+        return result
 
-        # ====================================================
-        # 3. INDICES
-        # ====================================================
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_cat_guild ON ticket_categories(guild_id)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_ticket_guild ON active_tickets(guild_id)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_rating_guild_staff ON staff_ratings(guild_id, staff_id)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_sugg_guild ON suggestion_votes(guild_id)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_mvp_guild ON action_mvp_votes(guild_id)")
+    def executemany(self, sql, parameters):
+        parameters = list(parameters)
+        if not self.ready.is_set(): return _GatedResult(self.ready, lambda: self.executemany(sql, parameters))
+        if self._writer_busy(): return _LockedResult(self, lambda: self.executemany(sql, parameters))
+        notify = (lambda: self._notify_write(sql, parameters, many=True)) if self.write_listeners else None
+        sample = self.query_stats.start(sql) if self.query_stats else None
+        if notify or sample:
+            return _TrackedResult(self.writer.executemany(sql, parameters), notify, sample)
+        return self.writer.executemany(sql, parameters)
 
-        await db.commit()
+    def executescript(self, sql_script):
+        if not self.ready.is_set(): return _GatedResult(self.ready, lambda: self.executescript(sql_script))
+        if self._writer_busy(): return _LockedResult(self, lambda: self.executescript(sql_script))
+        return self.writer.executescript(sql_script)
+
+    async def commit(self):
+        await self.ready.wait()
+        async with self.exclusive():
+            await self.writer.commit()
+
+    async def rollback(self):
+        await self.ready.wait()
+        async with self.exclusive():
+            await self.writer.rollback()
+
+    @property
+    def total_changes(self):
+        return self.writer.total_changes
+
+    @property
+    def in_transaction(self):
+        return self.writer.in_transaction
+
+    async def close(self):
+        for conn in self.readers:
+            try: await conn.close()
+            except: pass
+        self.readers = []
+        self._cycle = None
+        if self.writer:
+            await self.writer.close()
+            self.writer = None
+
+    def __getattr__(self, name):
+        # Qualquer outro atributo (row_factory, etc.) cai no escritor
+        writer = self.__dict__.get('writer')
+        if writer is None: raise AttributeError(name)
+        return getattr(writer, name)
 
 async def get_db_connection():
-    db = await aiosqlite.connect(DB_NAME)
-    await db.execute("PRAGMA foreign_keys = ON") 
-    return db
-
-# A FUNÇÃO QUE FALTAVA ESTÁ AQUI EMBAIXO 👇
-async def check_guild_config(guild_id, db_connection):
-    await db_connection.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", (guild_id,))
-    await db_connection.commit()
\ No newline at end of file
+    pool = DatabasePool(DB_NAME, DB_READERS)
+    return await pool.open()
+
+async def bootstrap_guild_configs(guild_ids, db_connection, write_queue):
+    """
+    Garante a linha de config de cada guild (on_ready / on_guild_join):
+    1 leitura das chaves existentes + 1 executemany só com as guilds que faltam (1 commit).
+    Retorna a lista de guilds criadas.
+    """
+    existing = {row[0] for row in await db_connection.execute_fetchall("SELECT guild_id FROM config")}
+    missing = [guild_id for guild_id in dict.fromkeys(guild_ids) if guild_id not in existing]
+    if missing:
+        await write_queue.executemany("INSERT OR IGNORE INTO config (guild_id) VALUES (?)", [(g,) for g in missing])
+    return missing
\ No newline at end of file
@@ -0,0 +1,187 @@
+import contextlib
+
+# ====================================================
+# 🗂️ CONFIG POR MÓDULO (config_<modulo> + view de compatibilidade)
+# ====================================================
+# A antiga tabela larga `config` foi dividida em uma tabela pequena por módulo
+# (config_welcome, config_tickets, config_actions...), todas com guild_id como PK.
+# `config` continua existindo como VIEW (join pela PK) com triggers INSTEAD OF:
+# SELECT/UPDATE/INSERT/DELETE antigos dos cogs seguem funcionando sem mudança.
+# Caminhos quentes (painéis) leem só a linha do próprio módulo com module_config().
+# config_general é a âncora: uma linha por guild, mesmo sem colunas próprias.
+
+GENERAL = "general"
+
+# Coluna -> módulo pelo prefixo (nomes completos também valem como prefixo). O que sobrar vai para config_general.
+CONFIG_MODULES = {
+    "welcome": ("welcome_", "wl_btn_", "btn1_", "btn2_", "btn3_", "logs_channel_id"),
+    "presence": ("presence_", "status_channel_id", "status_message_id", "server_ip"),
+    "suggestions": ("sugg_",),
+    "bugs": ("bug_",),
+    "tickets": ("ticket_", "tk_", "rating_channel_id"),
+    "actions": ("action_",),
+    "verification": ("verification_",),
+    "giveaway": ("giveaway_",),
+    "sales": ("sales_",),
+    "timesheet": ("ts_", "timesheet_"),
+    "punishments": ("punish_", "alignment_channel_id"),
+    "streaming": ("streaming_",),
+    "logs": ("log_",),
+}
+
+def config_module(column):
+    for module, prefixes in CONFIG_MODULES.items():
+        if column.startswith(prefixes): return module
+    return GENERAL
+
+def module_table(module):
+    return f"config_{module}"
+
+# ====================================================
+# 🔍 SCHEMA
+# ====================================================
+async def _fetchall(db, sql, parameters=()):
+    async with db.execute(sql, parameters) as cursor:
+        return await cursor.fetchall()
+
+async def is_config_view(db):
+    return bool(await _fetchall(db, "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'config'"))
+
+async def module_tables(db):
+    """{módulo: [(coluna, tipo, default_sql)]} das tabelas config_* existentes (sem guild_id)."""
+    names = [row[0] for row in await _fetchall(
+        db, "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'config\\_%' ESCAPE '\\'")]
+    tables = {}
+    for name in names:
+        cols = await _fetchall(db, f"PRAGMA table_info({name})")
+        tables[name[len("config_"):]] = [(c[1], c[2], c[4]) for c in cols if c[1] != "guild_id"]
+    return tables
+
+def _column_sql(name, col_type, default):
+    return f"{name} {col_type}" + (f" DEFAULT {default}" if default is not None else "")
+
+# ====================================================
+# 🪟 VIEW + TRIGGERS (Compatibilidade com os cogs)
+# ====================================================
+@contextlib.asynccontextmanager
+async def _view_transaction(db):
+    # DatabasePool: escritor reservado (lotes da WriteQueue não commitam a troca pela metade)
+    exclusive = getattr(db, "exclusive", None)
+    async with (exclusive() if exclusive else contextlib.nullcontext()):
+        nested = db.in_transaction # Chamado dentro de outra transação (ex: migração): SAVEPOINT
+        await db.execute("SAVEPOINT config_view" if nested else "BEGIN")
+        try:
+            yield
+        except BaseException:
+            if nested:
+                await db.execute("ROLLBACK TO config_view")
+                await db.execute("RELEASE config_view")
+            else:
+                await db.rollback()
+            raise
+        if nested: await db.execute("RELEASE config_view")
+        else: await db.commit()
+
+async def build_config_view(db, order=None):
+    """
+    (Re)cria a view `config` e os triggers a partir das tabelas config_*.
+    order: ordem das colunas na view (padrão: a da view atual, colunas novas no fim).
+    """
+    tables = await module_tables(db)
+    if order is None and await is_config_view(db):
+        order = [row[1] for row in await _fetchall(db, "PRAGMA table_info(config)")]
+    owner = {col: module for module, cols in tables.items() for col, _, _ in cols}
+    order = [c for c in (order or []) if c in owner]
+    order += [col for module, cols in tables.items() for col, _, _ in cols if col not in order]
+
+    # DROP + CREATE numa transação só: nenhuma escrita vê a view sem os triggers (ou sem a view)
+    async with _view_transaction(db):
+        for (trigger,) in await _fetchall(db, "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'config'"):
+            await db.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        await db.execute("DROP VIEW IF EXISTS config")
+
+        # LEFT JOIN pela PK a partir da âncora: 1 busca por tabela por guild
+        joins = "".join(f" LEFT JOIN {module_table(m)} USING (guild_id)" for m in tables if m != GENERAL)
+        select = ", ".join(["guild_id"] + [f"{module_table(owner[c])}.{c}" for c in order])
+        await db.execute(f"CREATE VIEW config AS SELECT {select} FROM {module_table(GENERAL)}{joins}")
+
+        # INSERT: uma linha por módulo. O conflito herda o da instrução externa
+        # (INSERT OR IGNORE ignora, OR REPLACE recria, INSERT simples falha), como na tabela larga.
+        inserts = []
+        for module, cols in tables.items():
+            names = ", ".join(["guild_id"] + [c for c, _, _ in cols])
+            values = ", ".join(["NEW.guild_id"] + [
+                f"COALESCE(NEW.{c}, {default})" if default is not None else f"NEW.{c}" for c, _, default in cols])
+            inserts.append(f"INSERT INTO {module_table(module)} ({names}) VALUES ({values});")
+        await db.execute(f"CREATE TRIGGER config_insert INSTEAD OF INSERT ON config BEGIN {' '.join(inserts)} END")
+
+        # UPDATE: um trigger por módulo, disparado só quando o SET toca colunas dele
+        for module, cols in tables.items():
+            if not cols: continue
+            names = ", ".join(c for c, _, _ in cols)
+            sets = ", ".join(f"{c} = NEW.{c}" for c, _, _ in cols)
+            table = module_table(module)
+            await db.execute(f"""
+                CREATE TRIGGER config_update_{module} INSTEAD OF UPDATE OF {names} ON config BEGIN
+                    INSERT OR IGNORE INTO {table} (guild_id) VALUES (OLD.guild_id);
+                    UPDATE {table} SET {sets} WHERE guild_id = OLD.guild_id;
+                END
+            """)
+
+        deletes = " ".join(f"DELETE FROM {module_table(m)} WHERE guild_id = OLD.guild_id;" for m in tables)
+        await db.execute(f"CREATE TRIGGER config_delete INSTEAD OF DELETE ON config BEGIN {deletes} END")
+
+async def add_config_columns(db, columns):
+    """add_columns() para a view: cada coluna vai para a tabela do seu módulo e a view é refeita."""
+    tables = await module_tables(db)
+    existing = {c for cols in tables.values() for c, _, _ in cols}
+    added = False
+
+    for col_name, col_type in columns:
+        if col_name in existing: continue
+        module = config_module(col_name)
+        table = module_table(module)
+        if module not in tables:
+            await db.execute(f"CREATE TABLE IF NOT EXISTS {table} (guild_id INTEGER PRIMARY KEY)")
+            await db.execute(f"INSERT OR IGNORE INTO {table} (guild_id) SELECT guild_id FROM {module_table(GENERAL)}")
+            tables[module] = []
+        print(f"   ├─ ➕ {table}.{col_name}")
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+        existing.add(col_name)
+        added = True
+
+    if added: await build_config_view(db)
+
+# ====================================================
+# 🔀 MIGRAÇÃO (Tabela larga -> config_<modulo>)
+# ====================================================
+async def split_config(db):
+    if await is_config_view(db): return
+    cols = await _fetchall(db, "PRAGMA table_info(config)")
+    order = [c[1] for c in cols if c[1] != "guild_id"]
+
+    modules = {}
+    for _, name, col_type, _, default, _ in cols:
+        if name == "guild_id": continue
+        modules.setdefault(config_module(name), []).append((name, col_type, default))
+    modules.setdefault(GENERAL, [])
+
+    for module, module_cols in modules.items():
+        table = module_table(module)
+        definition = ", ".join(["guild_id INTEGER PRIMARY KEY"] + [_column_sql(*c) for c in module_cols])
+        await db.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+        names = ", ".join(["guild_id"] + [c[0] for c in module_cols])
+        await db.execute(f"INSERT OR IGNORE INTO {table} ({names}) SELECT {names} FROM config")
+        print(f"   ├─ 🗂️ {table}: {len(module_cols)} colunas")
+
+    await db.execute("DROP TABLE config")
+    await build_config_view(db, order)
+
+# ====================================================
+# 📖 LEITURA POR MÓDULO (Painéis)
+# ====================================================
+async def module_config(db, guild_id, module):
+    """Linha do módulo como dict ({} se a guild não tiver config). Lê só config_<modulo>."""
+    async with db.execute(f"SELECT * FROM {module_table(module)} WHERE guild_id = ?", (guild_id,)) as cursor:
+        row = await cursor.fetchone()
+        return dict(zip([d[0] for d in cursor.description], row)) if row else {}
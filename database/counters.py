@@ -0,0 +1,31 @@
+# ====================================================
+# 🔢 SEQUÊNCIAS POR GUILD (Tickets, Bugs, Sugestões...)
+# ====================================================
+# Um único UPSERT ... RETURNING na fila de escrita: o escritor serializa os
+# incrementos, então dois cliques simultâneos nunca recebem o mesmo número.
+
+NEXT_VALUE = """
+    INSERT INTO counters (guild_id, name, value) VALUES (?, ?, 1)
+    ON CONFLICT(guild_id, name) DO UPDATE SET value = value + 1
+    RETURNING value
+"""
+
+class CounterService:
+    def __init__(self, db, write_queue):
+        self.db = db
+        self.write_queue = write_queue
+
+    async def next(self, guild_id, name):
+        """Reserva e retorna o próximo número da sequência (1, 2, 3...). Já commitado ao retornar."""
+        async def increment(db):
+            cursor = await db.execute(NEXT_VALUE, (guild_id, name))
+            row = await cursor.fetchone()
+            await cursor.close()
+            return row[0]
+        return await self.write_queue.run(increment)
+
+    async def peek(self, guild_id, name):
+        """Último número entregue (0 se a sequência ainda não foi usada). Só para exibição."""
+        async with self.db.execute("SELECT value FROM counters WHERE guild_id = ? AND name = ?", (guild_id, name)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
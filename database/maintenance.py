@@ -0,0 +1,232 @@
+import asyncio
+import contextlib
+import datetime
+import os
+import time
+
+# ====================================================
+# ⚙️ CONFIGURAÇÃO DA MANUTENÇÃO (Configurável via .env)
+# ====================================================
+DB_MAINT_INTERVAL_MIN = int(os.getenv('DB_MAINT_INTERVAL_MIN', 30))     # Intervalo entre rodadas
+DB_MAINT_QUIET_HOURS = os.getenv('DB_MAINT_QUIET_HOURS', '4-7')         # Janela (hora local) para vacuum/truncate
+DB_ANALYSIS_LIMIT = int(os.getenv('DB_ANALYSIS_LIMIT', 1000))           # Linhas amostradas por índice no ANALYZE
+DB_VACUUM_STEP_PAGES = int(os.getenv('DB_VACUUM_STEP_PAGES', 256))      # Páginas devolvidas por passo
+DB_VACUUM_MAX_STEPS = int(os.getenv('DB_VACUUM_MAX_STEPS', 40))         # Passos por rodada
+DB_VACUUM_STEP_SLEEP_MS = int(os.getenv('DB_VACUUM_STEP_SLEEP_MS', 50)) # Respiro entre passos (fila volta a andar)
+DB_MAINT_CONVERT = os.getenv('DB_MAINT_CONVERT', '1') == '1'            # Converte bancos antigos para auto_vacuum incremental
+DB_MAINT_IDLE_TIMEOUT = float(os.getenv('DB_MAINT_IDLE_TIMEOUT', 10))   # Segundos esperando a transação aberta de um cog terminar
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+def _quiet_hours(spec=DB_MAINT_QUIET_HOURS):
+    try:
+        start, end = (int(h) for h in spec.split('-'))
+    except ValueError:
+        return lambda hour: False
+    if start <= end: return lambda hour: start <= hour < end
+    return lambda hour: hour >= start or hour < end # Ex: 23-5 (passa da meia-noite)
+
+# ====================================================
+# 🧰 SERVIÇO DE MANUTENÇÃO (ANALYZE, Vacuum Incremental, Checkpoint)
+# ====================================================
+class MaintenanceService:
+    """
+    Rodada periódica de manutenção do SQLite:
+    - PRAGMA optimize (ANALYZE limitado por analysis_limit) para o planner ter estatísticas.
+    - Checkpoint PASSIVE do WAL a cada rodada; TRUNCATE na janela de madrugada.
+    - Vacuum incremental em passos pequenos na janela de madrugada (páginas livres voltam ao disco).
+    - Estatísticas por tabela (páginas via dbstat, linhas estimadas via sqlite_stat1) para o painel.
+    Comandos no escritor rodam com a WriteQueue pausada por poucos ms (as escritas esperam na fila).
+    Modo cluster (multi_process): VACUUM e vacuum incremental ficam desligados; os outros processos
+    escrevem no mesmo arquivo sem passar por esta fila.
+    """
+    def __init__(self, db, write_queue, backup_lock=None, archive=None, interval_min=DB_MAINT_INTERVAL_MIN, multi_process=False):
+        self.db = db
+        self.write_queue = write_queue
+        self.backup_lock = backup_lock or asyncio.Lock()
+        self.archive = archive # ArchiveService (retenção roda antes do vacuum)
+        self.multi_process = multi_process
+        self.interval = max(1, interval_min) * 60
+        self.is_quiet = _quiet_hours()
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.last_run = None    # Resumo da última rodada
+        self.table_stats = {}   # tabela -> {"pages", "bytes", "rows"}
+        self.stats_at = None
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._loop())
+        return self
+
+    async def close(self):
+        if not self.task: return
+        self.task.cancel()
+        try: await self.task
+        except asyncio.CancelledError: pass
+        self.task = None
+
+    async def _loop(self):
+        await asyncio.sleep(60) # Deixa o boot (on_ready, caches) terminar primeiro
+        while True:
+            try:
+                await self.run(quiet=self.is_quiet(datetime.datetime.now().hour))
+            except Exception as e:
+                print(f"❌ [MAINTENANCE] Falha na rodada: {e}")
+            await asyncio.sleep(self.interval)
+
+    @contextlib.asynccontextmanager
+    async def _exclusive(self):
+        """
+        Escritor livre: sem lote em andamento e sem transação aberta.
+        Transação aberta por um cog (execute sem commit ainda) não é commitada aqui: espera o dono terminar.
+        """
+        await self.write_queue.pause()
+        try:
+            reserved = await self._idle_writer()
+            try:
+                yield self.db.writer
+            finally:
+                await reserved.__aexit__(None, None, None)
+        finally:
+            self.write_queue.resume()
+
+    async def _idle_writer(self):
+        # Reserva o escritor (DatabasePool.exclusive) só num momento sem transação aberta;
+        # entre as tentativas ele é liberado para o cog conseguir commitar.
+        deadline = time.monotonic() + DB_MAINT_IDLE_TIMEOUT
+        while True:
+            reserved = self.db.exclusive()
+            await reserved.__aenter__()
+            if not self.db.writer.in_transaction: return reserved
+            await reserved.__aexit__(None, None, None)
+            if time.monotonic() >= deadline: raise TimeoutError("escritor com transação aberta por muito tempo")
+            await asyncio.sleep(0.05)
+
+    async def _value(self, sql):
+        return (await self.db.execute_fetchall(sql))[0][0]
+
+    async def _pragma(self, sql):
+        async with self._exclusive() as writer:
+            rows = await writer.execute_fetchall(sql)
+            # Escritor reservado: a transação aberta (se houver) é só deste PRAGMA
+            if writer.in_transaction: await writer.commit()
+            return rows
+
+    # ====================================================
+    # 🔁 RODADA
+    # ====================================================
+    async def run(self, quiet=False):
+        async with self.lock:
+            started = time.perf_counter()
+            summary = {"at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "quiet": quiet}
+
+            summary["auto_vacuum"] = await self._ensure_incremental(quiet)
+            if quiet and self.archive:
+                summary["archived"] = sum((await self.archive.run()).values())
+            summary["analyze"] = await self.optimize()
+            if quiet and not self.multi_process:
+                summary["vacuumed_pages"] = await self.incremental_vacuum()
+            summary["checkpoint"] = await self.checkpoint("TRUNCATE" if quiet else "PASSIVE")
+            await self.refresh_stats()
+
+            summary["seconds"] = round(time.perf_counter() - started, 2)
+            self.last_run = summary
+            print(f"🧰 [MAINTENANCE] Rodada concluída em {summary['seconds']}s "
+                  f"({summary['analyze']}, vacuum: {summary.get('vacuumed_pages', '-')} páginas, WAL: {summary['checkpoint']}).")
+            return summary
+
+    async def optimize(self):
+        # Banco nunca analisado: ANALYZE completo (limitado). Depois, só o que o SQLite achar necessário
+        has_stats = await self.db.execute_fetchall("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        await self.db.writer.execute(f"PRAGMA analysis_limit = {DB_ANALYSIS_LIMIT}")
+        if has_stats:
+            await self._pragma("PRAGMA optimize")
+            return "optimize"
+        await self._pragma("ANALYZE")
+        return "analyze"
+
+    async def incremental_vacuum(self):
+        """Devolve páginas livres em passos curtos; a fila de escrita volta a andar entre um passo e outro."""
+        if self.multi_process: return 0
+        if await self._value("PRAGMA auto_vacuum") != 2: return 0
+
+        freed = 0
+        for _ in range(max(1, DB_VACUUM_MAX_STEPS)):
+            free = await self._value("PRAGMA freelist_count")
+            if not free: break
+            step = min(free, DB_VACUUM_STEP_PAGES)
+            async with self._exclusive() as writer:
+                # execute() dá um único passo (1 página); executescript roda o PRAGMA até o fim
+                await writer.executescript(f"PRAGMA incremental_vacuum({step});")
+            freed += step
+            await asyncio.sleep(DB_VACUUM_STEP_SLEEP_MS / 1000)
+        return freed
+
+    async def checkpoint(self, mode="PASSIVE"):
+        busy, log, done = (await self._pragma(f"PRAGMA wal_checkpoint({mode})"))[0]
+        return f"{mode.lower()} {done}/{log}" + (" (ocupado)" if busy else "")
+
+    async def _ensure_incremental(self, quiet):
+        """
+        auto_vacuum só muda com um VACUUM completo. Bancos novos já nascem incrementais (create_db);
+        os antigos são convertidos uma vez, na janela de madrugada, com o backup travado.
+        """
+        mode = await self._value("PRAGMA auto_vacuum")
+        if mode == 2 or not quiet or not DB_MAINT_CONVERT or self.multi_process: return AUTO_VACUUM_MODES.get(mode, mode)
+
+        print("🧰 [MAINTENANCE] Convertendo o banco para auto_vacuum incremental (VACUUM único)...")
+        started = time.perf_counter()
+        async with self.backup_lock:
+            async with self._exclusive() as writer:
+                await writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                await writer.execute("VACUUM")
+        print(f"✅ [MAINTENANCE] Conversão concluída em {round(time.perf_counter() - started, 1)}s.")
+        return "incremental (convertido)"
+
+    # ====================================================
+    # 📊 ESTATÍSTICAS (Painel)
+    # ====================================================
+    async def refresh_stats(self):
+        """Páginas por tabela (índices somados à tabela dona) e linhas estimadas pelo ANALYZE."""
+        owners = {name: tbl for name, tbl in await self.db.execute_fetchall(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')")}
+
+        stats = {}
+        try:
+            rows = await self.db.execute_fetchall("SELECT name, pageno, pgsize FROM dbstat WHERE aggregate = TRUE")
+        except Exception:
+            rows = [] # SQLite sem SQLITE_ENABLE_DBSTAT_VTAB: fica só com as estimativas de linhas
+        for name, pages, size in rows:
+            entry = stats.setdefault(owners.get(name, name), {"pages": 0, "bytes": 0, "rows": None})
+            entry["pages"] += pages
+            entry["bytes"] += size
+
+        if "sqlite_stat1" in owners:
+            for tbl, estimate in await self.db.execute_fetchall(
+                    "SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl"):
+                stats.setdefault(tbl, {"pages": 0, "bytes": 0, "rows": None})["rows"] = estimate
+
+        self.table_stats = stats
+        self.stats_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return stats
+
+    async def snapshot(self):
+        """Tamanho do arquivo por PRAGMAs (instantâneo) + última coleta por tabela."""
+        page_size = await self._value("PRAGMA page_size")
+        page_count = await self._value("PRAGMA page_count")
+        freelist = await self._value("PRAGMA freelist_count")
+        wal_path = f"{self.db.path}-wal"
+        return {
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist,
+            "size_mb": round(page_size * page_count / (1024 * 1024), 2),
+            "free_mb": round(page_size * freelist / (1024 * 1024), 2),
+            "wal_mb": round(os.path.getsize(wal_path) / (1024 * 1024), 2) if os.path.exists(wal_path) else 0,
+            "tables": self.table_stats,
+            "stats_at": self.stats_at,
+            "last_run": self.last_run,
+            "quiet_hours": DB_MAINT_QUIET_HOURS,
+            "archive": self.archive.stats() if self.archive else None
+        }
@@ -0,0 +1,111 @@
+from datetime import datetime
+from database.config_store import is_config_view, add_config_columns
+
+# ====================================================
+# 🧬 MOTOR DE MIGRAÇÕES VERSIONADAS
+# ====================================================
+# Cada componente (core, logs, setagem, faction_actions...) tem sua própria
+# lista numerada de migrações: [(versao, "descrição", async fn(db)), ...]
+# A versão aplicada fica na tabela schema_version. No boot, uma única query
+# carrega todas as versões para memória; se nada estiver pendente, nenhum
+# ALTER/PRAGMA é executado.
+
+SCHEMA_VERSIONS = {} # Cache: componente -> versão aplicada
+REGISTERED = {} # Componente -> lista de migrações (para atualizar um banco restaurado)
+
+async def load_schema_versions(db, target=None):
+    """Carrega todas as versões de uma vez (1 query quando o schema já existe)."""
+    target = SCHEMA_VERSIONS if target is None else target
+    try:
+        async with db.execute("SELECT component, version FROM schema_version") as cursor:
+            rows = await cursor.fetchall()
+    except Exception:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                component TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                applied_at TEXT
+            )
+        """)
+        await db.commit()
+        rows = []
+
+    target.clear()
+    target.update({component: version for component, version in rows})
+    return target
+
+def pending_migrations(component, migrations, versions=None):
+    current = (SCHEMA_VERSIONS if versions is None else versions).get(component, 0)
+    return sorted((m for m in migrations if m[0] > current), key=lambda m: m[0])
+
+def latest_versions():
+    """Versão mais alta conhecida pelo código, por componente."""
+    return {component: max(m[0] for m in migrations) for component, migrations in REGISTERED.items() if migrations}
+
+async def run_migrations(db, component, migrations, versions=None):
+    """Aplica as migrações pendentes de um componente. Retorna quantas rodaram."""
+    REGISTERED[component] = migrations
+    versions = SCHEMA_VERSIONS if versions is None else versions
+    pending = pending_migrations(component, migrations, versions)
+    if not pending: return 0
+
+    for version, name, fn in pending:
+        print(f"🔄 [MIGRATION] {component} v{version}: {name}")
+        try:
+            await fn(db)
+            await db.execute("""
+                INSERT INTO schema_version (component, version, applied_at) VALUES (?, ?, ?)
+                ON CONFLICT(component) DO UPDATE SET version = excluded.version, applied_at = excluded.applied_at
+            """, (component, version, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            await db.commit()
+            versions[component] = version
+        except Exception as e:
+            print(f"❌ [MIGRATION ERROR] {component} v{version} falhou: {e}")
+            raise
+
+    print(f"✅ [MIGRATION] {component} atualizado para v{versions[component]}.")
+    return len(pending)
+
+async def upgrade_all(db):
+    """Roda todas as migrações registradas num banco qualquer (ex: backup antigo sendo restaurado)."""
+    versions = await load_schema_versions(db, target={})
+    total = 0
+    for component, migrations in list(REGISTERED.items()):
+        total += await run_migrations(db, component, migrations, versions)
+    return total
+
+# ====================================================
+# 🧰 HELPERS IDEMPOTENTES
+# ====================================================
+async def table_columns(db, table):
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        return [row[1] for row in await cursor.fetchall()]
+
+async def add_columns(db, table, columns):
+    """Adiciona apenas as colunas que ainda não existem (1 PRAGMA por tabela)."""
+    existing = await table_columns(db, table)
+    if not existing: return # Tabela ainda não existe
+    if table == "config" and await is_config_view(db):
+        return await add_config_columns(db, columns) # config virou view: coluna vai para config_<modulo>
+
+    for col_name, col_type in columns:
+        if col_name in existing: continue
+        print(f"   ├─ ➕ {table}.{col_name}")
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+        existing.append(col_name)
+
+def epoch_from_text(column, local=True):
+    """
+    Expressão SQL que converte datas TEXT legadas (isoformat, str(datetime), CURRENT_TIMESTAMP) em epoch.
+    local=True: o texto foi gravado com datetime.now() (horário local). CURRENT_TIMESTAMP já é UTC.
+    """
+    normalized = f"replace(substr({column}, 1, 19), 'T', ' ')"
+    modifier = ", 'utc'" if local else ""
+    return f"CAST(strftime('%s', {normalized}{modifier}) AS INTEGER)"
+
+async def backfill_epoch(db, table, text_column, epoch_column, local=True):
+    """Preenche a coluna epoch a partir da coluna TEXT (só linhas ainda sem valor)."""
+    await db.execute(f"""
+        UPDATE {table} SET {epoch_column} = {epoch_from_text(text_column, local)}
+        WHERE {epoch_column} IS NULL AND {text_column} IS NOT NULL
+    """)
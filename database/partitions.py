@@ -0,0 +1,267 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from database.bot_db import DatabasePool
+from database.migrations import add_columns, table_columns
+from database.write_queue import WriteQueue
+
+# ====================================================
+# ⚙️ PARTIÇÃO POR GUILD (Configurável via .env)
+# ====================================================
+DB_PARTITION = os.getenv('DB_PARTITION', '0') == '1'                      # Liga o modo particionado (padrão: tudo no bot_data.db)
+DB_PARTITION_DIR = os.getenv('DB_PARTITION_DIR', 'database/guilds')     # Um <guild_id>.db por servidor
+DB_PARTITION_HANDLES = int(os.getenv('DB_PARTITION_HANDLES', 64))       # Arquivos abertos ao mesmo tempo (LRU)
+
+# Tabelas de histórico que vão para o arquivo da guild. O resto (config, licenses, global_bans,
+# tier_definitions, audit_logs...) continua no banco central.
+# faction_ranking/ranking_bonus vão junto: são atualizados na mesma transação das ações.
+PARTITIONED_TABLES = (
+    "faction_actions", "action_participants", "action_mvp_votes",
+    "faction_ranking", "ranking_bonus", "timesheet_logs",
+)
+
+# Como achar as linhas da guild no banco central (votos antigos foram gravados sem guild_id)
+GUILD_FILTER = {
+    "action_mvp_votes": "guild_id = :guild OR message_id IN (SELECT message_id FROM {db}faction_actions WHERE guild_id = :guild)",
+}
+DEFAULT_FILTER = "guild_id = :guild"
+
+PARTITION_FILE = re.compile(r"^(\d+)\.db$")
+IF_NOT_EXISTS = re.compile(r"^\s*CREATE\s+(TABLE|(?:UNIQUE\s+)?INDEX)\s+", re.IGNORECASE)
+
+class GuildPartition:
+    """Arquivo de uma guild: pool só com escritor + fila de escrita própria (mesma API do bot.db / bot.write_queue)."""
+    def __init__(self, guild_id, path):
+        self.guild_id = guild_id
+        self.path = path
+        self.db = None
+        self.write_queue = None
+        self.pins = 0 # Quantos `async with acquire()` estão usando o handle (não sai do LRU enquanto > 0)
+        self.last_used = time.time()
+
+    async def open(self):
+        self.db = await DatabasePool(self.path, readers=0, verbose=False).open()
+        self.write_queue = WriteQueue(self.db, verbose=False).start()
+        return self
+
+    async def close(self):
+        if self.write_queue: await self.write_queue.close()
+        if self.db: await self.db.close()
+
+# ====================================================
+# 🗂️ GERENCIADOR DE PARTIÇÕES (LRU de handles)
+# ====================================================
+class PartitionManager:
+    """
+    Isola o histórico de cada guild num SQLite próprio (database/guilds/<guild_id>.db):
+    - Uso: `async with bot.partitions.acquire(guild_id) as part:` -> part.db (leituras) / part.write_queue (escritas).
+      Desligado (DB_PARTITION=0), devolve o próprio bot.db / bot.write_queue: os cogs não mudam de caminho.
+    - Handles abertos sob demanda, no máximo DB_PARTITION_HANDLES; o menos usado (e sem uso no momento) é fechado.
+    - Schema espelhado do banco central (as migrações continuam rodando só lá): tabela que falta é criada,
+      coluna nova é adicionada ao abrir o arquivo.
+    - Primeira abertura de uma guild: copia as linhas dela do banco central (ATTACH) e apaga de lá.
+    - Apagar uma guild = fechar o handle e remover o arquivo.
+    Os arquivos das guilds entram no snapshot do BackupService (.tar) e são trocados pelo hot restore (swap_dir).
+    """
+    def __init__(self, db, write_queue, enabled=DB_PARTITION, partition_dir=DB_PARTITION_DIR, max_handles=DB_PARTITION_HANDLES):
+        self.db = db
+        self.write_queue = write_queue
+        self.enabled = enabled
+        self.partition_dir = partition_dir
+        self.max_handles = max(1, max_handles)
+        self.handles = OrderedDict() # guild_id -> GuildPartition (mais recente no fim)
+        self.lock = asyncio.Lock() # Abertura/fechamento de arquivos, um por vez
+        self.schema = None # tabela -> {"sql", "indexes", "columns"} lido do banco central
+        self.counters = {"hits": 0, "opens": 0, "evictions": 0, "imported_rows": 0, "dropped": 0}
+
+        self.central = GuildPartition(None, db.path)
+        self.central.db = db
+        self.central.write_queue = write_queue
+
+        if enabled: print(f"🗂️ [PARTITIONS] Modo particionado ativo: {partition_dir} (até {self.max_handles} arquivos abertos).")
+
+    def path(self, guild_id):
+        return os.path.join(self.partition_dir, f"{int(guild_id)}.db")
+
+    def guild_ids(self):
+        """Guilds que já têm arquivo (abertos ou não)."""
+        if not os.path.isdir(self.partition_dir): return []
+        return [int(m.group(1)) for m in map(PARTITION_FILE.match, os.listdir(self.partition_dir)) if m]
+
+    # ====================================================
+    # 🔓 ACESSO
+    # ====================================================
+    @asynccontextmanager
+    async def acquire(self, guild_id):
+        if not self.enabled or guild_id is None:
+            yield self.central
+            return
+
+        part = await self._get(int(guild_id))
+        part.pins += 1
+        try:
+            yield part
+        finally:
+            part.pins -= 1
+            part.last_used = time.time()
+
+    async def _get(self, guild_id):
+        part = self.handles.get(guild_id)
+        if part:
+            self.handles.move_to_end(guild_id)
+            self.counters["hits"] += 1
+            return part
+
+        async with self.lock:
+            part = self.handles.get(guild_id)
+            if part: return part # Outra task abriu enquanto esperávamos
+            part = await self._open(guild_id)
+            self.handles[guild_id] = part
+            await self._evict()
+            return part
+
+    async def _evict(self):
+        while len(self.handles) > self.max_handles:
+            victim = next((g for g, p in self.handles.items() if p.pins == 0), None)
+            if victim is None: return # Todos em uso: passa do limite até alguém liberar
+            await self.handles.pop(victim).close()
+            self.counters["evictions"] += 1
+
+    async def _open(self, guild_id):
+        os.makedirs(self.partition_dir, exist_ok=True)
+        path = self.path(guild_id)
+        new = not os.path.exists(path)
+
+        part = await GuildPartition(guild_id, path).open()
+        try:
+            await self._ensure_schema(part.db)
+            if new: await self._import_central(part)
+        except Exception:
+            await part.close()
+            if new: self._remove_files(path)
+            raise
+        self.counters["opens"] += 1
+        return part
+
+    # ====================================================
+    # 🧬 SCHEMA (Espelho das tabelas do banco central)
+    # ====================================================
+    async def _load_schema(self):
+        placeholders = ",".join("?" * len(PARTITIONED_TABLES))
+        rows = await self.db.execute_fetchall(
+            f"SELECT type, tbl_name, sql FROM sqlite_master WHERE tbl_name IN ({placeholders}) AND sql IS NOT NULL",
+            PARTITIONED_TABLES)
+        schema = {}
+        for kind, table, sql in rows:
+            entry = schema.setdefault(table, {"sql": None, "indexes": [], "columns": []})
+            if kind == "table": entry["sql"] = sql
+            elif kind == "index": entry["indexes"].append(sql)
+        for table, entry in schema.items():
+            for col in await self.db.execute_fetchall(f"PRAGMA table_info({table})"):
+                col_type = col[2] + (f" DEFAULT {col[4]}" if col[4] is not None else "")
+                entry["columns"].append((col[1], col_type))
+        self.schema = schema
+
+    async def _ensure_schema(self, db):
+        # Cogs ainda carregando podem não ter criado as tabelas: relê até achar todas
+        if self.schema is None or len(self.schema) < len(PARTITIONED_TABLES):
+            await self._load_schema()
+
+        for table, entry in self.schema.items():
+            if await table_columns(db, table):
+                await add_columns(db, table, entry["columns"])
+            else:
+                await db.execute(IF_NOT_EXISTS.sub(r"CREATE \1 IF NOT EXISTS ", entry["sql"], count=1))
+            for index_sql in entry["indexes"]:
+                await db.execute(IF_NOT_EXISTS.sub(r"CREATE \1 IF NOT EXISTS ", index_sql, count=1))
+        await db.commit()
+
+    # ====================================================
+    # 📦 IMPORTAÇÃO (Linhas que ainda estão no banco central)
+    # ====================================================
+    async def _import_central(self, part):
+        db = part.db
+        moved = {}
+        await db.execute("ATTACH DATABASE ? AS central", (os.path.abspath(self.db.path),))
+        try:
+            for table in PARTITIONED_TABLES:
+                if table not in self.schema: continue
+                cols = ", ".join(name for name, _ in self.schema[table]["columns"])
+                where = GUILD_FILTER.get(table, DEFAULT_FILTER).format(db="central.")
+                cursor = await db.execute(f"INSERT OR IGNORE INTO main.{table} ({cols}) SELECT {cols} FROM central.{table} WHERE {where}",
+                                          {"guild": part.guild_id})
+                if cursor.rowcount > 0: moved[table] = cursor.rowcount
+                await cursor.close()
+            await db.commit()
+        finally:
+            await db.execute("DETACH DATABASE central")
+
+        if not moved: return
+        # Arquivo já commitado: só então apaga do central (filhas antes das ações, por causa do filtro dos votos)
+        await self.write_queue.transaction([
+            (f"DELETE FROM {table} WHERE {GUILD_FILTER.get(table, DEFAULT_FILTER).format(db='')}", {"guild": part.guild_id})
+            for table in reversed(PARTITIONED_TABLES) if table in moved
+        ])
+        self.counters["imported_rows"] += sum(moved.values())
+        print(f"📦 [PARTITIONS] Guild {part.guild_id}: {sum(moved.values())} linhas movidas do banco central {moved}")
+
+    # ====================================================
+    # 🗑️ REMOÇÃO (Purge = apagar o arquivo)
+    # ====================================================
+    async def drop_guild(self, guild_id):
+        """Fecha o handle e apaga o arquivo da guild. Retorna os bytes liberados (0 = não havia arquivo)."""
+        guild_id = int(guild_id)
+        async with self.lock:
+            part = self.handles.pop(guild_id, None)
+            if part: await part.close()
+            freed = self._remove_files(self.path(guild_id))
+        if freed: self.counters["dropped"] += 1
+        return freed
+
+    async def swap_dir(self, new_dir, keep_old_as):
+        """
+        Troca a pasta das guilds por outra (hot restore). Handles abertos são fechados depois que
+        ninguém mais os usa; os próximos acquire() abrem os arquivos novos.
+        """
+        async with self.lock:
+            parts = list(self.handles.values())
+            self.handles.clear()
+            for part in parts:
+                while part.pins: await asyncio.sleep(0.05)
+                await part.close()
+            if os.path.isdir(self.partition_dir): os.replace(self.partition_dir, keep_old_as)
+            os.replace(new_dir, self.partition_dir)
+            self.schema = None # Relido do banco central na próxima abertura
+
+    @staticmethod
+    def _remove_files(path):
+        freed = 0
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                freed += os.path.getsize(path + suffix)
+                os.remove(path + suffix)
+        return freed
+
+    async def close(self):
+        async with self.lock:
+            while self.handles:
+                _, part = self.handles.popitem()
+                try: await part.close()
+                except Exception as e: print(f"⚠️ [PARTITIONS] Falha ao fechar guild {part.guild_id}: {e}")
+
+    def stats(self):
+        files = self.guild_ids() if self.enabled else []
+        size = sum(os.path.getsize(self.path(g)) for g in files if os.path.exists(self.path(g)))
+        return {
+            "enabled": self.enabled,
+            "dir": self.partition_dir,
+            "files": len(files),
+            "size_mb": round(size / (1024 * 1024), 2),
+            "open": len(self.handles),
+            "max_open": self.max_handles,
+            "pinned": sum(1 for p in self.handles.values() if p.pins),
+            **self.counters
+        }
@@ -0,0 +1,252 @@
+import asyncio
+import datetime
+import itertools
+import os
+import time
+from collections import OrderedDict
+
+# ====================================================
+# ⚙️ CONFIGURAÇÃO DA LIMPEZA (Configurável via .env)
+# ====================================================
+DB_PURGE_CHUNK = int(os.getenv('DB_PURGE_CHUNK', 500))           # Linhas apagadas por commit
+DB_PURGE_PAUSE_MS = int(os.getenv('DB_PURGE_PAUSE_MS', 10))      # Respiro entre blocos (outras escritas entram)
+DB_PURGE_HISTORY = int(os.getenv('DB_PURGE_HISTORY', 20))        # Jobs mantidos para consulta no painel
+
+# Tabelas com guild_id que nunca entram na limpeza automática
+SKIP_TABLES = {"schema_version", "sqlite_sequence"}
+LICENSE_TABLE = "licenses"
+
+# ====================================================
+# 📋 JOB (Progresso consultado pelo painel)
+# ====================================================
+class PurgeJob:
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, guild_ids=None, keep_license=True, clear_queue=False):
+        self.id = next(self._ids)
+        self.kind = kind # 'guilds' (IDs explícitos) | 'inactive' (servidores onde o bot não está)
+        self.guild_ids = [int(g) for g in guild_ids or []]
+        self.keep_license = keep_license
+        self.clear_queue = clear_queue # Remove o BOT_REMOVED da fila de limpeza
+        self.status = "queued"
+        self.table = None
+        self.tables_done = 0
+        self.tables_total = 0
+        self.deleted = 0
+        self.by_table = {}
+        self.guilds_purged = set()
+        self.created_indexes = []
+        self.files_deleted = 0 # Arquivos de guild removidos (modo particionado)
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.elapsed = 0
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "table": self.table,
+            "tables_done": self.tables_done,
+            "tables_total": self.tables_total,
+            "deleted_rows": self.deleted,
+            "by_table": self.by_table,
+            "guilds": len(self.guilds_purged) if self.kind == "inactive" else len(self.guild_ids),
+            "created_indexes": self.created_indexes,
+            "files_deleted": self.files_deleted,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "seconds": self.elapsed
+        }
+
+# ====================================================
+# 🧹 MOTOR DE LIMPEZA (Blocos pequenos + Fila de Escrita)
+# ====================================================
+class PurgeEngine:
+    """
+    Apaga dados de guilds sem segurar o lock de escrita por muito tempo:
+    - Descobre as tabelas com guild_id pelo schema (nada de lista fixa desatualizada).
+    - Garante um índice em guild_id em cada uma (cria o que faltar).
+    - Guilds ativas vão para uma tabela temporária no escritor; o diff é feito pelo SQLite.
+    - DELETE em blocos de DB_PURGE_CHUNK linhas, cada bloco num commit da WriteQueue.
+    - Modo particionado: o histórico da guild é um arquivo próprio, apagado de uma vez (sem DELETE).
+    - Roda em background, um job por vez; o painel consulta o progresso.
+    """
+    def __init__(self, db, write_queue, active_guilds, archive=None, chunk=DB_PURGE_CHUNK, partitions=None, inactive_blocker=None):
+        self.db = db
+        self.write_queue = write_queue
+        self.active_guilds = active_guilds # Callable -> IDs das guilds onde o bot está (ex: bot.guilds)
+        self.archive = archive # ArchiveService: arquivos frios da guild também são apagados
+        self.partitions = partitions # PartitionManager: arquivo da guild é removido inteiro
+        self.inactive_blocker = inactive_blocker # Callable -> motivo para recusar 'inactive' (None = liberado)
+        self.chunk = max(1, chunk)
+        self.lock = asyncio.Lock()
+        self.jobs = OrderedDict()
+
+    def submit(self, kind, guild_ids=None, keep_license=True, clear_queue=False):
+        if kind == "inactive": self._check_inactive()
+        job = PurgeJob(kind, guild_ids, keep_license, clear_queue)
+        self.jobs[job.id] = job
+        while len(self.jobs) > DB_PURGE_HISTORY:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.status in ("queued", "running"): break
+            self.jobs.popitem(last=False)
+        asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    def _check_inactive(self):
+        reason = self.inactive_blocker() if self.inactive_blocker else None
+        if reason: raise RuntimeError(reason)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return [job.to_dict() for job in reversed(self.jobs.values())]
+
+    async def _run(self, job):
+        async with self.lock:
+            started = time.perf_counter()
+            job.status = "running"
+            job.started_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            try:
+                await self._purge(job)
+                job.status = "done"
+                files = f" + {job.files_deleted} arquivos de guild" if job.files_deleted else ""
+                print(f"🧹 [PURGE] Job #{job.id} ({job.kind}) concluído: {job.deleted} linhas em {job.tables_total} tabelas{files}.")
+            except Exception as e:
+                job.status = "error"
+                job.error = str(e)
+                print(f"❌ [PURGE] Job #{job.id} falhou na tabela {job.table}: {e}")
+            finally:
+                job.table = None
+                job.elapsed = round(time.perf_counter() - started, 2)
+                job.finished_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # ====================================================
+    # 🔍 SCHEMA
+    # ====================================================
+    async def guild_tables(self):
+        """[(tabela, chave_do_bloco, guild_id_é_a_pk)] de todas as tabelas com coluna guild_id."""
+        names = [row[0] for row in await self.db.execute_fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        tables = []
+        for name in names:
+            if name in SKIP_TABLES: continue
+            cols = await self.db.execute_fetchall(f"PRAGMA table_info({name})")
+            if "guild_id" not in [c[1] for c in cols]: continue
+
+            pk = [c[1] for c in sorted(cols, key=lambda c: c[5]) if c[5]]
+            sql = (await self.db.execute_fetchall("SELECT sql FROM sqlite_master WHERE name = ?", (name,)))[0][0] or ""
+            # Tabelas WITHOUT ROWID não têm rowid: o bloco é selecionado pela PK
+            key = ", ".join(pk) if "WITHOUT ROWID" in sql.upper() else "rowid"
+            tables.append((name, key, pk == ["guild_id"]))
+        return tables
+
+    async def _has_guild_index(self, table):
+        for index in await self.db.execute_fetchall(f"PRAGMA index_list({table})"):
+            first = await self.db.execute_fetchall(f"PRAGMA index_info({index[1]})")
+            if first and sorted(first)[0][2] == "guild_id": return True
+        return False
+
+    async def ensure_indexes(self, tables):
+        created = []
+        for table, _, guild_pk in tables:
+            if guild_pk or await self._has_guild_index(table): continue
+            name = f"idx_{table}_guild"
+            await self.write_queue.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}(guild_id)")
+            created.append(name)
+            print(f"🗂️ [PURGE] Índice criado: {name}")
+        return created
+
+    # ====================================================
+    # 🧵 EXECUÇÃO
+    # ====================================================
+    async def _purge(self, job):
+        tables = await self.guild_tables()
+        if job.kind == "inactive" or job.keep_license:
+            tables = [t for t in tables if t[0] != LICENSE_TABLE]
+        job.tables_total = len(tables)
+        job.created_indexes = await self.ensure_indexes(tables)
+
+        if job.kind == "inactive":
+            self._check_inactive() # O job pode ter ficado na fila: confere de novo antes de apagar
+            await self.write_queue.run(self._load_keep_table)
+
+        for table, key, guild_pk in tables:
+            job.table = table
+            if job.kind == "guilds":
+                guild_ids = job.guild_ids
+            else:
+                guild_ids = await self.write_queue.run(lambda db, table=table: self._ghost_guilds(db, table))
+                active = set(self.active_guilds()) # O bot pode ter entrado numa guild durante o job
+                guild_ids = [g for g in guild_ids if g not in active]
+
+            deleted = 0
+            for guild_id in guild_ids:
+                removed = await self._delete_guild(table, key, guild_pk, guild_id)
+                if removed: job.guilds_purged.add(guild_id)
+                deleted += removed
+                job.deleted += removed
+
+            job.by_table[table] = deleted
+            job.tables_done += 1
+
+        if self.partitions and self.partitions.enabled:
+            if job.kind == "guilds":
+                targets = job.guild_ids
+            else:
+                active = set(self.active_guilds())
+                targets = [g for g in self.partitions.guild_ids() if g not in active]
+            for guild_id in targets:
+                job.table = f"{self.partitions.partition_dir}/{guild_id}.db"
+                if await self.partitions.drop_guild(guild_id):
+                    job.files_deleted += 1
+                    job.guilds_purged.add(guild_id)
+
+        if self.archive:
+            for guild_id in (job.guild_ids if job.kind == "guilds" else job.guilds_purged):
+                await asyncio.to_thread(self.archive.delete_guild, guild_id)
+
+        if job.clear_queue and job.guild_ids:
+            await self.write_queue.executemany("DELETE FROM audit_logs WHERE action = 'BOT_REMOVED' AND target = ?",
+                                               [(str(g),) for g in job.guild_ids])
+
+    async def _delete_guild(self, table, key, guild_pk, guild_id):
+        if guild_pk:
+            # Uma linha por guild (ex: config): DELETE direto, o cache de config invalida só essa guild
+            return await self.write_queue.run(lambda db: self._changes(db, f"DELETE FROM {table} WHERE guild_id = ?", (guild_id,)))
+
+        sql = f"DELETE FROM {table} WHERE ({key}) IN (SELECT {key} FROM {table} WHERE guild_id = ? LIMIT ?)"
+        total = 0
+        while True:
+            # Cada bloco é um item da fila: commit próprio, o lock é liberado entre um e outro
+            removed = await self.write_queue.run(lambda db: self._changes(db, sql, (guild_id, self.chunk)))
+            total += removed
+            if removed < self.chunk: return total
+            await asyncio.sleep(DB_PURGE_PAUSE_MS / 1000)
+
+    # Funções abaixo rodam DENTRO do lote da WriteQueue (recebem o pool)
+    @staticmethod
+    async def _changes(db, sql, parameters):
+        cursor = await db.execute(sql, parameters)
+        changes = cursor.rowcount
+        await cursor.close()
+        return changes
+
+    async def _load_keep_table(self, db):
+        # Tabela temporária só existe na conexão do escritor: acesso direto a ela
+        writer = db.writer
+        await writer.execute("CREATE TEMP TABLE IF NOT EXISTS purge_keep (guild_id INTEGER PRIMARY KEY)")
+        await writer.execute("DELETE FROM temp.purge_keep")
+        await writer.executemany("INSERT OR IGNORE INTO temp.purge_keep (guild_id) VALUES (?)",
+                                 [(guild_id,) for guild_id in self.active_guilds()])
+
+    @staticmethod
+    async def _ghost_guilds(db, table):
+        rows = await db.writer.execute_fetchall(
+            f"SELECT DISTINCT guild_id FROM {table} WHERE guild_id IS NOT NULL "
+            f"AND guild_id NOT IN (SELECT guild_id FROM temp.purge_keep)")
+        return [row[0] for row in rows]
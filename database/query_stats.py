@@ -0,0 +1,171 @@
+import os
+import re
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+
+# ====================================================
+# ⚙️ CONFIGURAÇÃO (Configurável via .env)
+# ====================================================
+DB_QUERY_STATS = os.getenv('DB_QUERY_STATS', '1') == '1'          # Liga/desliga a instrumentação
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 100))       # Acima disso vai para o slow log
+DB_QUERY_SAMPLES = int(os.getenv('DB_QUERY_SAMPLES', 512))         # Amostras por statement (p95/p99)
+DB_SLOW_LOG_SIZE = int(os.getenv('DB_SLOW_LOG_SIZE', 200))         # Últimas N queries lentas
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.join(ROOT, "database")
+
+# ====================================================
+# 🧽 NORMALIZAÇÃO (literais viram ?, espaços colapsados)
+# ====================================================
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+@lru_cache(maxsize=4096)
+def normalize(sql):
+    sql = _STRINGS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _SPACES.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("(?...)", sql)
+    return sql[:400]
+
+def find_caller():
+    """Primeiro frame fora de database/ (o cog / rota que disparou a query)."""
+    frame = sys._getframe(2)
+    fallback = "?"
+    while frame:
+        filename = frame.f_code.co_filename
+        if filename.startswith(ROOT):
+            where = f"{os.path.relpath(filename, ROOT)}:{frame.f_lineno} {frame.f_code.co_name}"
+            if not filename.startswith(DATABASE_DIR): return where
+            fallback = where # Ex: worker da fila de escrita (o cog original já saiu da pilha)
+        frame = frame.f_back
+    return fallback
+
+def _percentile(values, pct):
+    if not values: return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+# ====================================================
+# 📈 ESTATÍSTICAS POR STATEMENT
+# ====================================================
+class _Sample:
+    """Tempo de uma execução: execute + fetch* (o fetch soma na mesma amostra)."""
+    __slots__ = ("stats", "entry", "sql", "caller", "value", "logged")
+
+    def __init__(self, stats, entry, sql, caller):
+        self.stats = stats
+        self.entry = entry
+        self.sql = sql
+        self.caller = caller
+        self.value = [0.0] # Lista: a deque de amostras guarda a referência e enxerga o fetch
+        self.logged = False
+        entry["count"] += 1
+        entry["samples"].append(self.value)
+        entry["callers"][caller] = entry["callers"].get(caller, 0) + 1
+
+    def add(self, ms):
+        self.value[0] += ms
+        self.entry["total_ms"] += ms
+        if self.value[0] > self.entry["max_ms"]: self.entry["max_ms"] = self.value[0]
+        if not self.logged and self.value[0] >= self.stats.threshold_ms:
+            self.logged = True
+            self.stats.log_slow(self)
+
+class QueryStats:
+    def __init__(self, threshold_ms=DB_SLOW_QUERY_MS, samples=DB_QUERY_SAMPLES):
+        self.threshold_ms = threshold_ms
+        self.samples = samples
+        self.entries = {} # sql normalizado -> métricas
+        self.slow_log = deque(maxlen=DB_SLOW_LOG_SIZE)
+        self.since = datetime.now()
+
+    def start(self, sql):
+        key = normalize(sql)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "samples": deque(maxlen=self.samples), "callers": {}}
+        return _Sample(self, entry, key, find_caller())
+
+    def log_slow(self, sample):
+        ms = round(sample.value[0], 1)
+        self.slow_log.append({
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": ms,
+            "sql": sample.sql,
+            "caller": sample.caller
+        })
+        print(f"🐢 [SLOW QUERY] {ms}ms em {sample.caller}: {sample.sql[:160]}")
+
+    def reset(self):
+        self.entries.clear()
+        self.slow_log.clear()
+        self.since = datetime.now()
+
+    def snapshot(self, limit=100):
+        rows = []
+        for sql, e in self.entries.items():
+            values = [v[0] for v in e["samples"]]
+            top_caller = max(e["callers"].items(), key=lambda c: c[1])[0] if e["callers"] else "?"
+            rows.append({
+                "sql": sql,
+                "count": e["count"],
+                "total_ms": round(e["total_ms"], 1),
+                "avg_ms": round(e["total_ms"] / e["count"], 2) if e["count"] else 0,
+                "p95_ms": round(_percentile(values, 95), 2),
+                "p99_ms": round(_percentile(values, 99), 2),
+                "max_ms": round(e["max_ms"], 2),
+                "caller": top_caller,
+                "callers": len(e["callers"])
+            })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return {
+            "since": self.since.strftime("%Y-%m-%d %H:%M:%S"),
+            "threshold_ms": self.threshold_ms,
+            "statements": len(rows),
+            "queries": rows[:limit],
+            "slow": list(reversed(self.slow_log))
+        }
+
+# ====================================================
+# ⏱️ WRAPPERS (Result e Cursor do aiosqlite)
+# ====================================================
+class TimedCursor:
+    """Cursor que soma o tempo de fetch na amostra da query."""
+    def __init__(self, cursor, sample):
+        self._cursor = cursor
+        self._sample = sample
+
+    async def _timed(self, coro):
+        started = time.perf_counter()
+        try: return await coro
+        finally: self._sample.add((time.perf_counter() - started) * 1000)
+
+    async def fetchone(self):
+        return await self._timed(self._cursor.fetchone())
+
+    async def fetchall(self):
+        return await self._timed(self._cursor.fetchall())
+
+    async def fetchmany(self, size=None):
+        return await self._timed(self._cursor.fetchmany(size) if size else self._cursor.fetchmany())
+
+    async def close(self):
+        await self._cursor.close()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            row = await self.fetchone()
+            if row is None: return
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,193 @@
+import asyncio
+import datetime
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import tarfile
+import time
+import aiosqlite
+from database.backup import CENTRAL_MEMBER, GUILDS_MEMBER
+from database.migrations import load_schema_versions, latest_versions, upgrade_all
+from database.tiers import sync_tier_manifest
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Tabelas mínimas para considerar o arquivo um banco do bot
+REQUIRED_TABLES = ("config", "licenses")
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+TAR_MAGIC = b"ustar" # Offset 257 (snapshot do modo particionado)
+GUILD_MEMBER = re.compile(rf"^{GUILDS_MEMBER}/(\d+)\.db$")
+
+class RestoreError(Exception):
+    pass
+
+# ====================================================
+# 🔍 PREPARO E VALIDAÇÃO (Thread)
+# ====================================================
+def _decompress(upload_path, candidate_path):
+    with open(upload_path, "rb") as f:
+        magic = f.read(16)
+
+    if magic.startswith(GZIP_MAGIC):
+        with gzip.open(upload_path, "rb") as fin, open(candidate_path, "wb") as fout:
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+    elif magic.startswith(ZSTD_MAGIC):
+        if not zstandard: raise RestoreError("Backup .zst enviado, mas o pacote zstandard não está instalado.")
+        with open(upload_path, "rb") as fin, open(candidate_path, "wb") as fout:
+            zstandard.ZstdDecompressor().copy_stream(fin, fout)
+    elif magic == SQLITE_MAGIC:
+        shutil.copyfile(upload_path, candidate_path)
+    else:
+        raise RestoreError("Arquivo não é um banco SQLite (nem .gz/.zst).")
+
+    with open(candidate_path, "rb") as f:
+        f.seek(257)
+        is_tar = f.read(5) == TAR_MAGIC
+    return _unpack(candidate_path) if is_tar else None
+
+def _unpack(candidate_path):
+    """Snapshot particionado: banco central -> candidate_path, guilds/<id>.db -> <candidate>.guilds/. Retorna a pasta."""
+    tar_path = candidate_path + ".tar"
+    guild_dir = candidate_path + ".guilds"
+    os.replace(candidate_path, tar_path)
+    try:
+        found_central = False
+        os.makedirs(guild_dir, exist_ok=True)
+        with tarfile.open(tar_path, "r") as tar:
+            for member in tar:
+                if not member.isfile(): continue
+                match = GUILD_MEMBER.match(member.name)
+                # Só nomes conhecidos: nada de caminho vindo do arquivo enviado
+                if member.name == CENTRAL_MEMBER: target = candidate_path
+                elif match: target = os.path.join(guild_dir, f"{int(match.group(1))}.db")
+                else: continue
+                with tar.extractfile(member) as fin, open(target, "wb") as fout:
+                    shutil.copyfileobj(fin, fout, 1024 * 1024)
+                found_central = found_central or target == candidate_path
+        if not found_central: raise RestoreError(f"Snapshot sem {CENTRAL_MEMBER}.")
+    except Exception:
+        shutil.rmtree(guild_dir, ignore_errors=True)
+        raise
+    finally:
+        os.remove(tar_path)
+    return guild_dir
+
+def _validate_guilds(guild_dir):
+    files = sorted(os.listdir(guild_dir))
+    for name in files:
+        conn = sqlite3.connect(os.path.join(guild_dir, name))
+        try:
+            check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if check != "ok": raise RestoreError(f"quick_check falhou em guilds/{name}: {check}")
+    return len(files)
+
+def _validate(candidate_path):
+    conn = sqlite3.connect(candidate_path)
+    try:
+        check = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if check != "ok": raise RestoreError(f"integrity_check falhou: {check}")
+
+        # config pode ser a tabela larga (backup antigo) ou a view sobre config_<modulo>
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        missing = [t for t in REQUIRED_TABLES if t not in tables]
+        if missing: raise RestoreError(f"Tabelas obrigatórias ausentes: {', '.join(missing)}")
+
+        versions = dict(conn.execute("SELECT component, version FROM schema_version")) if "schema_version" in tables else {}
+    finally:
+        conn.close()
+
+    # Backup de uma versão MAIS NOVA do bot não pode ser aberto por este código
+    known = latest_versions()
+    newer = [f"{c} v{v} (código: v{known[c]})" for c, v in versions.items() if c in known and v > known[c]]
+    if newer: raise RestoreError(f"Schema mais novo que o código: {', '.join(newer)}")
+    return versions
+
+# ====================================================
+# ♻️ HOT RESTORE
+# ====================================================
+async def hot_restore(bot, upload_path):
+    """
+    Restaura o banco sem reiniciar o bot:
+    valida -> atualiza o schema do candidato -> pausa a fila -> troca o arquivo -> reaquece caches -> retoma.
+    Snapshot particionado (.tar): a pasta das guilds é trocada junto (a anterior fica ao lado, como o banco).
+    Retorna um dict com o resumo (tempo de pausa em ms, migrações aplicadas, arquivo antigo).
+    """
+    # Outros processos do launcher têm o arquivo aberto: trocar por baixo deles corromperia o banco
+    cluster = getattr(bot, 'cluster', None)
+    if cluster and cluster.multi:
+        raise RestoreError("Hot restore indisponível no modo cluster (CLUSTER_COUNT > 1). Pare o launcher e restaure com um único processo.")
+
+    db_path = bot.db.path
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    candidate_path = f"{db_path}.restore-{stamp}"
+    old_path = f"{db_path}.pre-restore-{stamp}"
+    partitions = getattr(bot, 'partitions', None)
+    guild_dir = None
+    guild_files = 0
+
+    try:
+        # 1. Descomprime e valida fora do event loop
+        guild_dir = await asyncio.to_thread(_decompress, upload_path, candidate_path)
+        versions = await asyncio.to_thread(_validate, candidate_path)
+        if guild_dir:
+            if not (partitions and partitions.enabled):
+                raise RestoreError("Snapshot com arquivos por guild: ative DB_PARTITION=1 para restaurá-lo.")
+            guild_files = await asyncio.to_thread(_validate_guilds, guild_dir)
+        print(f"🔍 [RESTORE] Candidato válido. Versões: {versions or 'sem schema_version (legado)'}"
+              + (f" | {guild_files} arquivos de guild" if guild_dir else ""))
+
+        # 2. Aplica migrações pendentes no candidato (o bot continua usando o banco atual)
+        async with aiosqlite.connect(candidate_path) as db:
+            migrated = await upgrade_all(db)
+            await sync_tier_manifest(db) # Backup antigo pode ter um manifesto de tiers anterior
+            await db.execute("PRAGMA journal_mode = WAL")
+            await db.commit()
+    except Exception:
+        if os.path.exists(candidate_path): os.remove(candidate_path)
+        if guild_dir: shutil.rmtree(guild_dir, ignore_errors=True)
+        raise
+
+    # 3. Pausa -> troca -> reaquece -> retoma (é aqui que as guilds sentem a pausa)
+    # O lock do backup evita um snapshot no meio da troca
+    backup_lock = bot.backup_service.lock if getattr(bot, 'backup_service', None) else asyncio.Lock()
+    async with backup_lock:
+        started = time.perf_counter()
+        # Pasta das guilds primeiro: um cog com a guild aberta pode estar esperando a fila central
+        if guild_dir:
+            try:
+                await partitions.swap_dir(guild_dir, keep_old_as=f"{partitions.partition_dir}.pre-restore-{stamp}")
+            except Exception:
+                if os.path.exists(candidate_path): os.remove(candidate_path)
+                shutil.rmtree(guild_dir, ignore_errors=True)
+                raise
+        await bot.write_queue.pause()
+        try:
+            await bot.db.swap_file(candidate_path, keep_old_as=old_path)
+            await load_schema_versions(bot.db)
+            await rewarm_caches(bot)
+        except Exception:
+            if os.path.exists(candidate_path): os.remove(candidate_path)
+            raise
+        finally:
+            bot.write_queue.resume()
+    paused_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    print(f"♻️ [RESTORE] Banco restaurado em {paused_ms}ms de pausa. Anterior salvo em {old_path}")
+    return {"paused_ms": paused_ms, "migrations": migrated, "previous": os.path.basename(old_path), "guild_files": guild_files}
+
+async def rewarm_caches(bot):
+    if getattr(bot, 'licenses', None): await bot.licenses.load_all()
+    if bot.config_cache:
+        bot.config_cache.invalidate()
+        await bot.config_cache.load_all()
+    if getattr(bot, 'router', None): await bot.router.load_all()
+    await bot.load_tier_permissions()
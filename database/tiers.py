@@ -0,0 +1,108 @@
+import datetime
+import hashlib
+import json
+import re
+from utils import json_codec
+
+# ====================================================
+# 💎 MANIFESTO DE TIERS (Padrões publicados com o código)
+# ====================================================
+# Para mudar os módulos padrão de um plano: edite TIERS e suba TIER_MANIFEST_VERSION.
+# No boot, o hash do manifesto é comparado com o gravado no banco; só quando muda
+# é feito o merge (o que entrou é inserido, o que saiu é removido). Edições do dono
+# pelo painel (módulos extras ou removidos de um plano) são preservadas.
+
+TIER_MANIFEST_VERSION = 1
+
+# Mapeamento oficial solicitado
+# 'Sorteio' -> 'giveaway_system'
+# 'Factionactions' -> 'faction_actions'
+# 'Timessheet' -> 'timesheet'
+TIERS = {
+    'start': [
+        'admin', 'embed_creator', 'general', 'logs', 'tickets', 'webserver', 'welcome'
+    ],
+    'faction': [
+        'admin', 'embed_creator', 'faction_actions', 'general', 'hierarchy', 'logs',
+        'punishments', 'sales', 'setagem', 'sorteio', 'streaming', 'suggestions',
+        'tickets', 'timesheet', 'webserver', 'welcome'
+    ],
+    'police': [
+        'admin', 'embed_creator', 'faction_actions', 'general', 'hierarchy', 'logs',
+        'punishments', 'setagem', 'sorteio', 'staff_stats', 'streaming',
+        'suggestions', 'tickets', 'webserver', 'welcome'
+    ],
+    'v8': [
+        'admin', 'bugs', 'embed_creator', 'faction_actions', 'general', 'hierarchy',
+        'logs', 'punishments', 'setagem', 'sorteio', 'staff_stats',
+        'streaming', 'suggestions', 'tickets', 'verification', 'webserver', 'welcome'
+    ]
+}
+
+def manifest_pairs(tiers=TIERS):
+    return {(tier, module) for tier, modules in tiers.items() for module in modules}
+
+def manifest_hash(tiers=TIERS):
+    canonical = json.dumps(sorted(manifest_pairs(tiers)), separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+MANIFEST_UPSERT = """
+    INSERT INTO tier_manifest (id, version, hash, pairs, applied_at) VALUES (1, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET version = excluded.version, hash = excluded.hash,
+    pairs = excluded.pairs, applied_at = excluded.applied_at
+"""
+
+async def sync_tier_manifest(db, write_queue=None):
+    """
+    Aplica o manifesto se o hash mudou. Retorna (adicionados, removidos) ou None se já estava em dia.
+    Sem write_queue (ex: candidato do restore), escreve direto na conexão e commita.
+    """
+    digest = manifest_hash()
+    async with db.execute("SELECT hash, pairs FROM tier_manifest WHERE id = 1") as cursor:
+        row = await cursor.fetchone()
+    if row and row[0] == digest: return None # Nada mudou: zero escritas
+
+    shipped = manifest_pairs()
+    # Primeira vez: a migração v4 já semeou exatamente este manifesto, só registra o hash
+    previous = {tuple(pair) for pair in json_codec.loads(row[1])} if row and row[1] else shipped
+    added = sorted(shipped - previous)
+    removed = sorted(previous - shipped)
+
+    async def merge(conn):
+        if added:
+            await conn.executemany("INSERT OR IGNORE INTO tier_definitions (tier_name, module_name) VALUES (?, ?)", added)
+        if removed:
+            await conn.executemany("DELETE FROM tier_definitions WHERE tier_name = ? AND module_name = ?", removed)
+        await conn.execute(MANIFEST_UPSERT, (TIER_MANIFEST_VERSION, digest, json_codec.dumps(sorted(shipped)),
+                                             datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    if write_queue:
+        await write_queue.run(merge)
+    else:
+        await merge(db)
+        await db.commit()
+
+    print(f"💎 [TIERS] Manifesto v{TIER_MANIFEST_VERSION} aplicado: +{len(added)} / -{len(removed)} regras.")
+    return added, removed
+
+# ====================================================
+# 📡 PUB/SUB (tier_map acompanha as escritas em tier_definitions)
+# ====================================================
+TIER_WRITE = re.compile(r"^\s*(?:UPDATE(?:\s+OR\s+\w+)?|INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|DELETE\s+FROM)\s+tier_definitions\b", re.IGNORECASE)
+TIER_INSERT = re.compile(r"^\s*INSERT(?:\s+OR\s+IGNORE)?\s+INTO\s+tier_definitions\s*\(\s*tier_name\s*,\s*module_name\s*\)\s*VALUES\s*\(\s*\?\s*,\s*\?\s*\)\s*$", re.IGNORECASE)
+TIER_DELETE = re.compile(r"^\s*DELETE\s+FROM\s+tier_definitions\s+WHERE\s+tier_name\s*=\s*\?\s+AND\s+module_name\s*=\s*\?\s*$", re.IGNORECASE)
+
+def apply_tier_write(tier_map, sql, parameters=None, many=False):
+    """
+    Listener de escrita do DatabasePool. Aplica INSERT/DELETE de um par (tier, módulo) direto no mapa.
+    Retorna None (não é tier_definitions), True (aplicado) ou False (escrita desconhecida: recarregar tudo).
+    """
+    if not TIER_WRITE.match(sql): return None
+    insert = TIER_INSERT.match(sql)
+    if not insert and not TIER_DELETE.match(sql): return False
+
+    for tier, module in (parameters if many else [parameters]):
+        modules = tier_map.setdefault(tier, [])
+        if insert and module not in modules: modules.append(module)
+        elif not insert and module in modules: modules.remove(module)
+    return True
@@ -0,0 +1,179 @@
+import asyncio
+import os
+
+# ====================================================
+# ⚙️ CONFIGURAÇÃO DO GROUP COMMIT (Configurável via .env)
+# ====================================================
+DB_COMMIT_WINDOW_MS = int(os.getenv('DB_COMMIT_WINDOW_MS', 25))     # Janela máxima de espera por lote
+DB_COMMIT_MAX_BATCH = int(os.getenv('DB_COMMIT_MAX_BATCH', 200))    # Máximo de escritas por commit
+
+# ====================================================
+# 📝 FILA DE ESCRITA (Write-Behind + Group Commit)
+# ====================================================
+class WriteQueue:
+    """
+    Junta as escritas de todos os cogs e faz um único commit por janela (tempo ou tamanho).
+    - enqueue(): agenda a escrita e retorna um Future (fire-and-forget se ninguém aguardar).
+    - execute(): agenda e aguarda o commit durável. Retorna o lastrowid do comando.
+    - transaction(): agenda vários comandos que entram (ou falham) juntos no mesmo commit.
+    - run(): executa fn(db) dentro de um lote e retorna o resultado (ex: DELETE em blocos que precisa do rowcount).
+      Tudo ou nada como transaction(): se fn levantar exceção, as escritas dele são desfeitas.
+    Durante o lote o escritor fica reservado (DatabasePool.exclusive): commits diretos dos cogs esperam.
+    - flush(): aguarda tudo que já foi enfileirado estar commitado.
+    - pause()/resume(): segura os commits (as escritas continuam entrando na fila). Usado no hot restore.
+    """
+    def __init__(self, db, window_ms=DB_COMMIT_WINDOW_MS, max_batch=DB_COMMIT_MAX_BATCH, verbose=True):
+        self.db = db
+        self.verbose = verbose
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.queue = asyncio.Queue()
+        self.task = None
+        self.stats = {"batches": 0, "writes": 0, "errors": 0}
+        self.running = asyncio.Event()
+        self.running.set()
+        self.commit_lock = asyncio.Lock()
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._worker())
+        return self
+
+    def enqueue(self, sql, parameters=None, many=False):
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(self._log_failure)
+        self.queue.put_nowait((sql, parameters, many, fut))
+        return fut
+
+    async def execute(self, sql, parameters=None):
+        return await self.enqueue(sql, parameters)
+
+    async def executemany(self, sql, parameters):
+        return await self.enqueue(sql, list(parameters), many=True)
+
+    async def transaction(self, statements):
+        """statements: [(sql, params), ...]. Tudo ou nada (SAVEPOINT dentro do lote)."""
+        return await self.enqueue(list(statements))
+
+    async def run(self, fn):
+        """fn: async (db) -> resultado. Roda no escritor, entre as outras escritas do lote (SAVEPOINT próprio)."""
+        return await self.enqueue(fn)
+
+    async def flush(self):
+        # Barreira: só resolve depois que tudo antes dela foi commitado
+        if not self.task or self.task.done(): return
+        await self.enqueue(None)
+
+    async def pause(self):
+        """Para de commitar e espera o lote em andamento terminar."""
+        self.running.clear()
+        async with self.commit_lock: pass
+
+    def resume(self):
+        self.running.set()
+
+    @property
+    def paused(self):
+        return not self.running.is_set()
+
+    async def close(self):
+        if not self.task or self.task.done(): return
+        self.resume()
+        await self.flush()
+        self.task.cancel()
+        try: await self.task
+        except asyncio.CancelledError: pass
+        self.task = None
+        if self.verbose: print(f"💾 [WRITE QUEUE] Fila esvaziada. Lotes: {self.stats['batches']} | Escritas: {self.stats['writes']}")
+
+    def _log_failure(self, fut):
+        if fut.cancelled(): return
+        e = fut.exception()
+        if e: print(f"❌ [WRITE QUEUE] Falha em escrita enfileirada: {e}")
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+
+            # Junta o que chegar dentro da janela (ou até encher o lote)
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0: break
+                try: batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError: break
+
+            # Pausado (ex: troca do arquivo do banco): segura o lote até liberar
+            while True:
+                await self.running.wait()
+                async with self.commit_lock:
+                    if not self.running.is_set(): continue
+                    await self._commit_batch(batch)
+                    break
+
+    async def _commit_batch(self, batch):
+        # Passa pelo pool: escritas vão para o escritor e disparam os listeners (cache de config)
+        writer = self.db
+        results = []
+
+        # Escritor reservado até o commit: commit direto de um cog espera o lote inteiro
+        async with writer.exclusive():
+            for sql, parameters, many, fut in batch:
+                if sql is None:
+                    results.append((fut, None, None))
+                    continue
+                try:
+                    if isinstance(sql, list): results.append((fut, await self._run_group(writer, sql), None))
+                    elif callable(sql): results.append((fut, await self._savepoint(writer, lambda fn=sql: fn(writer)), None))
+                    else:
+                        if many: cursor = await writer.executemany(sql, parameters)
+                        else: cursor = await writer.execute(sql, parameters)
+                        results.append((fut, cursor.lastrowid, None))
+                        await cursor.close()
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    results.append((fut, None, e))
+
+            commit_error = None
+            try:
+                await writer.commit()
+            except Exception as e:
+                commit_error = e
+                print(f"❌ [WRITE QUEUE] Falha no commit do lote ({len(batch)} escritas): {e}")
+
+        self.stats["batches"] += 1
+        self.stats["writes"] += len(batch)
+
+        for fut, result, error in results:
+            if fut.done(): continue
+            error = error or commit_error
+            if error: fut.set_exception(error)
+            else: fut.set_result(result)
+
+    @staticmethod
+    async def _run_sql(writer, sql, parameters=None):
+        cursor = await writer.execute(sql, parameters)
+        lastrowid = cursor.lastrowid
+        await cursor.close()
+        return lastrowid
+
+    async def _savepoint(self, writer, body):
+        # SAVEPOINT: se um comando do grupo (ou o fn) falhar, desfaz só ele (o resto do lote segue)
+        await self._run_sql(writer, "SAVEPOINT write_group")
+        try:
+            result = await body()
+        except Exception:
+            await self._run_sql(writer, "ROLLBACK TO write_group")
+            await self._run_sql(writer, "RELEASE write_group")
+            raise
+        await self._run_sql(writer, "RELEASE write_group")
+        return result
+
+    async def _run_group(self, writer, statements):
+        async def body():
+            lastrowid = None
+            for sql, parameters in statements:
+                lastrowid = await self._run_sql(writer, sql, parameters)
+            return lastrowid
+        return await self._savepoint(writer, body)
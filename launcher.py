@@ -0,0 +1,91 @@
+import asyncio
+import math
+import os
+import signal
+import sys
+import aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ====================================================
+# 🛰️ LAUNCHER DO CLUSTER (Configurável via .env)
+# ====================================================
+# Sobe CLUSTER_COUNT processos do main.py, cada um com uma faixa de shards (AutoShardedBot).
+# Todos usam o mesmo banco (WAL + WriteQueue em cada processo); o processo 0 é o primário
+# (painel, backup, manutenção). Uso: python launcher.py
+TOKEN = os.getenv('DISCORD_TOKEN')
+CLUSTER_COUNT = int(os.getenv('CLUSTER_COUNT', 2))                # Processos
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0))                    # 0 = recomendado pelo Discord
+CLUSTER_STAGGER = float(os.getenv('CLUSTER_STAGGER', 5))          # Segundos por shard antes de subir o próximo processo (IDENTIFY)
+CLUSTER_RESTART_DELAY = float(os.getenv('CLUSTER_RESTART_DELAY', 10)) # Espera antes de reiniciar um processo que caiu
+
+async def recommended_shards():
+    async with aiohttp.ClientSession() as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot", headers={"Authorization": f"Bot {TOKEN}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"]
+
+def shard_ranges(total, clusters):
+    """Faixas contíguas: 10 shards em 3 processos -> [0-3], [4-7], [8-9]."""
+    size = math.ceil(total / clusters)
+    return [list(range(start, min(start + size, total))) for start in range(0, total, size)]
+
+class Launcher:
+    def __init__(self, total, ranges):
+        self.total = total
+        self.ranges = ranges
+        self.procs = {}
+        self.stopping = False
+
+    def worker_env(self, cluster_id, shard_ids):
+        env = dict(os.environ)
+        env.update({
+            "BOT_SHARDED": "1",
+            "SHARD_COUNT": str(self.total),
+            "SHARD_IDS": ",".join(str(s) for s in shard_ids),
+            "CLUSTER_ID": str(cluster_id),
+            "CLUSTER_COUNT": str(len(self.ranges)),
+        })
+        return env
+
+    async def run_worker(self, cluster_id, shard_ids):
+        while not self.stopping:
+            print(f"🚀 [LAUNCHER] Cluster {cluster_id}: shards {shard_ids[0]}-{shard_ids[-1]} de {self.total}.")
+            proc = await asyncio.create_subprocess_exec(sys.executable, "main.py", env=self.worker_env(cluster_id, shard_ids))
+            self.procs[cluster_id] = proc
+            code = await proc.wait()
+            if self.stopping: return
+            print(f"⚠️ [LAUNCHER] Cluster {cluster_id} saiu (código {code}). Reiniciando em {CLUSTER_RESTART_DELAY}s...")
+            await asyncio.sleep(CLUSTER_RESTART_DELAY)
+
+    async def run(self):
+        tasks = []
+        for cluster_id, shard_ids in enumerate(self.ranges):
+            tasks.append(asyncio.create_task(self.run_worker(cluster_id, shard_ids)))
+            # O primário roda as migrações e os IDENTIFY são limitados: o próximo processo espera
+            if cluster_id < len(self.ranges) - 1: await asyncio.sleep(CLUSTER_STAGGER * len(shard_ids))
+        await asyncio.gather(*tasks)
+
+    def stop(self):
+        self.stopping = True
+        for proc in self.procs.values():
+            if proc.returncode is None: proc.terminate()
+
+async def main():
+    total = SHARD_COUNT or await recommended_shards()
+    clusters = max(1, min(CLUSTER_COUNT, total))
+    ranges = shard_ranges(total, clusters)
+    print(f"🛰️ [LAUNCHER] {total} shards em {len(ranges)} processos.")
+
+    launcher = Launcher(total, ranges)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try: loop.add_signal_handler(sig, launcher.stop)
+        except NotImplementedError: pass # Windows: Ctrl+C chega direto nos filhos
+    await launcher.run()
+    print("🛑 [LAUNCHER] Todos os processos encerrados.")
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -8,6 +8,7 @@ if os.path.exists("/app/.lib"):
 
 import discord
 import asyncio
+import time
 import traceback
 from discord.ext import commands
 from dotenv import load_dotenv
@@ -16,7 +17,22 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Importação completa do banco de dados
-from database.bot_db import create_db, get_db_connection, check_guild_config
+from database.bot_db import create_db, get_db_connection, bootstrap_guild_configs, DB_NAME
+from database.write_queue import WriteQueue
+from database.backup import BackupService
+from database.purge import PurgeEngine
+from database.maintenance import MaintenanceService
+from database.archive import ArchiveService
+from database.counters import CounterService
+from database.partitions import PartitionManager
+from database.tiers import sync_tier_manifest, apply_tier_write
+from utils.config_cache import GuildConfigCache
+from utils.license_manager import LicenseService
+from utils.message_router import MessageRouter
+from utils.module_gate import ModuleGate
+from utils.gateway_profile import GatewayProfile
+from utils.cluster import ClusterService, BOT_SHARDED, CLUSTER_ID, shard_kwargs
+from utils.scheduler import Scheduler
 from dashboard.app import init_dashboard, run_dashboard
 TOKEN = os.getenv('DISCORD_TOKEN')
 
@@ -25,7 +41,9 @@ TOKEN = os.getenv('DISCORD_TOKEN')
 # ====================================================
 # Isso exige que as 3 chaves (Presence, Server Members, Message Content)
 # estejam ativadas no Discord Developer Portal.
-intents = discord.Intents.all()
+# GATEWAY_PROFILE=auto: só os intents/cache de membros dos módulos licenciados (lidos do banco no boot).
+gateway = GatewayProfile.from_database(DB_NAME)
+intents = gateway.intents
 
 import logging
 from collections import deque
@@ -48,15 +66,40 @@ console_handler = ListLogHandler()
 console_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s', datefmt='%d/%m/%Y %H:%M:%S'))
 logging.getLogger().addHandler(console_handler)
 
-class CityBot(commands.Bot):
+# BOT_SHARDED=1: AutoShardedBot (vários shards num processo). O launcher.py divide os shards entre processos.
+class CityBot(commands.AutoShardedBot if BOT_SHARDED else commands.Bot):
     def __init__(self):
-        super().__init__(command_prefix='!', intents=intents, help_command=None, case_insensitive=True)
+        super().__init__(command_prefix='!', intents=intents, help_command=None, case_insensitive=True,
+                         member_cache_flags=gateway.member_cache_flags, chunk_guilds_at_startup=gateway.chunk_at_startup,
+                         **shard_kwargs())
+        self.gateway = gateway # Perfil de intents + chunk de membros sob demanda
         self.db = None
+        self.write_queue = None # Group Commit (escritas em lote)
+        self.config_cache = None # Config por guild em memória
+        self.backup_service = None # Snapshots online do banco
+        self.purge_engine = None # Limpeza de dados de guilds em background
+        self.maintenance = None # ANALYZE, vacuum incremental e checkpoints
+        self.cluster = ClusterService(self) # Shards deste processo + sincronização com os outros (launcher.py)
+        self.archive = None # Retenção: histórico antigo vai para o arquivo frio
+        self.counters = None # Numeração de tickets/bugs/sugestões
+        self.licenses = None # Licenças em memória + agenda de vencimentos
+        self.partitions = None # Histórico por guild em arquivos próprios (DB_PARTITION=1)
+        self.router = None # on_message único: índice canal -> módulo
+        self.module_gate = None # Bitmap por guild dos módulos liberados (listeners consultam antes de trabalhar)
+        self.scheduler = None # Tarefas periódicas dos cogs: guilds espalhadas no intervalo + orçamento de concorrência
         self.synced = False
         self.maintenance_mode = False # Flag do Modo Manutenção
         self.log_handler = console_handler # Referência para o Dashboard acessar
         self.tier_map = {} # Permissões Dinâmicas
 
+    def _on_tier_write(self, sql, parameters=None, many=False):
+        """Pub/sub: escritas em tier_definitions (painel, manifesto) atualizam o tier_map na hora."""
+        applied = apply_tier_write(self.tier_map, sql, parameters, many)
+        if applied is False:
+            asyncio.get_running_loop().create_task(self.load_tier_permissions()) # Escrita em lote: relê tudo
+        elif applied and self.module_gate:
+            self.module_gate.rebuild()
+
     async def load_tier_permissions(self):
         """Carrega as permissões de tiers do banco de dados."""
         if not self.db: return
@@ -72,6 +115,7 @@ class CityBot(commands.Bot):
                 new_map[tier].append(module)
                 
             self.tier_map = new_map
+            if self.module_gate: self.module_gate.rebuild()
             print(f"✅ [TIERS] Definições carregadas: {len(rows)} regras.")
         except Exception as e:
             print(f"❌ [TIERS] Falha ao carregar tiers: {e}")
@@ -81,7 +125,10 @@ class CityBot(commands.Bot):
     # ====================================================
     async def on_message(self, message):
         if message.author.bot: return
-        
+
+        # Módulos que escutam canais (streaming, sugestões...): 1 lookup no índice, sem await
+        if self.router: self.router.dispatch(message)
+
         # Apenas administradores
         if message.content == "!fix_bot" and message.author.guild_permissions.administrator:
             status_msg = await message.channel.send("🚨 **Iniciando Correção de Comandos...**")
@@ -140,8 +187,11 @@ class CityBot(commands.Bot):
 
 
     async def on_guild_join(self, guild):
-        """Sincroniza comandos automaticamente ao entrar em um novo servidor."""
+        """Cria a config da guild nova (e aquece o cache) e sincroniza os comandos nela."""
         print(f"📥 [AUTO-SYNC] Entrou em: {guild.name} ({guild.id})")
+        # Config primeiro: o primeiro comando usado já encontra a linha no banco/cache
+        if self.db:
+            await self.bootstrap_guilds([guild])
         try:
             self.tree.copy_global_to(guild=guild)
             await self.tree.sync(guild=guild)
@@ -172,17 +222,15 @@ class CityBot(commands.Bot):
         # Dono Bypass
         if interaction.user.id == int(os.getenv('OWNER_ID', 0)): return True
 
-        # Verifica Banco
-        guild_id = interaction.guild.id
-        async with self.db.execute("SELECT status, tier FROM licenses WHERE guild_id = ?", (guild_id,)) as cursor:
-            row = await cursor.fetchone()
+        # Licença em memória (LicenseService): nenhuma query por comando
+        lic = self.licenses.get(interaction.guild.id) if self.licenses else None
 
-        if not row:
+        if not lic:
             await interaction.response.send_message("🔒 **Este servidor não possui uma licença ativa.**", ephemeral=True)
             return False
 
-        status, tier = row
-        if status != 'active':
+        tier = lic['tier']
+        if lic['state'] == 'locked':
              await interaction.response.send_message("🔒 **Licença Suspensa ou Expirada.**", ephemeral=True)
              return False
 
@@ -249,11 +297,55 @@ class CityBot(commands.Bot):
         # 1. Inicia Banco de Dados
         await create_db()
         self.db = await get_db_connection()
+        self.write_queue = WriteQueue(self.db).start()
+        self.partitions = PartitionManager(self.db, self.write_queue)
+        self.backup_service = BackupService(DB_NAME, partitions=self.partitions)
+        self.archive = ArchiveService(self.db, self.write_queue, partitions=self.partitions)
+        self.counters = CounterService(self.db, self.write_queue)
+        self.purge_engine = PurgeEngine(self.db, self.write_queue, self.cluster.active_guilds, self.archive, partitions=self.partitions,
+                                        inactive_blocker=self.cluster.inactive_purge_blocker)
+        self.maintenance = MaintenanceService(self.db, self.write_queue, self.backup_service.lock, self.archive,
+                                              multi_process=self.cluster.multi)
+        # Tarefas do arquivo inteiro (snapshots, checkpoint, vacuum, retenção) rodam só no processo primário
+        if self.cluster.primary:
+            self.backup_service.start()
+            self.maintenance.start()
+        self.db.write_listeners.append(self.cluster.on_write)
+        self.cluster.start()
         print("✅ [DATABASE] Conexão estabelecida.")
 
-        # 1.1 Carrega Tiers
+        # 0.9 Licenças em memória (1 query) + agenda de vencimento/carência
+        self.licenses = LicenseService(self.db, self.write_queue)
+        await self.licenses.load_all()
+        self.licenses.start()
+        self.db.write_listeners.append(self.licenses.on_write)
+
+        # 0.9.1 Portão de módulos: bitmap por guild (licença x tier), recalculado a cada mudança de licença/tier
+        self.module_gate = ModuleGate(self.licenses, lambda: self.tier_map)
+        self.licenses.listeners.append(self.module_gate.refresh)
+        self.licenses.listeners.append(self._chunk_licensed_guild)
+
+        # 1.0 Cache de Config (1 query) + invalidação automática em toda escrita na tabela config
+        self.config_cache = GuildConfigCache(self.db)
+        self.db.write_listeners.append(self.config_cache.on_write)
+        await self.config_cache.load_all()
+
+        # 1.0.1 Roteador de mensagens: índice canal -> módulo, refeito por guild a cada escrita na config
+        self.router = MessageRouter(self.db, self.module_gate)
+        self.db.write_listeners.append(self.router.on_write)
+        await self.router.load_all()
+
+        # 1.1 Carrega Tiers (manifesto só é aplicado se o hash mudou) e assina as escritas
+        try:
+            await sync_tier_manifest(self.db, self.write_queue)
+        except Exception as e:
+            print(f"❌ [TIERS] Falha ao aplicar o manifesto: {e}")
         await self.load_tier_permissions()
+        self.db.write_listeners.append(self._on_tier_write)
         
+        # 1.2 Agendador central (os cogs registram os jobs no load)
+        self.scheduler = Scheduler(self)
+
         # Setagem do Global Interaction Check
         # O discord.py chama bot.interaction_check para todo slash command
         self.tree.interaction_check = self.interaction_check
@@ -270,10 +362,13 @@ class CityBot(commands.Bot):
                         print(f'   └─ ❌ FALHA CRÍTICA em {filename}:')
                         traceback.print_exc()
 
-        # 3. Inicia Painel Web (Background Task)
-        print("🌐 [SYSTEM] Iniciando Dashboard...")
-        init_dashboard(self)
-        self.loop.create_task(run_dashboard())
+        # 3. Inicia Painel Web (Background Task) — só no primário (uma porta, uma instância)
+        if self.cluster.primary:
+            print("🌐 [SYSTEM] Iniciando Dashboard...")
+            init_dashboard(self)
+            self.loop.create_task(run_dashboard())
+        else:
+            print(f"🛰️ [SYSTEM] Cluster {CLUSTER_ID}: painel fica no processo primário.")
 
         # 4. Sincroniza Comandos (/)
         print("☁️ [SYSTEM] Auto-Sync Global desativado para evitar duplicatas.")
@@ -284,6 +379,13 @@ class CityBot(commands.Bot):
         #     print(f"⚠️ [SYSTEM] Aviso na sincronização (Rate Limit ou Erro): {e}")
 
     async def close(self):
+        if self.scheduler: await self.scheduler.close()
+        if self.cluster: await self.cluster.close()
+        if self.maintenance: await self.maintenance.close()
+        if self.licenses: await self.licenses.close()
+        if self.backup_service: await self.backup_service.close()
+        if self.partitions: await self.partitions.close()
+        if self.write_queue: await self.write_queue.close()
         if self.db: await self.db.close()
         await super().close()
 
@@ -295,13 +397,15 @@ class CityBot(commands.Bot):
         ╚════════════════════════════════════════╝
         ''')
         
-        # 4. Verifica Configurações dos Servidores
+        # 4. Verifica Configurações dos Servidores (em lote) e aquece os caches
         print("🔍 [SYSTEM] Verificando configurações dos servidores...")
-        for guild in self.guilds:
-            if self.db:
-                await check_guild_config(guild.id, self.db)
-        print(f"✅ [SYSTEM] Configurações validadas para {len(self.guilds)} servidores.")
+        if self.db:
+            await self.bootstrap_guilds(self.guilds)
         
+        # 4.1 Guilds com streaming/logs: listeners de presença/membro só veem membros em cache
+        if self.module_gate:
+            asyncio.create_task(self.gateway.chunk_listener_guilds(list(self.guilds), self.module_gate.modules))
+
         # 5. Define Status
         try:
             await self.change_presence(activity=discord.Game(name="Gerenciando a Cidade"), status=discord.Status.online)
@@ -309,10 +413,35 @@ class CityBot(commands.Bot):
         except Exception as e:
             print(f"⚠️ [SYSTEM] Não foi possível definir status: {e}")
 
-    async def on_guild_join(self, guild):
-        print(f"➕ [GUILD JOIN] Novo servidor: {guild.name} (ID: {guild.id})")
-        if self.db:
-            await check_guild_config(guild.id, self.db)
+    def _chunk_licensed_guild(self, guild_id=None):
+        """Listener de licença: guild que passou a ter streaming/logs é baixada sem esperar o próximo boot."""
+        if guild_id is None or not self.is_ready(): return
+        guild = self.get_guild(guild_id)
+        if guild and not guild.chunked and self.gateway.needs_chunk(self.module_gate.modules(guild_id)):
+            asyncio.create_task(self.gateway.ensure_chunked(guild))
+
+    async def bootstrap_guilds(self, guilds):
+        """
+        Diff das guilds contra as chaves de config/licenses:
+        cria só as configs que faltam (1 executemany, 1 commit) e aquece o config_cache.
+        """
+        started = time.perf_counter()
+        guild_ids = [g.id for g in guilds]
+        try:
+            created = await bootstrap_guild_configs(guild_ids, self.db, self.write_queue)
+            if created and self.config_cache:
+                # Várias guilds novas: recarrega tudo em 1 query. Só uma (join): carrega direto ela
+                if len(created) > 1: await self.config_cache.load_all()
+                else: await self.config_cache.get(created[0])
+            licensed = self.licenses.licensed(guild_ids) # Já em memória desde o setup_hook
+        except Exception as e:
+            print(f"❌ [BOOTSTRAP] Falha ao preparar servidores: {e}")
+            traceback.print_exc()
+            return
+
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+        print(f"✅ [BOOTSTRAP] {len(guild_ids)} servidores prontos em {elapsed}ms "
+              f"({len(created)} configs criadas, {len(guild_ids) - len(licensed)} sem licença).")
 
     async def on_guild_remove(self, guild):
         print(f"➖ [GUILD LEAVE] Removido de: {guild.name} (ID: {guild.id})")
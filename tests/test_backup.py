@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import types
+
+from database.backup import BackupService
+from database.restore import _decompress, _validate_guilds
+
+def _make_db(path, value):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE t (v TEXT)")
+    conn.execute("INSERT INTO t (v) VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+
+def _value(path):
+    conn = sqlite3.connect(path)
+    try: return conn.execute("SELECT v FROM t").fetchone()[0]
+    finally: conn.close()
+
+def _partitions(guild_dir, enabled=True):
+    return types.SimpleNamespace(
+        enabled=enabled,
+        guild_ids=lambda: [int(n[:-3]) for n in os.listdir(guild_dir) if n.endswith(".db")],
+        path=lambda guild_id: os.path.join(guild_dir, f"{guild_id}.db"))
+
+def test_plain_snapshot_round_trip(tmp_path):
+    central = str(tmp_path / "bot_data.db")
+    _make_db(central, "central")
+    service = BackupService(central, backup_dir=str(tmp_path / "backups"))
+    snapshot = service._backup_sync()
+    assert snapshot.endswith(".db.gz")
+
+    candidate = str(tmp_path / "candidate.db")
+    assert _decompress(snapshot, candidate) is None
+    assert _value(candidate) == "central"
+
+def test_partitioned_snapshot_includes_guild_files(tmp_path):
+    central = str(tmp_path / "bot_data.db")
+    guild_dir = tmp_path / "guilds"
+    guild_dir.mkdir()
+    _make_db(central, "central")
+    _make_db(str(guild_dir / "111.db"), "g111")
+    _make_db(str(guild_dir / "222.db"), "g222")
+
+    service = BackupService(central, backup_dir=str(tmp_path / "backups"), partitions=_partitions(str(guild_dir)))
+    snapshot = service._backup_sync()
+    assert snapshot.endswith(".tar.gz")
+    assert service.latest() == snapshot
+
+    candidate = str(tmp_path / "candidate.db")
+    restored = _decompress(snapshot, candidate)
+    assert _value(candidate) == "central"
+    assert sorted(os.listdir(restored)) == ["111.db", "222.db"]
+    assert _validate_guilds(restored) == 2
+    assert _value(os.path.join(restored, "222.db")) == "g222"
+
+def test_partitions_disabled_keeps_plain_snapshot(tmp_path):
+    central = str(tmp_path / "bot_data.db")
+    guild_dir = tmp_path / "guilds"
+    guild_dir.mkdir()
+    _make_db(central, "central")
+    _make_db(str(guild_dir / "111.db"), "g111")
+    service = BackupService(central, backup_dir=str(tmp_path / "backups"), partitions=_partitions(str(guild_dir), enabled=False))
+    assert service._backup_sync().endswith(".db.gz")
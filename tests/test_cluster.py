@@ -0,0 +1,43 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+from database.purge import PurgeEngine
+from utils.cluster import ClusterService
+
+def _cluster(count=3):
+    bot = types.SimpleNamespace(guilds=[])
+    return ClusterService(bot, cluster_id=0, cluster_count=count, interval=10)
+
+def test_single_process_never_blocks():
+    assert _cluster(count=1).inactive_purge_blocker() is None
+
+def test_blocks_until_every_cluster_is_fresh():
+    cluster = _cluster()
+    now = time.time()
+    cluster.last_seen = {0: now, 1: now}
+    assert "2" in cluster.inactive_purge_blocker()
+    cluster.last_seen[2] = now - 3600
+    assert "2" in cluster.inactive_purge_blocker()
+    cluster.last_seen[2] = now
+    assert cluster.inactive_purge_blocker() is None
+
+def test_purge_engine_refuses_inactive_job():
+    cluster = _cluster()
+    engine = PurgeEngine(None, None, cluster.active_guilds, inactive_blocker=cluster.inactive_purge_blocker)
+    with pytest.raises(RuntimeError):
+        engine.submit("inactive")
+    assert not engine.jobs
+
+def test_hot_restore_refused_in_cluster_mode(tmp_path):
+    from database.restore import RestoreError, hot_restore
+    bot = types.SimpleNamespace(cluster=_cluster(), db=types.SimpleNamespace(path=str(tmp_path / "bot.db")))
+    with pytest.raises(RestoreError):
+        asyncio.run(hot_restore(bot, str(tmp_path / "upload.db")))
+
+def test_maintenance_skips_vacuum_in_cluster_mode():
+    from database.maintenance import MaintenanceService
+    service = MaintenanceService(None, None, multi_process=True)
+    assert asyncio.run(service.incremental_vacuum()) == 0
@@ -0,0 +1,88 @@
+import asyncio
+
+import aiosqlite
+
+from database.config_store import add_config_columns, module_config, module_tables, split_config
+
+async def _legacy(path):
+    db = await aiosqlite.connect(path)
+    await db.execute("""
+        CREATE TABLE config (
+            guild_id INTEGER PRIMARY KEY,
+            welcome_channel_id INTEGER,
+            ticket_category_id INTEGER,
+            prefix TEXT DEFAULT '!'
+        )
+    """)
+    await db.execute("INSERT INTO config (guild_id, welcome_channel_id, ticket_category_id) VALUES (1, 10, 20)")
+    await db.commit()
+    await split_config(db)
+    await db.commit()
+    return db
+
+def test_split_moves_columns_to_module_tables(tmp_path):
+    async def scenario():
+        db = await _legacy(str(tmp_path / "bot.db"))
+        try:
+            tables = await module_tables(db)
+            assert {"general", "welcome", "tickets"} <= set(tables)
+            assert await module_config(db, 1, "welcome") == {"guild_id": 1, "welcome_channel_id": 10}
+            rows = await db.execute_fetchall("SELECT guild_id, welcome_channel_id, ticket_category_id, prefix FROM config")
+            assert rows == [(1, 10, 20, '!')]
+        finally:
+            await db.close()
+    asyncio.run(scenario())
+
+def test_view_triggers_write_through(tmp_path):
+    async def scenario():
+        db = await _legacy(str(tmp_path / "bot.db"))
+        try:
+            await db.execute("INSERT OR IGNORE INTO config (guild_id) VALUES (2)")
+            await db.execute("UPDATE config SET ticket_category_id = 30 WHERE guild_id = 2")
+            await db.execute("DELETE FROM config WHERE guild_id = 1")
+            await db.commit()
+            rows = await db.execute_fetchall("SELECT guild_id, ticket_category_id, prefix FROM config")
+            assert rows == [(2, 30, '!')]
+            assert await db.execute_fetchall("SELECT guild_id FROM config_welcome") == [(2,)]
+        finally:
+            await db.close()
+    asyncio.run(scenario())
+
+def test_new_column_rebuilds_view(tmp_path):
+    async def scenario():
+        db = await _legacy(str(tmp_path / "bot.db"))
+        try:
+            await add_config_columns(db, [("giveaway_channel_id", "INTEGER")])
+            await db.execute("UPDATE config SET giveaway_channel_id = 5 WHERE guild_id = 1")
+            await db.commit()
+            assert await module_config(db, 1, "giveaway") == {"guild_id": 1, "giveaway_channel_id": 5}
+            rows = await db.execute_fetchall("SELECT welcome_channel_id, giveaway_channel_id FROM config")
+            assert rows == [(10, 5)]
+        finally:
+            await db.close()
+    asyncio.run(scenario())
+
+def test_view_rebuild_is_one_transaction_on_the_pool(tmp_path):
+    from database.bot_db import DatabasePool
+    from database.config_store import build_config_view
+    from database.write_queue import WriteQueue
+
+    async def scenario():
+        path = str(tmp_path / "bot.db")
+        legacy = await _legacy(path)
+        await legacy.close()
+
+        db = await DatabasePool(path, readers=1, verbose=False).open()
+        queue = WriteQueue(db, window_ms=5, verbose=False).start()
+        try:
+            # Escritas da fila durante a troca esperam o COMMIT da view
+            writes = [queue.execute("UPDATE config SET welcome_channel_id = ? WHERE guild_id = 1", (i,)) for i in range(5)]
+            await build_config_view(db)
+            await asyncio.gather(*writes)
+            assert not db.in_transaction
+            rows = await db.execute_fetchall("SELECT welcome_channel_id, ticket_category_id FROM config WHERE guild_id = 1")
+            assert rows == [(4, 20)]
+        finally:
+            await queue.close()
+            await db.close()
+    asyncio.run(scenario())
@@ -0,0 +1,90 @@
+import discord
+import pytest
+
+from database.tiers import TIERS
+from utils.gateway_profile import GatewayProfile, MODULE_INTENTS, licensed_modules
+
+ALL_MODULES = sorted({module for modules in TIERS.values() for module in modules})
+
+@pytest.mark.parametrize("module", ALL_MODULES)
+def test_profile_builds_for_every_tier_module(module):
+    profile = GatewayProfile({module}, mode="auto")
+    assert profile.mode == "auto"
+    for name in MODULE_INTENTS.get(module, ()):
+        assert getattr(profile.intents, name)
+    # joined em cache exige o intent de membros
+    if profile.member_cache_flags.joined: assert profile.intents.members
+
+@pytest.mark.parametrize("tier", sorted(TIERS))
+def test_profile_builds_for_every_tier(tier):
+    profile = GatewayProfile(set(TIERS[tier]), mode="auto")
+    assert profile.intents.guilds and profile.intents.message_content
+
+def test_streaming_uses_presences_and_joined_cache():
+    profile = GatewayProfile({"streaming"}, mode="auto")
+    assert profile.intents.presences and profile.intents.members
+    assert profile.member_cache_flags.joined
+
+def test_missing_database_falls_back_to_full(tmp_path):
+    assert licensed_modules(str(tmp_path / "nope.db")) is None
+    profile = GatewayProfile(None)
+    assert profile.mode == "full"
+    assert profile.intents == discord.Intents.all()
+
+class _Guild:
+    id = 1
+    def __init__(self, cached, remote):
+        self.cached, self.remote, self.fetched = cached, remote, []
+    def get_member(self, user_id):
+        return self.cached.get(user_id)
+    async def fetch_member(self, user_id):
+        self.fetched.append(user_id)
+        if user_id not in self.remote: raise discord.NotFound(_Response(), "Unknown Member")
+        return self.remote[user_id]
+
+class _Response:
+    status = 404
+    reason = "Not Found"
+
+def test_get_or_fetch_member_falls_back_to_api():
+    import asyncio
+    profile = GatewayProfile({"admin"}, mode="auto")
+    guild = _Guild(cached={1: "cached"}, remote={2: "remote"})
+    assert asyncio.run(profile.get_or_fetch_member(guild, 1)) == "cached"
+    assert asyncio.run(profile.get_or_fetch_member(guild, 2)) == "remote"
+    assert asyncio.run(profile.get_or_fetch_member(guild, 3)) is None
+    assert asyncio.run(profile.get_or_fetch_member(guild, None)) is None
+    assert guild.fetched == [2, 3]
+
+LISTENERS_NEEDING_CACHE = ("def on_presence_update", "def on_member_update", "def on_user_update")
+
+def _cog_modules_with_member_listeners():
+    import os
+    cogs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cogs")
+    found = []
+    for name in sorted(os.listdir(cogs_dir)):
+        if not name.endswith(".py"): continue
+        with open(os.path.join(cogs_dir, name), encoding="utf-8") as f:
+            source = f.read()
+        if any(listener in source for listener in LISTENERS_NEEDING_CACHE): found.append(name[:-3])
+    return found
+
+@pytest.mark.parametrize("module", _cog_modules_with_member_listeners())
+def test_member_listener_modules_are_chunked(module):
+    # discord.py descarta PRESENCE_UPDATE / GUILD_MEMBER_UPDATE de membro fora do cache
+    from utils.gateway_profile import MODULE_CHUNK
+    assert module in MODULE_CHUNK
+    profile = GatewayProfile({module}, mode="auto", chunk_at_startup=False)
+    assert profile.needs_chunk([module])
+    assert profile.member_cache_flags.joined
+
+def test_chunk_listener_guilds_only_downloads_licensed_guilds():
+    import asyncio, types
+    profile = GatewayProfile({"streaming", "tickets"}, mode="auto", chunk_at_startup=False)
+    chunked = []
+    def guild(guild_id):
+        async def chunk(): chunked.append(guild_id)
+        return types.SimpleNamespace(id=guild_id, chunked=False, chunk=chunk)
+    modules = {1: ["streaming"], 2: ["tickets"], 3: []}
+    assert asyncio.run(profile.chunk_listener_guilds([guild(1), guild(2), guild(3)], modules.get)) == 1
+    assert chunked == [1]
@@ -0,0 +1,34 @@
+import asyncio
+
+from database.bot_db import DatabasePool
+from database.maintenance import MaintenanceService
+from database.write_queue import WriteQueue
+
+def test_pragma_waits_for_open_cog_transaction(tmp_path):
+    async def scenario():
+        db = await DatabasePool(str(tmp_path / "maint.db"), readers=0, verbose=False).open()
+        await db.execute("CREATE TABLE items (name TEXT)")
+        await db.commit()
+        queue = WriteQueue(db, window_ms=5, verbose=False).start()
+        service = MaintenanceService(db, queue)
+        events = []
+        try:
+            async def cog():
+                await db.execute("INSERT INTO items (name) VALUES ('cog')")
+                await asyncio.sleep(0.1) # Transação aberta enquanto a manutenção tenta rodar
+                await db.rollback()
+                events.append("cog")
+
+            task = asyncio.ensure_future(cog())
+            await asyncio.sleep(0.02)
+            await service._pragma("PRAGMA wal_checkpoint(PASSIVE)")
+            events.append("pragma")
+            await task
+
+            # A manutenção não commitou a escrita do cog (o rollback dele valeu)
+            assert events == ["cog", "pragma"]
+            assert await db.execute_fetchall("SELECT name FROM items") == []
+        finally:
+            await queue.close()
+            await db.close()
+    asyncio.run(scenario())
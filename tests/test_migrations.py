@@ -0,0 +1,56 @@
+import asyncio
+
+import aiosqlite
+
+from database.bot_db import CORE_MIGRATIONS
+from database.migrations import load_schema_versions, run_migrations
+from database.tiers import TIERS
+
+LATEST = max(version for version, _, _ in CORE_MIGRATIONS)
+
+async def _migrate(path):
+    async with aiosqlite.connect(path) as db:
+        versions = await load_schema_versions(db, target={})
+        ran = await run_migrations(db, "core", CORE_MIGRATIONS, versions)
+        return ran, versions
+
+def test_core_migrations_build_a_fresh_database(tmp_path):
+    path = str(tmp_path / "bot.db")
+    ran, versions = asyncio.run(_migrate(path))
+    assert ran == len(CORE_MIGRATIONS)
+    assert versions["core"] == LATEST
+
+    async def check():
+        async with aiosqlite.connect(path) as db:
+            names = {row[0] for row in await db.execute_fetchall("SELECT name FROM sqlite_master")}
+            tiers = await db.execute_fetchall("SELECT DISTINCT tier_name FROM tier_definitions")
+        return names, {row[0] for row in tiers}
+    names, tiers = asyncio.run(check())
+    assert {"config", "config_general", "licenses", "tier_definitions", "counters", "cluster_shards"} <= names
+    assert tiers == set(TIERS)
+
+def test_core_migrations_are_idempotent(tmp_path):
+    path = str(tmp_path / "bot.db")
+    asyncio.run(_migrate(path))
+    ran, versions = asyncio.run(_migrate(path))
+    assert ran == 0
+    assert versions["core"] == LATEST
+
+def test_tier_seed_keeps_custom_tiers(tmp_path):
+    path = str(tmp_path / "bot.db")
+
+    async def legacy():
+        # Banco de antes das migrações versionadas, com um plano editado pelo dono
+        async with aiosqlite.connect(path) as db:
+            await db.execute("CREATE TABLE tier_definitions (tier_name TEXT, module_name TEXT)")
+            await db.executemany("INSERT INTO tier_definitions (tier_name, module_name) VALUES (?, ?)",
+                                 [("start", "admin"), ("start", "sales"), ("custom", "tickets")])
+            await db.commit()
+
+    async def pairs():
+        async with aiosqlite.connect(path) as db:
+            return set(await db.execute_fetchall("SELECT tier_name, module_name FROM tier_definitions"))
+
+    asyncio.run(legacy())
+    asyncio.run(_migrate(path))
+    assert asyncio.run(pairs()) == {("start", "admin"), ("start", "sales"), ("custom", "tickets")}
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from database.bot_db import DatabasePool
+from database.write_queue import WriteQueue
+
+async def _open(tmp_path):
+    db = await DatabasePool(str(tmp_path / "queue.db"), readers=1, verbose=False).open()
+    await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+    await db.commit()
+    return db, WriteQueue(db, window_ms=5, verbose=False).start()
+
+async def _names(db):
+    return sorted(row[0] for row in await db.execute_fetchall("SELECT name FROM items"))
+
+def test_execute_commits_and_returns_lastrowid(tmp_path):
+    async def scenario():
+        db, queue = await _open(tmp_path)
+        try:
+            rowid = await queue.execute("INSERT INTO items (name) VALUES (?)", ("a",))
+            assert rowid == 1
+            assert not db.in_transaction
+            assert await _names(db) == ["a"]
+        finally:
+            await queue.close()
+            await db.close()
+    asyncio.run(scenario())
+
+def test_failed_group_rolls_back_only_itself(tmp_path):
+    async def scenario():
+        db, queue = await _open(tmp_path)
+        try:
+            ok = queue.enqueue("INSERT INTO items (name) VALUES (?)", ("before",))
+            group = asyncio.ensure_future(queue.transaction([
+                ("INSERT INTO items (name) VALUES (?)", ("g1",)),
+                ("INSERT INTO items (name) VALUES (?)", ("before",)), # UNIQUE: derruba o grupo
+            ]))
+            await ok
+            with pytest.raises(Exception):
+                await group
+            assert await _names(db) == ["before"]
+        finally:
+            await queue.close()
+            await db.close()
+    asyncio.run(scenario())
+
+def test_failed_run_rolls_back_its_writes(tmp_path):
+    async def scenario():
+        db, queue = await _open(tmp_path)
+        try:
+            async def partial(conn):
+                await conn.execute("INSERT INTO items (name) VALUES ('half')")
+                raise RuntimeError("falhou no meio")
+            with pytest.raises(RuntimeError):
+                await queue.run(partial)
+            await queue.execute("INSERT INTO items (name) VALUES ('after')")
+            assert await _names(db) == ["after"]
+        finally:
+            await queue.close()
+            await db.close()
+    asyncio.run(scenario())
+
+def test_direct_commit_waits_for_the_batch(tmp_path):
+    async def scenario():
+        db, queue = await _open(tmp_path)
+        try:
+            started = asyncio.Event()
+            async def slow(conn):
+                await conn.execute("INSERT INTO items (name) VALUES ('half')")
+                started.set()
+                await asyncio.sleep(0.05) # Um cog commita direto neste intervalo
+                raise RuntimeError("falhou no meio")
+
+            job = asyncio.ensure_future(queue.run(slow))
+            await started.wait()
+            await db.execute("INSERT INTO items (name) VALUES ('cog')")
+            await db.commit()
+
+            with pytest.raises(RuntimeError):
+                await job
+            # A escrita do cog só entrou depois do lote: nada do fn que falhou foi commitado
+            assert await _names(db) == ["cog"]
+        finally:
+            await queue.close()
+            await db.close()
+    asyncio.run(scenario())
+
+def test_pause_holds_commits_until_resume(tmp_path):
+    async def scenario():
+        db, queue = await _open(tmp_path)
+        try:
+            await queue.pause()
+            pending = queue.enqueue("INSERT INTO items (name) VALUES ('queued')")
+            await asyncio.sleep(0.03)
+            assert not pending.done()
+            queue.resume()
+            await pending
+            assert await _names(db) == ["queued"]
+        finally:
+            await queue.close()
+            await db.close()
+    asyncio.run(scenario())
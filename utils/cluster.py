@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+from utils import json_codec
+from utils.config_cache import CONFIG_WRITE
+from utils.license_manager import LICENSE_WRITE
+from database.tiers import TIER_WRITE
+
+# ====================================================
+# ⚙️ SHARDS / CLUSTER (Configurável via .env — o launcher.py preenche por processo)
+# ====================================================
+BOT_SHARDED = os.getenv('BOT_SHARDED', '0') == '1'              # 1 = AutoShardedBot
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0))                   # 0 = quantidade recomendada pelo Discord
+SHARD_IDS = os.getenv('SHARD_IDS', '')                           # "0,1,2" = shards deste processo (vazio = todos)
+CLUSTER_ID = int(os.getenv('CLUSTER_ID', 0))                     # Processo 0 é o primário (painel, backup, manutenção)
+CLUSTER_COUNT = int(os.getenv('CLUSTER_COUNT', 1))               # Processos do launcher
+CLUSTER_HEARTBEAT = int(os.getenv('CLUSTER_HEARTBEAT', 15))      # Segundos entre publicações dos shards
+
+def shard_kwargs():
+    """Argumentos do AutoShardedBot para este processo ({} fora do modo shard)."""
+    if not BOT_SHARDED: return {}
+    shard_ids = [int(s) for s in SHARD_IDS.split(',') if s.strip()]
+    if shard_ids and not SHARD_COUNT: raise ValueError("SHARD_IDS exige SHARD_COUNT")
+    return {"shard_count": SHARD_COUNT or None, "shard_ids": shard_ids or None}
+
+# ====================================================
+# 🛰️ SERVIÇO DO CLUSTER (Um por processo)
+# ====================================================
+class ClusterService:
+    """
+    Os processos do launcher dividem os shards mas usam o mesmo arquivo SQLite (WAL):
+    - Cada processo publica latência/guilds dos seus shards em cluster_shards pela WriteQueue.
+    - O primário lê a tabela para o painel e para o purge de inativos (guilds de todos os processos,
+      inclusive de linhas antigas; o purge só roda com heartbeat recente de todos os clusters).
+    - Escritas em config/licenses/tier_definitions sobem cluster_state.epoch; os outros processos
+      veem o epoch mudar no próximo heartbeat e recarregam os caches em memória.
+    Processo único (CLUSTER_COUNT=1): nada é gravado, as estatísticas vêm direto do bot.
+    """
+    def __init__(self, bot, cluster_id=CLUSTER_ID, cluster_count=CLUSTER_COUNT, interval=CLUSTER_HEARTBEAT):
+        self.bot = bot
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.interval = max(1, interval)
+        self.primary = cluster_id == 0
+        self.multi = cluster_count > 1
+        self.task = None
+        self.epoch = None        # Último epoch visto
+        self.pending_bumps = 0   # Epochs que este processo mesmo subiu (não recarrega por causa deles)
+        self.rows = []           # Última leitura de cluster_shards
+        self.remote_guilds = set()
+        self.last_seen = {}      # cluster_id -> último heartbeat publicado (qualquer shard dele)
+        self.rewarms = 0
+
+    def start(self):
+        if self.multi and (not self.task or self.task.done()):
+            self.task = asyncio.get_running_loop().create_task(self._loop())
+        return self
+
+    async def close(self):
+        if not self.task: return
+        self.task.cancel()
+        try: await self.task
+        except asyncio.CancelledError: pass
+        self.task = None
+
+    # ====================================================
+    # 📡 SHARDS LOCAIS
+    # ====================================================
+    def local_shards(self):
+        counts = {}
+        for guild in self.bot.guilds:
+            entry = counts.setdefault(guild.shard_id or 0, [0, 0, []])
+            entry[0] += 1
+            entry[1] += guild.member_count or 0
+            entry[2].append(guild.id)
+
+        shards = getattr(self.bot, 'shards', None) or {0: None} # commands.Bot: um shard implícito
+        result = []
+        for shard_id, shard in shards.items():
+            latency = shard.latency if shard else self.bot.latency
+            guilds, members, guild_ids = counts.get(shard_id, (0, 0, []))
+            result.append({
+                "shard_id": shard_id,
+                "cluster_id": self.cluster_id,
+                "pid": os.getpid(),
+                "latency_ms": round(latency * 1000, 1) if latency == latency and latency != float('inf') else None,
+                "guilds": guilds,
+                "members": members,
+                "closed": shard.is_closed() if shard else self.bot.is_closed(),
+                "guild_ids": guild_ids
+            })
+        return result
+
+    def active_guilds(self):
+        """Guilds de todos os processos (purge de inativos não pode apagar dados de outro shard)."""
+        return {g.id for g in self.bot.guilds} | self.remote_guilds
+
+    def inactive_purge_blocker(self):
+        """
+        Motivo para recusar o purge de inativos (None = liberado). Com vários processos, a lista de
+        guilds ativas só é confiável se TODOS os clusters publicaram um heartbeat recente.
+        """
+        if not self.multi: return None
+        fresh = time.time() - self.interval * 3
+        stale = [c for c in range(self.cluster_count) if self.last_seen.get(c, 0) < fresh]
+        if stale: return f"Clusters sem heartbeat recente: {', '.join(str(c) for c in stale)}. Purge de inativos recusado."
+        return None
+
+    # ====================================================
+    # 💓 HEARTBEAT (Só no modo multi-processo)
+    # ====================================================
+    async def _loop(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await self.heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ [CLUSTER] Falha no heartbeat: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def heartbeat(self):
+        now = time.time()
+        await self.bot.write_queue.executemany(
+            "INSERT OR REPLACE INTO cluster_shards (shard_id, cluster_id, pid, latency_ms, guilds, members, guild_ids, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(s["shard_id"], s["cluster_id"], s["pid"], s["latency_ms"], s["guilds"], s["members"],
+              json_codec.dumps(s["guild_ids"]), now) for s in self.local_shards()])
+
+        rows = await self.bot.db.execute_fetchall(
+            "SELECT shard_id, cluster_id, pid, latency_ms, guilds, members, guild_ids, updated_at FROM cluster_shards ORDER BY shard_id")
+        fresh = now - self.interval * 3 # Processo que parou de publicar não conta mais como ativo
+        remote = set()
+        last_seen = {}
+        self.rows = []
+        for shard_id, cluster_id, pid, latency_ms, guilds, members, guild_ids, updated_at in rows:
+            alive = (updated_at or 0) >= fresh
+            last_seen[cluster_id] = max(last_seen.get(cluster_id, 0), updated_at or 0)
+            # Linha velha também protege as guilds: processo caído/reiniciando não some do keep-set
+            if cluster_id != self.cluster_id: remote.update(json_codec.loads(guild_ids or "[]"))
+            self.rows.append({"shard_id": shard_id, "cluster_id": cluster_id, "pid": pid, "latency_ms": latency_ms,
+                              "guilds": guilds, "members": members, "alive": alive,
+                              "age_s": round(now - (updated_at or 0), 1)})
+        self.remote_guilds = remote
+        self.last_seen = last_seen
+
+        epoch = (await self.bot.db.execute_fetchall("SELECT epoch FROM cluster_state WHERE id = 1"))[0][0]
+        if self.epoch is not None and epoch != self.epoch:
+            delta = epoch - self.epoch
+            if delta > self.pending_bumps: await self._rewarm(epoch)
+            self.pending_bumps = max(0, self.pending_bumps - delta)
+        self.epoch = epoch
+
+    async def _rewarm(self, epoch):
+        from database.restore import rewarm_caches
+        await rewarm_caches(self.bot)
+        self.rewarms += 1
+        print(f"🛰️ [CLUSTER] Cluster {self.cluster_id}: caches recarregados (epoch {epoch}).")
+
+    # ====================================================
+    # 🔌 HOOK DE ESCRITA (chamado pelo DatabasePool)
+    # ====================================================
+    def on_write(self, sql, parameters=None, many=False):
+        if not self.multi: return
+        if not (CONFIG_WRITE.match(sql) or LICENSE_WRITE.match(sql) or TIER_WRITE.match(sql)): return
+        self.pending_bumps += 1
+        asyncio.get_running_loop().create_task(
+            self.bot.write_queue.execute("UPDATE cluster_state SET epoch = epoch + 1 WHERE id = 1"))
+
+    def stats(self):
+        local = [{k: v for k, v in s.items() if k != "guild_ids"} for s in self.local_shards()]
+        return {
+            "sharded": BOT_SHARDED,
+            "cluster_id": self.cluster_id,
+            "clusters": self.cluster_count,
+            "primary": self.primary,
+            "local": local,
+            # Multi-processo: visão de todos os shards publicada no banco
+            "shards": self.rows if self.multi else local,
+            "epoch": self.epoch,
+            "rewarms": self.rewarms
+        }
@@ -0,0 +1,104 @@
+import re
+
+# ====================================================
+# 🧠 CACHE DE CONFIGURAÇÃO POR GUILD (View config)
+# ====================================================
+# Carregado em bloco no setup_hook (1 query) e mantido coerente pelo hook de
+# escrita do DatabasePool: qualquer UPDATE/INSERT/DELETE em config (painéis,
+# modais, dashboard) invalida a guild afetada, que é relida no próximo acesso.
+
+# Escritas que tocam a view config ou as tabelas config_<modulo> (não confundir com set_config, etc.)
+CONFIG_WRITE = re.compile(r"^\s*(?:UPDATE(?:\s+OR\s+\w+)?|INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|DELETE\s+FROM|ALTER\s+TABLE|DROP\s+(?:TABLE|VIEW)(?:\s+IF\s+EXISTS)?)\s+config(?:_\w+)?\b", re.IGNORECASE)
+WHERE_GUILD = re.compile(r"WHERE\s+guild_id\s*=\s*\?\s*;?\s*$", re.IGNORECASE)
+INSERT_COLS = re.compile(r"INTO\s+config(?:_\w+)?\s*\(([^)]*)\)", re.IGNORECASE)
+
+def guild_from_write(sql, params):
+    """Guild afetada por uma escrita em config (WHERE guild_id = ? ou coluna do INSERT). None = não dá para saber."""
+    if not isinstance(params, (list, tuple)) or not params: return None
+    if WHERE_GUILD.search(sql): return params[-1]
+
+    match = INSERT_COLS.search(sql)
+    if match:
+        cols = [c.strip().lower() for c in match.group(1).split(',')]
+        if "guild_id" in cols and cols.index("guild_id") < len(params):
+            return params[cols.index("guild_id")]
+    return None
+
+class GuildConfig(dict):
+    """Linha da view config. Acesso por atributo: cfg.sugg_channel_id (None se não existir)."""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return self.get(name)
+
+class GuildConfigCache:
+    def __init__(self, db):
+        self.db = db
+        self.entries = {}     # guild_id -> GuildConfig
+        self.version = 0      # Incrementa a cada invalidação (evita gravar leitura velha no cache)
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    async def load_all(self):
+        """Carrega todas as guilds com uma única query."""
+        version = self.version
+        async with self.db.execute("SELECT * FROM config") as cursor:
+            cols = [d[0] for d in cursor.description]
+            rows = await cursor.fetchall()
+        if version != self.version: return 0 # Houve escrita no meio, o lazy-load resolve
+
+        self.entries = {row[0]: GuildConfig(zip(cols, row)) for row in rows}
+        self.loads += 1
+        print(f"🧠 [CONFIG CACHE] {len(self.entries)} configurações carregadas.")
+        return len(self.entries)
+
+    async def get(self, guild_id):
+        """Retorna a config da guild (GuildConfig vazio se não houver linha)."""
+        cfg = self.entries.get(guild_id)
+        if cfg is not None:
+            self.hits += 1
+            return cfg
+
+        self.misses += 1
+        version = self.version
+        async with self.db.execute("SELECT * FROM config WHERE guild_id = ?", (guild_id,)) as cursor:
+            row = await cursor.fetchone()
+            cfg = GuildConfig(zip([d[0] for d in cursor.description], row)) if row else GuildConfig()
+
+        # Só guarda se ninguém escreveu em config durante a leitura
+        if version == self.version: self.entries[guild_id] = cfg
+        return cfg
+
+    def peek(self, guild_id):
+        """Leitura síncrona: None se a guild ainda não estiver no cache."""
+        return self.entries.get(guild_id)
+
+    def invalidate(self, guild_id=None):
+        self.version += 1
+        if guild_id is None: self.entries.clear()
+        else: self.entries.pop(guild_id, None)
+
+    # ====================================================
+    # 🔌 HOOK DE ESCRITA (chamado pelo DatabasePool)
+    # ====================================================
+    def on_write(self, sql, parameters=None, many=False):
+        if not CONFIG_WRITE.match(sql): return
+
+        rows = parameters if many else [parameters]
+        for params in rows or [None]:
+            guild_id = guild_from_write(sql, params)
+            if guild_id is None:
+                self.invalidate() # Não deu para identificar a guild: limpa tudo
+                return
+            self.invalidate(guild_id)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0,
+            "bulk_loads": self.loads
+        }
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import sqlite3
+import discord
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ====================================================
+# ⚙️ PERFIL DO GATEWAY (Configurável via .env)
+# ====================================================
+GATEWAY_PROFILE = os.getenv('GATEWAY_PROFILE', 'auto')                      # auto = intents dos módulos licenciados | full = Intents.all()
+GATEWAY_CHUNK_AT_STARTUP = os.getenv('GATEWAY_CHUNK_AT_STARTUP', '0') == '1' # 0 = membros baixados só quando um módulo precisar
+
+# Intents que todo perfil precisa (guilds, on_message do roteador e comandos de prefixo)
+BASE_INTENTS = ("guilds", "guild_messages", "message_content")
+
+# Módulo (nome do tier_map) -> intents que os listeners/comandos dele usam
+MODULE_INTENTS = {
+    "logs": ("voice_states", "members", "moderation"),
+    "streaming": ("presences", "members"),
+    "welcome": ("members",),
+    "hierarchy": ("members",),
+    "punishments": ("members",),
+    "timesheet": ("members",),
+    "staff_stats": ("members",),
+    "tickets": ("members",),
+    "sales": ("members",),
+    "verification": ("members",),
+    "admin": ("members",),
+}
+
+# Módulo -> flags do cache de membros (sem isso, o membro só existe enquanto o evento dura)
+MODULE_MEMBER_CACHE = {
+    "streaming": ("joined",), # on_presence_update só dispara para membro em cache (presences vem do intent)
+    "logs": ("joined",),
+    "hierarchy": ("joined",),
+    "punishments": ("joined",),
+    "timesheet": ("joined",),
+    "staff_stats": ("joined",),
+    "tickets": ("joined",),
+    "sales": ("joined",),
+    "verification": ("joined",),
+    "admin": ("joined",),
+}
+
+# Módulos com listener de on_presence_update / on_member_update: o discord.py descarta esses eventos
+# para membro fora do cache. As guilds deles são baixadas inteiras no ready (chunk_listener_guilds).
+MODULE_CHUNK = {"streaming", "logs"}
+
+def licensed_modules(db_path):
+    """
+    Módulos liberados para pelo menos uma licença ativa (leitura síncrona: roda antes do bot existir).
+    None = banco ainda não criado/sem tiers (primeiro boot): perfil completo.
+    """
+    if not os.path.exists(db_path): return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT DISTINCT td.module_name FROM tier_definitions td "
+                "JOIN licenses l ON l.tier = td.tier_name WHERE l.status = 'active'").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ [GATEWAY] Não foi possível ler os módulos licenciados: {e}")
+        return None
+    return {row[0] for row in rows}
+
+# ====================================================
+# 📡 PERFIL (Intents + Cache de membros + Chunk sob demanda)
+# ====================================================
+class GatewayProfile:
+    """
+    Intents e MemberCacheFlags são fixados na conexão: o perfil é calculado no boot a partir dos
+    módulos licenciados (união de todos os tiers em uso). Membros não são baixados no startup;
+    ensure_chunked() baixa a guild na primeira vez que um módulo precisa da lista completa.
+    """
+    def __init__(self, modules=None, mode=GATEWAY_PROFILE, chunk_at_startup=GATEWAY_CHUNK_AT_STARTUP):
+        self.mode = "full" if mode == "full" or modules is None else "auto"
+        self.modules = set(modules or ())
+        self.chunk_at_startup = chunk_at_startup
+        self.chunk_locks = {} # guild_id -> Lock (dois comandos ao mesmo tempo não pedem o chunk duas vezes)
+        self.chunked = 0
+
+        if self.mode == "full":
+            self.intents = discord.Intents.all()
+            self.member_cache_flags = discord.MemberCacheFlags.from_intents(self.intents)
+        else:
+            self.intents = discord.Intents.none()
+            for name in BASE_INTENTS: setattr(self.intents, name, True)
+            self.member_cache_flags = discord.MemberCacheFlags.none()
+            for module in self.modules:
+                for name in MODULE_INTENTS.get(module, ()): setattr(self.intents, name, True)
+                for flag in MODULE_MEMBER_CACHE.get(module, ()): setattr(self.member_cache_flags, flag, True)
+
+    @classmethod
+    def from_database(cls, db_path):
+        modules = licensed_modules(db_path) if GATEWAY_PROFILE != "full" else None
+        profile = cls(modules)
+        if profile.mode == "full":
+            print("📡 [GATEWAY] Perfil completo (Intents.all()).")
+        else:
+            enabled = [name for name, value in profile.intents if value]
+            print(f"📡 [GATEWAY] Perfil por módulos ({len(profile.modules)} licenciados): intents = {', '.join(enabled)}.")
+        return profile
+
+    def needs_chunk(self, modules):
+        """A guild com estes módulos precisa da lista completa de membros em cache (listeners de presença/membro)."""
+        return not self.chunk_at_startup and bool(MODULE_CHUNK.intersection(modules)) and self.intents.members
+
+    def missing(self, modules):
+        """Módulos liberados depois do boot cujos intents não estão na conexão atual (exige reinício)."""
+        if self.mode == "full": return []
+        missing = []
+        for module in modules:
+            if any(not getattr(self.intents, name) for name in MODULE_INTENTS.get(module, ())): missing.append(module)
+        return sorted(missing)
+
+    # ====================================================
+    # 👥 CHUNK SOB DEMANDA
+    # ====================================================
+    async def ensure_chunked(self, guild):
+        """Baixa os membros da guild na primeira necessidade (role.members, listas completas)."""
+        if guild.chunked or not self.intents.members: return
+        lock = self.chunk_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if guild.chunked: return
+            try:
+                await guild.chunk()
+                self.chunked += 1
+            except Exception as e:
+                print(f"⚠️ [GATEWAY] Falha ao baixar membros de {guild.id}: {e}")
+        self.chunk_locks.pop(guild.id, None)
+
+    async def chunk_listener_guilds(self, guilds, modules_of):
+        """
+        Chamado no ready: baixa as guilds cujo plano tem listener de presença/membro (streaming, logs).
+        modules_of: guild_id -> módulos liberados (ModuleGate.modules). Guild já baixada é pulada.
+        """
+        chunked = 0
+        for guild in guilds:
+            if guild.chunked or not self.needs_chunk(modules_of(guild.id)): continue
+            await self.ensure_chunked(guild)
+            chunked += 1
+        if chunked: print(f"📡 [GATEWAY] {chunked} guilds baixadas no ready (listeners de presença/membro).")
+        return chunked
+
+    async def get_or_fetch_member(self, guild, user_id):
+        """
+        guild.get_member com fallback na API: sem chunk no startup, o cache só tem quem entrou/falou
+        depois do boot (nem o membro da interaction fica em cache). None = não está mais no servidor.
+        """
+        if not user_id: return None
+        member = guild.get_member(user_id)
+        if member: return member
+        try:
+            return await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        except discord.HTTPException as e:
+            print(f"⚠️ [GATEWAY] Falha ao buscar membro {user_id} em {guild.id}: {e}")
+            return None
+
+    # ====================================================
+    # 📊 MEMÓRIA POR GUILD
+    # ====================================================
+    def memory_report(self, guilds, top=20):
+        """
+        RSS do processo dividido entre as guilds pelo peso de cada uma no cache
+        (membros + canais + cargos). Estimativa, mas aponta quem segura memória.
+        """
+        rss = psutil.Process().memory_info().rss if psutil else 0
+        rows = []
+        for guild in guilds:
+            objects = len(guild.members) + len(guild.channels) + len(guild.roles)
+            rows.append({
+                "guild_id": guild.id,
+                "name": guild.name,
+                "members_cached": len(guild.members),
+                "member_count": guild.member_count,
+                "chunked": guild.chunked,
+                "objects": objects
+            })
+        total = sum(r["objects"] for r in rows) or 1
+        for r in rows: r["est_kb"] = round(rss * r["objects"] / total / 1024, 1)
+        rows.sort(key=lambda r: r["objects"], reverse=True)
+
+        return {
+            "rss_mb": round(rss / (1024 ** 2), 1),
+            "guilds": len(rows),
+            "rss_per_guild_kb": round(rss / len(rows) / 1024, 1) if rows else 0,
+            "members_cached": sum(r["members_cached"] for r in rows),
+            "chunked_guilds": sum(1 for r in rows if r["chunked"]),
+            "top": rows[:top]
+        }
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "modules": sorted(self.modules),
+            "intents": [name for name, value in self.intents if value],
+            "member_cache": [name for name, value in self.member_cache_flags if value],
+            "chunk_at_startup": self.chunk_at_startup,
+            "lazy_chunks": self.chunked
+        }
@@ -0,0 +1,52 @@
+import functools
+import json
+import os
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ====================================================
+# 🧾 CODEC JSON (orjson quando instalado, stdlib como fallback)
+# ====================================================
+# Tudo que é gravado/lido como JSON nas colunas (templates de embed, requisitos
+# de sorteio, listas legadas das ações, arquivo frio) passa por aqui.
+# Saída sempre compacta e UTF-8 (sem espaços e sem \uXXXX): ocupa menos no banco.
+
+JSON_CACHE_SIZE = int(os.getenv('JSON_CACHE_SIZE', 1024)) # Objetos decodificados mantidos por loads_cached()
+
+BACKEND = "orjson" if orjson else "json"
+
+def dumps(obj, default=None):
+    """Serializa para str compacta."""
+    if orjson:
+        try:
+            return orjson.dumps(obj, default=default).decode()
+        except TypeError:
+            pass # Ex: int maior que 64 bits ou chave não-str: o stdlib resolve
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
+
+def loads(data):
+    """Decodifica str/bytes. Retorna um objeto novo (pode ser alterado à vontade)."""
+    if orjson: return orjson.loads(data)
+    return json.loads(data)
+
+@functools.lru_cache(maxsize=JSON_CACHE_SIZE)
+def loads_cached(data):
+    """
+    Decodifica com cache pelo próprio texto (linhas imutáveis, ex: requisitos do sorteio).
+    O objeto é COMPARTILHADO entre chamadas: só leitura. Para editar, use loads().
+    """
+    return loads(data)
+
+def cache_stats():
+    info = loads_cached.cache_info()
+    total = info.hits + info.misses
+    return {
+        "backend": BACKEND,
+        "entries": info.currsize,
+        "max": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / total * 100, 2) if total else 0
+    }
@@ -1,85 +1,239 @@
 import discord
 from discord.ext import commands
 from datetime import datetime, timedelta
-import aiosqlite
-
-DB_NAME = "database/bot_data.db"
-
-# Cache simples para evitar queries excessivas (Guild ID -> Status)
-# Ex: {123456: {'status': 'active', 'expires': datetime...}}
-LICENSE_CACHE = {}
-
-async def get_license_status(guild_id: int, db_connection=None):
-    """Verifica o status da licença no banco de dados"""
-    
-    # 1. Verifica Cache (TTL de 5 minutos poderia ser implementado aqui)
-    if guild_id in LICENSE_CACHE:
-        # Se expirou no cache, força re-check
-        if LICENSE_CACHE[guild_id]['status'] == 'active':
-            if datetime.now() > LICENSE_CACHE[guild_id]['expires']:
-                pass # Continua para query
-            else:
-                return LICENSE_CACHE[guild_id]
-
-    # Se não passou conexão, cria uma temporária (fallback)
-    if db_connection:
-        cursor = await db_connection.execute("SELECT status, expiration_date FROM licenses WHERE guild_id = ?", (guild_id,))
-        row = await cursor.fetchone()
-        await cursor.close()
-        # Não fecha a conexão compartilhada!
-        
-        if not row:
-            return {"status": "no_license", "msg": "🚫 **Este servidor não possui uma licença ativa.**"}
-        
-        status, exp_str = row
-        try:
-            expires = datetime.strptime(exp_str, "%Y-%m-%d")
-        except:
-            expires = datetime.max
-            
-        # Lógica de Vencimento
-        if status == 'active' and datetime.now() > expires:
-            grace_end = expires + timedelta(days=3)
-            
-            if datetime.now() < grace_end:
-                return {"status": "grace_period", "msg": "⚠️ **Sua licença venceu!** Você tem 3 dias de carência. Renove agora."}
+import asyncio
+import heapq
+import os
+import re
+import time
+
+GRACE_DAYS = int(os.getenv('LICENSE_GRACE_DAYS', 3)) # Dias de carência depois do vencimento
+
+STATUS_MSG = {
+    "no_license": "🚫 **Este servidor não possui uma licença ativa.**",
+    "grace_period": f"⚠️ **Sua licença venceu!** Você tem {GRACE_DAYS} dias de carência. Renove agora.",
+    "locked": "🔒 **Licença Bloqueada.** Contate o suporte para desbloquear.",
+    "active": None,
+}
+
+LICENSE_WRITE = re.compile(r"^\s*(?:UPDATE(?:\s+OR\s+\w+)?|INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|DELETE\s+FROM)\s+licenses\b", re.IGNORECASE)
+WHERE_GUILD = re.compile(r"WHERE\s+guild_id\s*=\s*\?\s*(?:AND\s+status\s*=\s*'\w+'\s*)?;?\s*$", re.IGNORECASE)
+
+LICENSE_COLUMNS = "guild_id, key, client_name, expiration_date, status, max_users, tier"
+
+def _parse_expiration(exp_str):
+    try:
+        return datetime.strptime(exp_str, "%Y-%m-%d")
+    except:
+        return None # Sem data válida = não vence
+
+# ====================================================
+# 🔑 SERVIÇO DE LICENÇAS (Tudo em memória + agenda de vencimentos)
+# ====================================================
+class LicenseService:
+    """
+    Única fonte de verdade das licenças em runtime:
+    - Todas as licenças em memória (1 query no boot). O interaction_check não faz SQL.
+    - Estado calculado (active -> grace_period -> locked) trocado por uma agenda (heap) no horário
+      exato do vencimento e do fim da carência. O 'locked' é gravado no banco pela WriteQueue.
+    - Qualquer escrita em licenses (painel, purge) recarrega só a guild afetada.
+    """
+    def __init__(self, db, write_queue=None):
+        self.db = db
+        self.write_queue = write_queue
+        self.licenses = {}   # guild_id -> dict (colunas + 'expires' + 'state')
+        self.heap = []       # (epoch da transição, guild_id) — só vale a entrada igual ao next_at da licença
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.transitions = 0
+        self.listeners = []  # fn(guild_id) após mudança de licença/estado (None = todas relidas)
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._loop())
+        return self
+
+    async def close(self):
+        if not self.task: return
+        self.task.cancel()
+        try: await self.task
+        except asyncio.CancelledError: pass
+        self.task = None
+
+    # ====================================================
+    # 📥 CARGA
+    # ====================================================
+    async def load_all(self):
+        rows = await self.db.execute_fetchall(f"SELECT {LICENSE_COLUMNS} FROM licenses")
+        self.licenses = {}
+        self.heap = []
+        for row in rows: self._store(row)
+        self.wakeup.set()
+        self._notify(None)
+        print(f"🔑 [LICENSES] {len(self.licenses)} licenças em memória.")
+        return len(self.licenses)
+
+    async def refresh(self, guild_id):
+        """Relê uma guild (chamado após escritas do painel)."""
+        rows = await self.db.execute_fetchall(f"SELECT {LICENSE_COLUMNS} FROM licenses WHERE guild_id = ?", (guild_id,))
+        self.licenses.pop(guild_id, None)
+        for row in rows: self._store(row)
+        self.wakeup.set()
+        self._notify(guild_id)
+
+    def _notify(self, guild_id):
+        for fn in self.listeners:
+            try: fn(guild_id)
+            except Exception as e: print(f"⚠️ [LICENSES] Listener falhou: {e}")
+
+    def _store(self, row):
+        lic = dict(zip(("guild_id", "key", "client_name", "expiration_date", "status", "max_users", "tier"), row))
+        lic["tier"] = lic["tier"] or 'start'
+        lic["expires"] = _parse_expiration(lic["expiration_date"])
+        lic["state"] = self._evaluate(lic, datetime.now())
+        self.licenses[lic["guild_id"]] = lic
+        self._schedule(lic)
+
+    # ====================================================
+    # ⚡ LEITURA (Síncrona, zero SQL)
+    # ====================================================
+    def get(self, guild_id):
+        return self.licenses.get(guild_id)
+
+    def tier(self, guild_id, default=None):
+        lic = self.licenses.get(guild_id)
+        return lic["tier"] if lic else default
+
+    def status(self, guild_id):
+        lic = self.licenses.get(guild_id)
+        state = lic["state"] if lic else "no_license"
+        return {"status": state, "msg": STATUS_MSG[state], "tier": lic["tier"] if lic else None}
+
+    def licensed(self, guild_ids):
+        return {g for g in guild_ids if g in self.licenses}
+
+    # ====================================================
+    # ⏰ AGENDA DE VENCIMENTOS (Heap)
+    # ====================================================
+    @staticmethod
+    def _evaluate(lic, now):
+        if lic["status"] != 'active': return "locked"
+        expires = lic["expires"]
+        if not expires or now <= expires: return "active"
+        if now < expires + timedelta(days=GRACE_DAYS): return "grace_period"
+        return "locked"
+
+    def _schedule(self, lic):
+        expires = lic["expires"]
+        if lic["state"] == "locked":
+            if lic["status"] != 'active': return
+            when = time.time() # Carência acabou com o bot desligado: grava o bloqueio agora
+        elif not expires: return
+        elif lic["state"] == "active": when = expires.timestamp()
+        else: when = (expires + timedelta(days=GRACE_DAYS)).timestamp()
+        lic["next_at"] = when
+        heapq.heappush(self.heap, (when, lic["guild_id"]))
+
+    async def _loop(self):
+        while True:
+            try:
+                now = time.time()
+                while self.heap and self.heap[0][0] <= now:
+                    when, guild_id = heapq.heappop(self.heap)
+                    await self._advance(guild_id, when)
+                # Dorme até a próxima transição (no máx. 1h, caso o relógio do sistema mude)
+                timeout = min(self.heap[0][0] - time.time(), 3600) if self.heap else 3600
+                self.wakeup.clear()
+                try: await asyncio.wait_for(self.wakeup.wait(), max(timeout, 0))
+                except asyncio.TimeoutError: pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ [LICENSES] Falha na agenda de vencimentos: {e}")
+                await asyncio.sleep(60)
+
+    async def _advance(self, guild_id, when):
+        lic = self.licenses.get(guild_id)
+        if not lic or lic.get("next_at") != when: return # Renovada/removida/reagendada depois disso
+        lic["next_at"] = None
+
+        state = self._evaluate(lic, datetime.now())
+        if state != lic["state"]:
+            lic["state"] = state
+            self.transitions += 1
+            print(f"⏰ [LICENSES] Guild {guild_id}: licença agora em '{state}'.")
+            self._notify(guild_id)
+
+        if state == "locked" and lic["status"] == 'active':
+            lic["status"] = 'locked'
+            sql, params = "UPDATE licenses SET status = 'locked' WHERE guild_id = ? AND status = 'active'", (guild_id,)
+            if self.write_queue: await self.write_queue.execute(sql, params)
             else:
-                await db_connection.execute("UPDATE licenses SET status = 'locked' WHERE guild_id = ?", (guild_id,))
-                await db_connection.commit()
-                return {"status": "locked", "msg": "🔒 **Licença Bloqueada.** O período de carência acabou. Contate o suporte."}
-        
-        if status == 'locked':
-             return {"status": "locked", "msg": "🔒 **Licença Bloqueada.** Contate o suporte para desbloquear."}
+                await self.db.execute(sql, params)
+                await self.db.commit()
+        else:
+            self._schedule(lic)
 
-        LICENSE_CACHE[guild_id] = {'status': 'active', 'expires': expires}
-        return {"status": "active", "msg": None}
+    # ====================================================
+    # 🔌 HOOK DE ESCRITA (chamado pelo DatabasePool)
+    # ====================================================
+    def on_write(self, sql, parameters=None, many=False):
+        if not LICENSE_WRITE.match(sql): return
+        rows = parameters if many else [parameters]
+        loop = asyncio.get_running_loop()
+        guild_ids = set()
+        for params in rows or [None]:
+            guild_id = self._guild_from_write(sql, params)
+            if guild_id is None:
+                loop.create_task(self.load_all()) # Não deu para identificar a guild: relê tudo
+                return
+            guild_ids.add(guild_id)
+        for guild_id in guild_ids:
+            loop.create_task(self.refresh(guild_id))
 
-    else:
-        # Fallback: Cria conexão nova (não recomendado para uso intenso)
-        async with aiosqlite.connect(DB_NAME) as db:
-            return await get_license_status(guild_id, db)
+    @staticmethod
+    def _guild_from_write(sql, params):
+        if not isinstance(params, (list, tuple)) or not params: return None
+        if WHERE_GUILD.search(sql): return int(params[-1])
+        match = re.search(r"INTO\s+licenses\s*\(([^)]*)\)", sql, re.IGNORECASE)
+        if match:
+            cols = [c.strip().lower() for c in match.group(1).split(',')]
+            if "guild_id" in cols and cols.index("guild_id") < len(params):
+                return int(params[cols.index("guild_id")])
+        return None
+
+    def stats(self):
+        states = {}
+        for lic in self.licenses.values():
+            states[lic["state"]] = states.get(lic["state"], 0) + 1
+        return {
+            "licenses": len(self.licenses),
+            "states": states,
+            "scheduled": len(self.heap),
+            "next_transition": datetime.fromtimestamp(self.heap[0][0]).strftime("%Y-%m-%d %H:%M:%S") if self.heap else None,
+            "transitions": self.transitions
+        }
 
 def check_license():
     """Decorator para comandos: Bloqueia se não tiver licença"""
     async def predicate(ctx):
-        if not ctx.guild: return True 
-        
+        if not ctx.guild: return True
+
         if await ctx.bot.is_owner(ctx.author): return True
 
-        # Passa a conexão do bot para evitar locking
-        db = getattr(ctx.bot, 'db', None)
-        data = await get_license_status(ctx.guild.id, db)
-        
+        # Estado já calculado em memória (LicenseService)
+        data = ctx.bot.licenses.status(ctx.guild.id)
+
         if data['status'] == 'active':
             return True
-        
+
         if data['status'] == 'grace_period':
             await ctx.send(data['msg'], delete_after=10)
             return True
-            
+
         if data['status'] in ['locked', 'no_license']:
             raise commands.CheckFailure(data['msg'])
-            
+
         return False
-    
+
     return commands.check(predicate)
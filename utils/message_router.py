@@ -0,0 +1,142 @@
+import asyncio
+from utils.config_cache import CONFIG_WRITE, guild_from_write
+
+# ====================================================
+# 📨 ROTEADOR DE MENSAGENS (Canal -> Módulo)
+# ====================================================
+# Um único on_message (CityBot) no lugar de um listener por cog.
+# Índice em memória "canal -> módulos interessados" montado a partir da config:
+# mensagem em canal comum custa 1 lookup no dict (sem await, sem SQL).
+# Painel mudou o canal? O hook de escrita do DatabasePool relê só a guild afetada.
+
+# Módulo -> coluna da config com o canal que ele escuta
+ROUTE_COLUMNS = {
+    "streaming": "streaming_channel_id",
+    "suggestions": "sugg_channel_id",
+}
+
+class MessageRouter:
+    def __init__(self, db, gate=None):
+        self.db = db
+        self.gate = gate     # ModuleGate: módulo fora do plano da guild não recebe a mensagem
+        self.channels = {}   # channel_id -> tuple de módulos
+        self.guilds = {}     # guild_id -> {módulo: channel_id} (para desfazer o índice antigo)
+        self.handlers = {}   # módulo -> async fn(message)
+        self.taps = []       # fn(message) síncronas chamadas para toda mensagem (ex: contadores do Monitor)
+        self.version = 0     # Incrementa a cada escrita relevante (leitura velha não entra no índice)
+        self.counters = {"messages": 0, "routed": 0, "gated": 0, "refreshes": 0, "rebuilds": 0, "errors": 0}
+
+    # ====================================================
+    # 🧩 REGISTRO (cog_load / cog_unload)
+    # ====================================================
+    def register(self, module, handler):
+        self.handlers[module] = handler
+
+    def unregister(self, module):
+        self.handlers.pop(module, None)
+
+    def tap(self, fn):
+        if fn not in self.taps: self.taps.append(fn)
+
+    def untap(self, fn):
+        if fn in self.taps: self.taps.remove(fn)
+
+    # ====================================================
+    # 🗺️ ÍNDICE
+    # ====================================================
+    async def load_all(self):
+        """Monta o índice inteiro (1 query)."""
+        version = self.version
+        cols = ", ".join(ROUTE_COLUMNS.values())
+        rows = await self.db.execute_fetchall(f"SELECT guild_id, {cols} FROM config")
+        if version != self.version: # Escrita no meio da leitura: tenta de novo com o estado novo
+            return await self.load_all()
+
+        self.channels = {}
+        self.guilds = {}
+        for row in rows: self._set_guild(row[0], row[1:])
+        self.counters["rebuilds"] += 1
+        print(f"📨 [ROUTER] {len(self.channels)} canais roteados para {len(self.guilds)} servidores.")
+        return len(self.channels)
+
+    async def refresh(self, guild_id):
+        """Relê os canais de uma guild (chamado após escritas dos painéis)."""
+        version = self.version
+        cols = ", ".join(ROUTE_COLUMNS.values())
+        rows = await self.db.execute_fetchall(f"SELECT {cols} FROM config WHERE guild_id = ?", (guild_id,))
+        if version != self.version: return await self.refresh(guild_id)
+        self._set_guild(guild_id, rows[0] if rows else [None] * len(ROUTE_COLUMNS))
+        self.counters["refreshes"] += 1
+
+    def _set_guild(self, guild_id, values):
+        # Remove os canais antigos da guild e indexa os novos
+        for module, channel_id in self.guilds.pop(guild_id, {}).items():
+            modules = list(self.channels.get(channel_id, ()))
+            if module in modules: modules.remove(module)
+            modules = tuple(modules)
+            if modules: self.channels[channel_id] = modules
+            else: self.channels.pop(channel_id, None)
+
+        routes = {module: channel_id for module, channel_id in zip(ROUTE_COLUMNS, values) if channel_id}
+        for module, channel_id in routes.items():
+            self.channels[channel_id] = self.channels.get(channel_id, ()) + (module,)
+        if routes: self.guilds[guild_id] = routes
+
+    # ====================================================
+    # 🚦 DESPACHO (Síncrono: chamado pelo CityBot.on_message)
+    # ====================================================
+    def dispatch(self, message):
+        self.counters["messages"] += 1
+        for fn in self.taps:
+            try: fn(message)
+            except Exception as e: print(f"⚠️ [ROUTER] Tap falhou: {e}")
+
+        if not message.guild: return
+        modules = self.channels.get(message.channel.id)
+        if not modules: return # Canal comum: acabou aqui
+
+        loop = asyncio.get_running_loop()
+        for module in modules:
+            handler = self.handlers.get(module)
+            if not handler: continue # Cog descarregado
+            if self.gate and not self.gate.enabled(message.guild.id, module):
+                self.counters["gated"] += 1
+                continue
+            self.counters["routed"] += 1
+            loop.create_task(self._run(module, handler, message))
+
+    async def _run(self, module, handler, message):
+        try:
+            await handler(message)
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"❌ [ROUTER] Falha no módulo {module} (canal {message.channel.id}): {e}")
+
+    # ====================================================
+    # 🔌 HOOK DE ESCRITA (chamado pelo DatabasePool)
+    # ====================================================
+    def on_write(self, sql, parameters=None, many=False):
+        if not CONFIG_WRITE.match(sql): return
+        # UPDATE que não mexe em nenhuma coluna de canal roteado: índice continua válido
+        if sql.lstrip().upper().startswith("UPDATE") and not any(col in sql for col in ROUTE_COLUMNS.values()): return
+
+        self.version += 1
+        loop = asyncio.get_running_loop()
+        guild_ids = set()
+        for params in (parameters if many else [parameters]) or [None]:
+            guild_id = guild_from_write(sql, params)
+            if guild_id is None:
+                loop.create_task(self.load_all()) # Não deu para identificar a guild: remonta tudo
+                return
+            guild_ids.add(guild_id)
+        for guild_id in guild_ids:
+            loop.create_task(self.refresh(guild_id))
+
+    def stats(self):
+        return {
+            "channels": len(self.channels),
+            "guilds": len(self.guilds),
+            "modules": sorted(self.handlers),
+            "taps": len(self.taps),
+            **self.counters
+        }
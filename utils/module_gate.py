@@ -0,0 +1,86 @@
+# ====================================================
+# 🚪 PORTÃO DE MÓDULOS (Bitmap por guild: licença x tier)
+# ====================================================
+# O interaction_check só barra slash commands. Listeners (voz, presença, entrada
+# de membros, mensagens roteadas) rodam para toda guild, licenciada ou não.
+# Aqui cada guild tem um inteiro com 1 bit por módulo liberado, derivado de
+# licenses (LicenseService) + tier_map. O listener consulta com um AND antes de
+# qualquer trabalho: CPU do gateway passa a escalar com módulos licenciados.
+
+ALWAYS_ENABLED = ("general",) # Mesma regra do interaction_check
+
+class ModuleGate:
+    def __init__(self, licenses, tier_map):
+        self.licenses = licenses   # LicenseService
+        self.tier_map = tier_map   # Callable -> bot.tier_map (o dict é trocado no reload)
+        self.bits = {}             # módulo -> bit
+        self.tier_masks = {}       # tier -> máscara
+        self.masks = {}            # guild_id -> máscara (guild sem licença/bloqueada não entra)
+        self.counters = {"allowed": 0, "blocked": 0, "rebuilds": 0, "refreshes": 0}
+
+    def bit(self, module):
+        if module not in self.bits: self.bits[module] = 1 << len(self.bits)
+        return self.bits[module]
+
+    def mask_of(self, modules):
+        mask = 0
+        for module in modules: mask |= self.bit(module)
+        return mask
+
+    # ====================================================
+    # ⚡ CONSULTA (Síncrona, chamada pelos listeners)
+    # ====================================================
+    def enabled(self, guild_id, module):
+        if self.masks.get(guild_id, 0) & self.bits.get(module, 0):
+            self.counters["allowed"] += 1
+            return True
+        self.counters["blocked"] += 1
+        return False
+
+    def enabled_modules(self):
+        """União dos módulos liberados em alguma guild (perfil do gateway compara com isso)."""
+        union = 0
+        for mask in self.masks.values(): union |= mask
+        return sorted(module for module, bit in self.bits.items() if union & bit)
+
+    def modules(self, guild_id):
+        mask = self.masks.get(guild_id, 0)
+        return sorted(module for module, bit in self.bits.items() if mask & bit)
+
+    # ====================================================
+    # 🔄 RECÁLCULO (licenças e tiers mudam pelo painel/agenda)
+    # ====================================================
+    def rebuild(self):
+        """Recalcula as máscaras dos tiers e de todas as guilds (sem SQL: tudo já está em memória)."""
+        always = self.mask_of(ALWAYS_ENABLED)
+        self.tier_masks = {tier: self.mask_of(modules) | always for tier, modules in self.tier_map().items()}
+        masks = {}
+        for guild_id, lic in self.licenses.licenses.items():
+            mask = self._guild_mask(lic)
+            if mask: masks[guild_id] = mask
+        self.masks = masks
+        self.counters["rebuilds"] += 1
+        return len(self.masks)
+
+    def refresh(self, guild_id=None):
+        """Listener do LicenseService: guild_id=None = todas as licenças foram relidas."""
+        if guild_id is None: return self.rebuild()
+        mask = self._guild_mask(self.licenses.get(guild_id))
+        if mask: self.masks[guild_id] = mask
+        else: self.masks.pop(guild_id, None)
+        self.counters["refreshes"] += 1
+
+    def _guild_mask(self, lic):
+        if not lic or lic["state"] == "locked": return 0
+        tier = lic["tier"]
+        if tier not in self.tier_masks: # Tier sem regras no tier_map: só o que é sempre liberado
+            self.tier_masks[tier] = self.mask_of(ALWAYS_ENABLED)
+        return self.tier_masks[tier]
+
+    def stats(self):
+        return {
+            "guilds": len(self.masks),
+            "modules": len(self.bits),
+            "tiers": {tier: bin(mask).count("1") for tier, mask in self.tier_masks.items()},
+            **self.counters
+        }
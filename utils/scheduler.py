@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import inspect
+import os
+import random
+import time
+import zlib
+
+# ====================================================
+# ⚙️ AGENDADOR (Configurável via .env)
+# ====================================================
+SCHED_CONCURRENCY = int(os.getenv('SCHED_CONCURRENCY', 4))   # Execuções simultâneas no bot inteiro (REST + SQL)
+SCHED_JITTER = float(os.getenv('SCHED_JITTER', 0.1))         # ± fração da janela somada à posição de cada guild
+
+_MISSING = object()
+
+# ====================================================
+# 📋 JOB (Estatísticas consultadas pelo painel)
+# ====================================================
+class Job:
+    def __init__(self, name, fn, interval, keys=None, at=None, window=None):
+        self.name = name
+        self.fn = fn             # async fn() ou async fn(key) quando há keys
+        self.interval = interval # Segundos entre ciclos (pode mudar em runtime: set_interval)
+        self.keys = keys         # Callable (sync/async) -> guilds do ciclo. None = job global
+        self.at = at             # datetime.time (UTC se sem tz): ciclo diário nesse horário
+        self.window = window     # Janela em que as guilds são espalhadas (padrão: o próprio intervalo)
+        self.task = None
+        self.running = set()     # Keys em execução (ciclo seguinte não empilha em cima)
+        self.fingerprints = {}   # key -> entrada da última execução (unchanged)
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.overlaps = 0
+        self.last_keys = 0
+        self.last_duration = None
+        self.max_duration = 0
+        self.total_duration = 0
+        self.last_run = None
+        self.next_cycle = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "at": self.at.strftime("%H:%M") if self.at else None,
+            "keys": self.last_keys,
+            "running": len(self.running),
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "overlaps": self.overlaps,
+            "last_ms": round(self.last_duration * 1000, 1) if self.last_duration is not None else None,
+            "avg_ms": round(self.total_duration / self.runs * 1000, 1) if self.runs else None,
+            "max_ms": round(self.max_duration * 1000, 1),
+            "last_run": datetime.datetime.fromtimestamp(self.last_run).strftime("%Y-%m-%d %H:%M:%S") if self.last_run else None,
+            "next_cycle_in": round(self.next_cycle - time.monotonic(), 1) if self.next_cycle else None
+        }
+
+# ====================================================
+# ⏱️ AGENDADOR COOPERATIVO (Substitui os tasks.loop dos cogs)
+# ====================================================
+class Scheduler:
+    """
+    Um laço por job, todos dividindo o mesmo orçamento de concorrência:
+    - Guilds de um job são espalhadas pela janela (posição fixa por hash + jitter), nada de
+      todas as guilds editando mensagens no mesmo segundo.
+    - SCHED_CONCURRENCY execuções ao mesmo tempo no bot inteiro; o resto espera a vez.
+    - Key ainda rodando do ciclo anterior não é disparada de novo (overlap).
+    - unchanged(): o job informa a entrada (ex: sessões abertas); igual à anterior = pula a edição.
+    """
+    def __init__(self, bot, concurrency=SCHED_CONCURRENCY, jitter=SCHED_JITTER):
+        self.bot = bot
+        self.concurrency = max(1, concurrency)
+        self.budget = asyncio.Semaphore(self.concurrency)
+        self.jitter = max(0.0, min(jitter, 0.5))
+        self.jobs = {}
+
+    # ====================================================
+    # 🧩 REGISTRO (cog_load / cog_unload)
+    # ====================================================
+    def register(self, name, fn, interval=None, keys=None, at=None, window=None):
+        self.unregister(name)
+        job = Job(name, fn, interval or 86400, keys, at, window)
+        self.jobs[name] = job
+        job.task = asyncio.get_running_loop().create_task(self._loop(job))
+        return job
+
+    def unregister(self, name):
+        job = self.jobs.pop(name, None)
+        if job and job.task: job.task.cancel()
+
+    def set_interval(self, name, seconds):
+        job = self.jobs.get(name)
+        if job: job.interval = seconds
+
+    async def close(self):
+        tasks = [job.task for job in self.jobs.values() if job.task]
+        for task in tasks: task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.jobs.clear()
+
+    # ====================================================
+    # 🔁 PULAR O QUE NÃO MUDOU
+    # ====================================================
+    def unchanged(self, name, key, value):
+        """True se a entrada é a mesma da última execução (o job pode parar aqui)."""
+        job = self.jobs.get(name)
+        if not job: return False
+        if job.fingerprints.get(key, _MISSING) == value:
+            job.skipped += 1
+            return True
+        job.fingerprints[key] = value
+        return False
+
+    def forget(self, name, key):
+        """Descarta a entrada guardada (a edição falhou: a próxima execução não pode ser pulada)."""
+        job = self.jobs.get(name)
+        if job: job.fingerprints.pop(key, None)
+
+    # ====================================================
+    # 🧵 EXECUÇÃO
+    # ====================================================
+    def _offset(self, job, key, window):
+        # Posição estável por job+guild (cada job cai num ponto diferente) + jitter do ciclo
+        base = zlib.crc32(f"{job.name}:{key}".encode()) / 2**32
+        return ((base + random.uniform(-self.jitter, self.jitter)) % 1.0) * window
+
+    @staticmethod
+    def _seconds_until(at):
+        tz = at.tzinfo or datetime.timezone.utc # Mesmo padrão do tasks.loop(time=...)
+        now = datetime.datetime.now(tz)
+        target = now.replace(hour=at.hour, minute=at.minute, second=at.second, microsecond=0)
+        if target <= now: target += datetime.timedelta(days=1)
+        return (target - now).total_seconds()
+
+    async def _loop(self, job):
+        await self.bot.wait_until_ready()
+        while True:
+            if job.at:
+                wait = self._seconds_until(job.at)
+                job.next_cycle = time.monotonic() + wait
+                await asyncio.sleep(wait)
+
+            cycle = time.monotonic()
+            try:
+                keys = job.keys() if job.keys else [None]
+                if inspect.isawaitable(keys): keys = await keys
+                keys = list(keys)
+                job.last_keys = len(keys)
+
+                window = min(job.window or job.interval, job.interval)
+                slots = sorted((self._offset(job, key, window), i, key) for i, key in enumerate(keys))
+                for offset, _, key in slots:
+                    delay = cycle + offset - time.monotonic()
+                    if delay > 0: await asyncio.sleep(delay)
+                    self._spawn(job, key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ [SCHEDULER] Falha ao montar o ciclo de {job.name}: {e}")
+
+            if not job.at:
+                job.next_cycle = cycle + job.interval
+                await asyncio.sleep(max(0, job.next_cycle - time.monotonic()))
+
+    def _spawn(self, job, key):
+        if key in job.running:
+            job.overlaps += 1
+            return
+        job.running.add(key)
+        asyncio.get_running_loop().create_task(self._run(job, key))
+
+    async def _run(self, job, key):
+        try:
+            async with self.budget:
+                started = time.perf_counter()
+                try:
+                    await (job.fn(key) if job.keys else job.fn())
+                except Exception as e:
+                    job.errors += 1
+                    job.fingerprints.pop(key, None) # Falhou no meio: próxima execução não pode ser pulada
+                    print(f"❌ [SCHEDULER] {job.name} ({key}): {e}")
+                finally:
+                    elapsed = time.perf_counter() - started
+                    job.runs += 1
+                    job.last_duration = elapsed
+                    job.total_duration += elapsed
+                    job.max_duration = max(job.max_duration, elapsed)
+                    job.last_run = time.time()
+        finally:
+            job.running.discard(key)
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "in_use": self.concurrency - self.budget._value,
+            "jitter": self.jitter,
+            "jobs": [job.to_dict() for job in self.jobs.values()]
+        }